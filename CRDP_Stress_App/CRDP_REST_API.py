@@ -9,6 +9,13 @@
 ######################################################################
 import requests
 import json
+import selectors
+import ssl
+import threading
+import time
+import urllib3
+import zlib
+from termcolor import colored
 
 
 # ---------------- HOT-PATH JSON -------------------------------------------------
@@ -48,6 +55,448 @@ def _loads(resp):
     return resp.json()
 
 
+def _loads_bytes(data):
+    """Parse a raw JSON response body (bytes) - for clients that are not `requests`."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# ---------------- STREAMING BULK RESPONSES ---------------------------------------
+# With -batchsize 0 or large payload files a bulk response is tens or hundreds of
+# MB. _loads() holds the raw body and the fully materialized document at the same
+# time, doubling peak memory, and the worker stalls until the last byte arrives.
+# With streaming on (-streamparse), bulk calls are sent with stream=True and the
+# result array is parsed item by item straight off the socket with ijson, so only
+# the parsed items are ever held. ijson is optional, like orjson.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+STREAM_PARSE_AVAILABLE = ijson is not None
+_stream_parse = False
+
+
+def set_stream_parse(enabled):
+    """Turn streaming parsing of bulk responses on or off (no-op without ijson)."""
+    global _stream_parse
+    _stream_parse = bool(enabled) and ijson is not None
+
+
+def stream_parse_enabled():
+    return _stream_parse
+
+
+def _iter_array(resp, t_name):
+    """
+    Yield the items of the top-level `t_name` array of a streamed (stream=True)
+    requests Response as they are parsed, then drain the rest of the body so the
+    keep-alive connection goes back to the pool.
+    """
+    resp.raw.decode_content = True
+    try:
+        yield from ijson.items(resp.raw, t_name + ".item", use_float=True)
+    finally:
+        resp.raw.drain_conn()
+
+
+def _loads_array(resp, t_name):
+    """Return the `t_name` array of a bulk response - streamed when enabled."""
+    if _stream_parse:
+        return list(_iter_array(resp, t_name))
+    return _loads(resp)[t_name]
+
+
+# ---------------- COMPRESSION ---------------------------------------------------
+# Bulk REVEAL responses repeat external_version in every element and payload
+# mode bodies are base64, so at high rates the load host NIC and the ingress
+# become part of the bottleneck. -compress gzip|zstd sends bulk request bodies
+# with that Content-Encoding and asks for compressed responses (Accept-Encoding).
+# gzip comes from zlib; zstd needs the optional zstandard package. Responses are
+# only offered zstd when the HTTP client can decode it, gzip otherwise.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from urllib3.util.request import ACCEPT_ENCODING as _CLIENT_ACCEPT_ENCODING
+except ImportError:
+    _CLIENT_ACCEPT_ENCODING = "gzip,deflate"
+
+COMPRESSION_CODECS = ("gzip", "zstd")
+RESPONSE_ZSTD_SUPPORTED = "zstd" in _CLIENT_ACCEPT_ENCODING
+APP_CONTENT_ENCODING = "Content-Encoding"
+APP_ACCEPT_ENCODING = "Accept-Encoding"
+_compression = None
+
+
+def compression_available(codec):
+    return codec == "gzip" or (codec == "zstd" and zstandard is not None)
+
+
+def set_compression(codec):
+    """Select the bulk request body codec ("gzip", "zstd") or None for identity."""
+    global _compression
+    _compression = codec
+
+
+def compression_codec():
+    return _compression
+
+
+def _compressor():
+    """A streaming compressor (compress()/flush()) for the selected codec."""
+    if _compression == "zstd":
+        return zstandard.ZstdCompressor().compressobj()
+    return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip framing
+
+
+def _compress(t_data):
+    c = _compressor()
+    return c.compress(_as_bytes(t_data)) + c.flush()
+
+
+def bulk_headers(t_zstdResponses=RESPONSE_ZSTD_SUPPORTED):
+    """Request headers for the bulk calls, including the -compress negotiation."""
+    t_headers = {APP_CONTENT_TYPE: APP_JSON}
+    if _compression is not None:
+        t_headers[APP_CONTENT_ENCODING] = _compression
+        t_headers[APP_ACCEPT_ENCODING] = "zstd, gzip" if t_zstdResponses else "gzip"
+    return t_headers
+
+
+def body_wire_bytes(t_body):
+    """Bytes of a request body as handed to the transport (after compression)."""
+    if isinstance(t_body, StreamedBody):
+        return t_body.sent
+    return len(_as_bytes(t_body))
+
+
+def response_wire_bytes(resp):
+    """Body bytes of a requests Response as received, before content decoding."""
+    return resp.raw.tell()
+
+
+def _record_wire(t_stats, t_body, t_received):
+    # Per-call (request, response) body bytes on the wire, kept next to the
+    # worker's call_records (HTTP headers are not counted).
+    if t_stats is not None:
+        t_stats.call_bytes.append((body_wire_bytes(t_body), t_received))
+
+
+def _record_endpoint(t_stats, t_endpointCRDP, t_status):
+    # Endpoint and HTTP status of a completed call, kept next to the worker's
+    # call_records like call_bytes.
+    if t_stats is not None:
+        t_stats.call_endpoints.append((t_endpointCRDP, t_status))
+
+
+def _record_failure(t_stats, t_endpointCRDP, t_status):
+    # A failed call: (time, endpoint, HTTP status - None for a transport error).
+    if t_stats is not None:
+        t_stats.call_errors.append((time.time(), t_endpointCRDP, t_status))
+
+
+def _record_stream(t_stats, resp):
+    # HTTP/2 transport (http2_transport.H2Response): count the call as one
+    # stream on its connection. requests responses carry no connection_key.
+    t_key = getattr(resp, "connection_key", None)
+    if t_stats is not None and t_key is not None:
+        t_stats.h2_streams[t_key] = t_stats.h2_streams.get(t_key, 0) + 1
+
+
+def _record_tls(t_stats):
+    # TLS handshakes this thread performed (ResumingTLSContext) while making the
+    # call - i.e. the call opened a new connection. Drained into the worker's
+    # metrics so -processes children carry them back too.
+    # The call has read a response, so a TLS 1.3 ticket for the new connection
+    # has arrived by now: keep it for the connections opened after this one.
+    t_events = getattr(_tls_local, "handshakes", None)
+    if t_events:
+        for t_elapsed, t_resumed, t_sock in t_events:
+            _tls_context.keep_session(t_sock)
+            if t_stats is not None:
+                t_stats.tls_handshakes.append((t_elapsed, t_resumed))
+        t_events.clear()
+
+
+# ---------------- STREAMING BULK REQUESTS ----------------------------------------
+# In -payload mode each item is a full base64 copy of the file, so a bulk body
+# of 1000 items is a >1 GB JSON string built by _dumps before the first byte is
+# sent. With streaming on (-streambody) the body is produced as a generator -
+# the non-array fields, then the array one item at a time - and sent with
+# chunked Transfer-Encoding, so client memory holds roughly one item's encoding
+# and transmission overlaps serialization. Consecutive identical items (the
+# same object, as in payload and random modes) are encoded only once.
+STREAM_BODY_CHUNK = 64 * 1024
+_stream_body = False
+
+
+def set_stream_body(enabled):
+    """Turn chunked, incrementally serialized bulk request bodies on or off."""
+    global _stream_body
+    _stream_body = bool(enabled)
+
+
+def stream_body_enabled():
+    return _stream_body
+
+
+def _as_bytes(t_encoded):
+    # orjson returns bytes, stdlib json returns str.
+    return t_encoded if isinstance(t_encoded, bytes) else t_encoded.encode("utf-8")
+
+
+class StreamedBody:
+    """Iterable request body produced piece by piece; `sent` counts the bytes handed out."""
+    def __init__(self, t_pieces):
+        self._pieces = t_pieces
+        self.sent = 0
+
+    def __iter__(self):
+        for piece in self._pieces:
+            self.sent += len(piece)
+            yield piece
+
+
+def _iter_body(t_body, t_array, t_stats=None):
+    """
+    Yield the JSON encoding of t_body in pieces of about STREAM_BODY_CHUNK bytes
+    (larger when a single item is larger), compressed on the fly under -compress.
+    t_array is the list value inside t_body that is streamed item by item; the
+    other fields go out first, in their dict order. Encode (and compression)
+    time accumulates into t_stats.serialize_seconds.
+    """
+    t_start = time.perf_counter()
+    c = _compressor() if _compression is not None else None
+    head = {k: v for k, v in t_body.items() if v is not t_array}
+    t_arrayName = next(k for k, v in t_body.items() if v is t_array)
+    buf = bytearray(_as_bytes(_dumps(head))[:-1])  # drop the closing brace
+    if head:
+        buf += b","
+    buf += _as_bytes(_dumps(t_arrayName)) + b":["
+    last_item, last_encoded = None, b""
+    for i, item in enumerate(t_array):
+        if i == 0 or item is not last_item:
+            last_item, last_encoded = item, _as_bytes(_dumps(item))
+        if i:
+            buf += b","
+        buf += last_encoded
+        if len(buf) >= STREAM_BODY_CHUNK:
+            piece = c.compress(bytes(buf)) if c is not None else bytes(buf)
+            buf.clear()
+            if t_stats is not None:
+                t_stats.serialize_seconds += time.perf_counter() - t_start
+            if piece:
+                yield piece
+            t_start = time.perf_counter()
+    buf += b"]}"
+    piece = c.compress(bytes(buf)) + c.flush() if c is not None else bytes(buf)
+    if t_stats is not None:
+        t_stats.serialize_seconds += time.perf_counter() - t_start
+    yield piece
+
+
+# ---------------- REQUEST BODY CACHE --------------------------------------------
+# In random and payload modes every full bulk PROTECT message carries the same
+# payloads (CRDP_Stress.py hands out one shared list object for them), and timed
+# runs replay the same messages lap after lap. Re-serializing an identical
+# {protection_policy_name, data_array} dict for every call is a large share of
+# client CPU at big batch sizes, so encoded bodies are cached and reused.
+#
+# Entries are keyed by the message list's identity and length and keep a
+# reference to the list, so an id() can never be recycled for a different list
+# while its entry lives. Callers must not mutate a message after sending it.
+#
+# Messages that are built afresh for every send (workload.MessageSource when the
+# batch size does not line up with the cells) come as OneOffMessage lists: their
+# identity never repeats, so they are neither looked up nor stored - storing them
+# would only pin every message of the run in memory at a 0% hit rate.
+BODY_CACHE_MAX_BYTES = 256 * 1000 * 1000
+
+
+class OneOffMessage(list):
+    """A message list built for a single send; BodyCache never caches its body."""
+    __slots__ = ()
+
+
+class BodyCache:
+    """Encoded request bodies, keyed by (operation, policy, user, id(message), len(message))."""
+    def __init__(self, max_bytes=BODY_CACHE_MAX_BYTES):
+        self.enabled = True
+        self.max_bytes = max_bytes
+        self._entries = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._bytes = 0
+
+    def encode(self, t_key, t_message, t_body, t_stats=None, t_store=True):
+        """
+        Return the encoded t_body, reusing the cached bytes when t_message was
+        sent before under the same t_key. t_stats (a WorkerMetrics) collects
+        hits, misses, time spent serializing and time saved by hits (each hit
+        saves what the original encode cost). t_store=False looks up but never
+        adds - for one-off messages such as round-trip reveals; OneOffMessage
+        lists are never looked up or stored.
+
+        Under -compress the cached bytes are the compressed body, so a hit also
+        saves the compression. With -streambody the cache is bypassed and a
+        StreamedBody of body pieces (see _iter_body) is returned instead of bytes.
+        """
+        if _stream_body:
+            if t_stats is not None:
+                t_stats.body_cache_misses += 1
+            return StreamedBody(_iter_body(t_body, t_message, t_stats))
+
+        key = (t_key, id(t_message), len(t_message))
+        cacheable = self.enabled and not isinstance(t_message, OneOffMessage)
+        if cacheable:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is t_message:
+                if t_stats is not None:
+                    t_stats.body_cache_hits += 1
+                    t_stats.serialize_seconds_saved += entry[2]
+                return entry[1]
+
+        t_start = time.perf_counter()
+        body = _dumps(t_body)
+        if _compression is not None:
+            body = _compress(body)
+        cost = time.perf_counter() - t_start
+        if t_stats is not None:
+            t_stats.body_cache_misses += 1
+            t_stats.serialize_seconds += cost
+
+        if cacheable and t_store:
+            with self._lock:
+                if key not in self._entries and self._bytes + len(body) <= self.max_bytes:
+                    self._entries[key] = (t_message, body, cost)
+                    self._bytes += len(body)
+        return body
+
+
+BODY_CACHE = BodyCache()
+
+
+# ---------------- PER-CALL PHASE BREAKDOWN --------------------------------------
+# High client CPU says the load generator is busy, not where. With -breakdown
+# every bulk call is split into client-side phases, timed back to back:
+#
+#   serialize - encoding the request body (near zero on a body cache hit)
+#   send      - connection checkout/connect and writing the request
+#   ttfb      - request written -> response headers (CRDP + network)
+#   download  - reading the response body
+#   parse     - decoding the JSON result array
+#
+# send ends when urllib3 has written the request: while the breakdown is on, a
+# wrapper around urllib3's HTTPConnection.request stamps that time in a
+# thread-local (set_call_breakdown(False) puts the original back). Calls
+# that do not go through urllib3 (-transport h2c/h2) fold send into ttfb.
+# Responses are read with stream=True so the body download is timed apart from
+# the headers; with -streamparse download and parse overlap and are reported
+# together as download_parse. Under -streambody serialization overlaps the
+# upload and is part of send.
+_call_breakdown = False
+_breakdown_local = threading.local()
+# urllib3's own HTTPConnection.request while the send stamp is installed.
+_unstamped_request = None
+
+
+def _install_send_stamp():
+    global _unstamped_request
+    if _unstamped_request is not None:
+        return
+    t_request = _unstamped_request = urllib3.connection.HTTPConnection.request
+
+    def request(self, *args, **kwargs):
+        try:
+            return t_request(self, *args, **kwargs)
+        finally:
+            _breakdown_local.sent = time.perf_counter()
+
+    urllib3.connection.HTTPConnection.request = request
+
+
+def _remove_send_stamp():
+    global _unstamped_request
+    if _unstamped_request is not None:
+        urllib3.connection.HTTPConnection.request = _unstamped_request
+        _unstamped_request = None
+
+
+def set_call_breakdown(enabled):
+    """Turn the per-call phase breakdown (-breakdown) on or off (off also removes the send stamp)."""
+    global _call_breakdown
+    _call_breakdown = bool(enabled)
+    if _call_breakdown:
+        _install_send_stamp()
+    else:
+        _remove_send_stamp()
+
+
+def call_breakdown_enabled():
+    return _call_breakdown
+
+
+def bulk_stream():
+    """stream= for bulk requests: streamed parsing and the breakdown both read the body after the headers."""
+    return _stream_parse or _call_breakdown
+
+
+class CallTimer:
+    """
+    Phase times of one bulk call (see above), in seconds. Each method closes
+    the phase that ran since the previous one; all are no-ops unless the
+    breakdown is on.
+    """
+    def __init__(self):
+        self.phases = None
+        if _call_breakdown:
+            self.phases = {}
+            _breakdown_local.sent = None
+            self._last = time.perf_counter()
+
+    def lap(self, t_name):
+        if self.phases is not None:
+            t_now = time.perf_counter()
+            self.phases[t_name] = t_now - self._last
+            self._last = t_now
+
+    def headers(self):
+        """The response headers are in: split the time since the last lap into send and ttfb."""
+        if self.phases is None:
+            return
+        t_now = time.perf_counter()
+        t_sent = getattr(_breakdown_local, "sent", None)
+        if t_sent is not None and self._last <= t_sent <= t_now:
+            self.phases["send"] = t_sent - self._last
+            self._last = t_sent
+        self.lap("ttfb")
+
+    def download(self, t_resp):
+        """Read the response body now (unless it is streamed into the parser)."""
+        if self.phases is not None and not _stream_parse:
+            # Accessing .content forces the download; the parse then reuses it.
+            t_body = t_resp.content
+            self.lap("download")
+            return t_body
+
+    def parsed(self):
+        self.lap("download_parse" if _stream_parse else "parse")
+
+
+def _record_breakdown(t_stats, t_timer):
+    # The call's phase times, into the worker's CallBreakdown.
+    if t_stats is not None and t_timer.phases is not None:
+        t_stats.call_breakdown.add(t_timer.phases)
+
+
 # ---------------- CONSTANTS -----------------------------------------------------
 STATUS_CODE_OK = 200
 NET_TIMEOUT = 600
@@ -67,6 +516,169 @@ CRDP_USERNAME_NAME = "username"
 APP_CONTENT_TYPE = "Content-Type"
 APP_JSON = "application/json"
 
+# URL scheme for every CRDP call. "http" matches the no-tls K8 manifests; the
+# HTTP/2-over-TLS transport switches it to "https".
+_url_scheme = "http"
+
+
+def set_url_scheme(t_scheme):
+    global _url_scheme
+    _url_scheme = t_scheme
+
+
+# Per-call deadline in seconds (-timeout). NET_TIMEOUT unless set: a stuck pod
+# would otherwise hold a worker for ten minutes. requests applies it to the
+# connect and to every read; aiohttp to the whole call.
+_call_timeout = NET_TIMEOUT
+
+
+def set_call_timeout(t_seconds):
+    global _call_timeout
+    _call_timeout = t_seconds if t_seconds is not None else NET_TIMEOUT
+
+
+def call_timeout():
+    return _call_timeout
+
+
+def crdp_url(t_endpointCRDP, t_path):
+    return "%s://%s%s" % (_url_scheme, t_endpointCRDP, t_path)
+
+
+# ---------------- TLS -------------------------------------------------------------
+# -tls switches every CRDP call to https. Certificate verification follows
+# tls_verify(): False (default - as the plain-http calls always passed),
+# True (certifi CAs) or the path of a CA bundle. Worker sessions share one
+# ResumingTLSContext (tls_context()), so connections after the first resume the
+# TLS session from a ticket instead of a full handshake, and every handshake is
+# logged for the calling thread (_record_tls) for the per-phase TLS report.
+_tls_verify = False
+_tls_context = None
+_tls_local = threading.local()
+
+
+class ResumingTLSContext(ssl.SSLContext):
+    """
+    Client SSLContext that offers the most recent resumable session when a new
+    connection is wrapped, and logs each handshake as (seconds, resumed) for the
+    calling thread. urllib3 and httpx both wrap with do_handshake_on_connect, so
+    wrap_socket() times exactly the handshake.
+    """
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True,
+                    suppress_ragged_eofs=True, server_hostname=None, session=None):
+        if session is None:
+            session = self._resumable_session()
+        t_start = time.perf_counter()
+        t_sock = super().wrap_socket(
+            sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname, session=session,
+        )
+        t_elapsed = time.perf_counter() - t_start
+        self._donor = t_sock
+        if not hasattr(_tls_local, "handshakes"):
+            _tls_local.handshakes = []
+        _tls_local.handshakes.append((t_elapsed, t_sock.session_reused, t_sock))
+        return t_sock
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        # asyncio (the async engine) handshakes over BIOs: resume, but the
+        # handshake completes later inside the event loop and is not timed.
+        if session is None:
+            session = self._resumable_session()
+        t_obj = super().wrap_bio(incoming, outgoing, server_side=server_side,
+                                 server_hostname=server_hostname, session=session)
+        self._donor = t_obj
+        return t_obj
+
+    def keep_session(self, t_conn):
+        # Remember t_conn's session for resumption if the server issued a
+        # ticket. TLS 1.3 tickets arrive after the handshake, and a connection
+        # that is closed or still handshaking has no session to give.
+        try:
+            t_session = t_conn.session
+        except ValueError:
+            return
+        if t_session is not None and t_session.has_ticket:
+            self._session = t_session
+
+    def _resumable_session(self):
+        # The most recently opened connection is the likeliest to hold a fresh ticket.
+        t_donor = getattr(self, "_donor", None)
+        if t_donor is not None:
+            self.keep_session(t_donor)
+        return getattr(self, "_session", None)
+
+
+def set_tls(t_verify, t_alpn=None):
+    # -----------------------------------------------------------------------------
+    # Switch CRDP calls to https. t_verify as for requests' `verify=`; t_alpn
+    # lists the ALPN protocols to offer (["h2"] for the HTTP/2 transport).
+    # -----------------------------------------------------------------------------
+    global _tls_verify, _tls_context
+    t_context = ResumingTLSContext(ssl.PROTOCOL_TLS_CLIENT)
+    if t_verify is False:
+        t_context.check_hostname = False
+        t_context.verify_mode = ssl.CERT_NONE
+        # urllib3 would otherwise warn on every unverified call (its filter is
+        # "always"), flooding the output and running inside the timed call.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        print(colored("  TLS: server certificate NOT verified (use -cacert or -tlsverify to verify it)", "yellow"))
+    else:
+        t_context.load_verify_locations(requests.certs.where() if t_verify is True else t_verify)
+    if t_alpn:
+        t_context.set_alpn_protocols(t_alpn)
+    _tls_verify = t_verify
+    _tls_context = t_context
+    set_url_scheme("https")
+
+
+def tls_verify():
+    return _tls_verify
+
+
+def settle_tls(t_socks, t_timeout=0.2):
+    # -----------------------------------------------------------------------------
+    # Read the post-handshake TLS 1.3 session tickets off freshly opened, idle
+    # connections (and keep them for resumption). Left unread they make the
+    # socket look readable, and urllib3 takes a readable idle connection for
+    # one the server has dropped and silently reconnects.
+    # -----------------------------------------------------------------------------
+    t_selector = selectors.DefaultSelector()
+    for t_sock in t_socks:
+        if isinstance(t_sock, ssl.SSLSocket):
+            t_selector.register(t_sock, selectors.EVENT_READ)
+    t_deadline = time.perf_counter() + t_timeout
+    while t_selector.get_map():
+        t_left = t_deadline - time.perf_counter()
+        if t_left <= 0:
+            break
+        for t_key, _ in t_selector.select(t_left):
+            t_sock = t_key.fileobj
+            t_prev = t_sock.gettimeout()
+            t_sock.setblocking(False)
+            try:
+                t_data = t_sock.recv(1)
+            except ssl.SSLWantReadError:
+                # Only tickets (no application data): more may follow.
+                _tls_context.keep_session(t_sock)
+                continue
+            finally:
+                t_sock.settimeout(t_prev)
+            # Closed, or unexpected data: nothing to settle.
+            t_selector.unregister(t_sock)
+    t_selector.close()
+
+
+def tls_context():
+    return _tls_context
+
+
+class TLSAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter whose connection pools use the shared ResumingTLSContext."""
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = _tls_context
+        return super().init_poolmanager(*args, **kwargs)
+
 
 def protectData(t_endpointCRDP, t_data, t_protectionPolicy):
     # -----------------------------------------------------------------------------
@@ -75,7 +687,7 @@ def protectData(t_endpointCRDP, t_data, t_protectionPolicy):
     # Assemble and send the command to CRDP for protecting (encrypting) data and
     # retrieve the result and the external version.
     # -----------------------------------------------------------------------------
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_PROTECT)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_PROTECT)
 
     t_headers = {APP_CONTENT_TYPE: APP_JSON}
     t_dataStr = {
@@ -85,16 +697,16 @@ def protectData(t_endpointCRDP, t_data, t_protectionPolicy):
 
     # Now that everything is populated, assemble and post command
     try:
-        r = requests.post(
-            t_endpoint, data=_dumps(t_dataStr), headers=t_headers, verify=False, timeout=NET_TIMEOUT
+        r = (t_session or requests).post(
+            t_endpoint, data=_dumps(t_dataStr), headers=t_headers, verify=tls_verify(), timeout=_call_timeout
         )
     except requests.exceptions.RequestException as e:
         print("protectData-exception:\n", e)
-        exit()
+        raise
 
     if r.status_code != STATUS_CODE_OK:
         kPrintError("protectData", r)
-        exit()
+        raise CRDPHTTPError(r.status_code)
 
     # Extract the UserAuthId from the value of the key-value pair of the JSON reponse.
     # external_version is optional - policies that do not use key rotation omit it.
@@ -105,14 +717,16 @@ def protectData(t_endpointCRDP, t_data, t_protectionPolicy):
     return t_protectedData, t_version
 
 
-def screenProtectPolicy(t_endpointCRDP, t_data, t_protectionPolicy):
+def screenProtectPolicy(t_endpointCRDP, t_data, t_protectionPolicy, t_session=None):
     # -----------------------------------------------------------------------------
     # Test whether a sample value can be protected under the given policy.
     #
     # Used to pre-screen CSV columns. Returns (ok, message) instead of exiting on
     # failure so callers can skip columns whose data does not match the policy.
+    # t_session (optional) sends it over the run's transport, e.g. an H2Session
+    # for an HTTP/2-only endpoint; plain requests (HTTP/1.1) otherwise.
     # -----------------------------------------------------------------------------
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_PROTECT)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_PROTECT)
 
     t_headers = {APP_CONTENT_TYPE: APP_JSON}
     t_dataStr = {
@@ -121,8 +735,8 @@ def screenProtectPolicy(t_endpointCRDP, t_data, t_protectionPolicy):
     }
 
     try:
-        r = requests.post(
-            t_endpoint, data=_dumps(t_dataStr), headers=t_headers, verify=False, timeout=NET_TIMEOUT
+        r = (t_session or requests).post(
+            t_endpoint, data=_dumps(t_dataStr), headers=t_headers, verify=tls_verify(), timeout=_call_timeout
         )
     except requests.exceptions.RequestException as e:
         return False, str(e)
@@ -133,39 +747,53 @@ def screenProtectPolicy(t_endpointCRDP, t_data, t_protectionPolicy):
     return True, ""
 
 
-def protectBulkData(t_endpointCRDP, t_dataArray, t_protectionPolicy):
+def protectBulkData(t_endpointCRDP, t_dataArray, t_protectionPolicy, t_stats=None):
     # -----------------------------------------------------------------------------
     # REST Assembly for bulk data protection
     #
     # Assemble and send the command to CRDP for protecting (encrypting) data and
-    # retrieve the result and the external version as an array.
+    # retrieve the result and the external version as an array. The encoded body
+    # comes from BODY_CACHE; t_stats (optional) collects its hit/serialize counters.
     # -----------------------------------------------------------------------------
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_BULK_PROTECT)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_BULK_PROTECT)
 
-    t_headers = {APP_CONTENT_TYPE: APP_JSON}
+    t_headers = bulk_headers()
     t_dataStr = {
         CRDP_PROTECTION_POLICY_NAME: t_protectionPolicy,
         CRDP_DATA_ARRAY_NAME: t_dataArray,
     }
+    t_timer = CallTimer()
+    t_body = BODY_CACHE.encode((CRDP_BULK_PROTECT, t_protectionPolicy), t_dataArray, t_dataStr, t_stats)
+    t_timer.lap("serialize")
 
     # Now that everything is populated, assemble and post command
     try:
         r = requests.post(
-            t_endpoint, data=_dumps(t_dataStr), headers=t_headers, verify=False, timeout=NET_TIMEOUT
+            t_endpoint, data=t_body, headers=t_headers, verify=tls_verify(), timeout=_call_timeout,
+            stream=bulk_stream(),
         )
     except requests.exceptions.RequestException as e:
         print("protectBulkData-exception:\n", e)
-        exit()
+        _record_failure(t_stats, t_endpointCRDP, None)
+        raise
 
+    t_timer.headers()
     if r.status_code != STATUS_CODE_OK:
         kPrintError("protectBulkData", r)
-        exit()
+        _record_failure(t_stats, t_endpointCRDP, r.status_code)
+        raise CRDPHTTPError(r.status_code)
 
+    t_timer.download(r)
     # Extract the UserAuthId from the value of the key-value pair of the JSON reponse.
     # external_version is optional - policies that do not use key rotation omit it
     # from the per-item entries in protected_data_array.
-    t_protectedData = _loads(r)[CRDP_PROTECTED_DATA_ARRAY_NAME]
+    t_protectedData = _loads_array(r, CRDP_PROTECTED_DATA_ARRAY_NAME)
+    t_timer.parsed()
     t_version = t_protectedData[0].get(CRDP_EXTERNAL_VER_NAME) if t_protectedData else None
+    _record_wire(t_stats, t_body, response_wire_bytes(r))
+    _record_breakdown(t_stats, t_timer)
+    _record_endpoint(t_stats, t_endpointCRDP, r.status_code)
+    _record_tls(t_stats)
 
     return t_protectedData, t_version
 
@@ -177,7 +805,7 @@ def revealData(t_endpointCRDP, t_data, t_protectionPolicy, t_externalVersion, t_
     # Assemble and send the command to CRDP for reveal (decrypting) data and
     # retrieve the result and the external version.
     # -----------------------------------------------------------------------------
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_REVEAL)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_REVEAL)
 
     t_headers = {APP_CONTENT_TYPE: APP_JSON}
     t_dataStr = {
@@ -191,16 +819,16 @@ def revealData(t_endpointCRDP, t_data, t_protectionPolicy, t_externalVersion, t_
 
     # Now that everything is populated, assemble and post command
     try:
-        r = requests.post(
-            t_endpoint, data=_dumps(t_dataStr), headers=t_headers, verify=False, timeout=NET_TIMEOUT
+        r = (t_session or requests).post(
+            t_endpoint, data=_dumps(t_dataStr), headers=t_headers, verify=tls_verify(), timeout=_call_timeout
         )
     except requests.exceptions.RequestException as e:
         print("revealData-exception:\n", e)
-        exit()
+        raise
 
     if r.status_code != STATUS_CODE_OK:
         kPrintError("revealData", r)
-        exit()
+        raise CRDPHTTPError(r.status_code)
 
     # Extract the UserAuthId from the value of the key-value pair of the JSON reponse.
     t_revealedData = _loads(r)[CRDP_DATA_NAME]
@@ -209,7 +837,7 @@ def revealData(t_endpointCRDP, t_data, t_protectionPolicy, t_externalVersion, t_
 
 
 def revealBulkData(
-    t_endpointCRDP, t_dataArray, t_protectionPolicy, t_externalVersion, t_user
+    t_endpointCRDP, t_dataArray, t_protectionPolicy, t_externalVersion, t_user, t_stats=None
 ):
     # -----------------------------------------------------------------------------
     # REST Assembly for bulk data reveal
@@ -217,34 +845,54 @@ def revealBulkData(
     # Assemble and send the command to CRDP for prevealingg (decrypting) bulk data and
     # retrieve the result as an array.
     # -----------------------------------------------------------------------------
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_BULK_REVEAL)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_BULK_REVEAL)
 
-    t_headers = {APP_CONTENT_TYPE: APP_JSON}
+    t_headers = bulk_headers()
     t_dataStr = {
         CRDP_PROTECTION_POLICY_NAME: t_protectionPolicy,
         CRDP_USERNAME_NAME: t_user,
         CRDP_PROTECTED_DATA_ARRAY_NAME: t_dataArray,
     }
+    t_timer = CallTimer()
+    t_body = BODY_CACHE.encode((CRDP_BULK_REVEAL, t_protectionPolicy, t_user), t_dataArray, t_dataStr, t_stats)
+    t_timer.lap("serialize")
 
     # Now that everything is populated, assemble and post command
     try:
         r = requests.post(
-            t_endpoint, data=_dumps(t_dataStr), headers=t_headers, verify=False, timeout=NET_TIMEOUT
+            t_endpoint, data=t_body, headers=t_headers, verify=tls_verify(), timeout=_call_timeout,
+            stream=bulk_stream(),
         )
     except requests.exceptions.RequestException as e:
         print("revealBulkData-exception:\n", e)
-        exit()
+        _record_failure(t_stats, t_endpointCRDP, None)
+        raise
 
+    t_timer.headers()
     if r.status_code != STATUS_CODE_OK:
         kPrintError("revealBulkData", r)
-        exit()
+        _record_failure(t_stats, t_endpointCRDP, r.status_code)
+        raise CRDPHTTPError(r.status_code)
 
+    t_timer.download(r)
     # Extract the UserAuthId from the value of the key-value pair of the JSON reponse.
-    t_revealedDataArray = _loads(r)[CRDP_DATA_ARRAY_NAME]
+    t_revealedDataArray = _loads_array(r, CRDP_DATA_ARRAY_NAME)
+    t_timer.parsed()
+    _record_wire(t_stats, t_body, response_wire_bytes(r))
+    _record_breakdown(t_stats, t_timer)
+    _record_endpoint(t_stats, t_endpointCRDP, r.status_code)
+    _record_tls(t_stats)
 
     return t_revealedDataArray
 
 
+class CRDPHTTPError(Exception):
+    """A non-200 CRDP reply, raised by the session / async wrappers. str() is "HTTP <status>"."""
+    def __init__(self, t_status):
+        super().__init__(f"HTTP {t_status}")
+        self.status_code = t_status
+
+
 def kPrintError(t_str, t_r):
     # -----------------------------------------------------------------------------
     # The objective is to print the error information back in the even that a HTTPS
@@ -7,12 +7,40 @@
 # Time will be measured for the file to be encrypted excluding file I/O actions.
 #
 # Usage:  CRDP_Stress.py
-#           -endpoint <CRDP endpoint hostname or IP address>
+#           -endpoint <CRDP endpoint hostname or IP address>[,<endpoint>...]
+#           -balance <leastoutstanding|ewma> - how calls are spread over several endpoints
 #           -policy <protection policy name>
 #           -user <username>
 #           -iterations <iteration count>
-#           -batchsize <plaintext payloads per bulk message; 0 = all-in-one>
+#           -batchsize <plaintext payloads per bulk message; 0 = all-in-one; auto = calibrate>
+#           -calibrate <seconds> - length of each -batchsize auto calibration step
+#           -p99budget <ms> - -batchsize auto only picks sizes whose p99 call latency meets this
 #           -threads <parallel worker count>
+#           -dispatch <shared|static> - workers pull messages from one queue (default) or own fixed shares
+#           -adaptive <aimd|gradient> - adapt the calls in flight to latency, up to -threads
+#           -timeout <seconds> - per-call deadline (default 600)
+#           -retries <count> - re-send failed bulk calls (transport error, timeout, 5xx, 429) with backoff
+#           -hedge - re-send a call still unanswered after the running p95 latency; first reply wins
+#           -engine <thread|async> - thread pool (default) or asyncio event loop
+#           -processes <worker process count> - each running -threads worker threads
+#           -rate <txns/sec> - open-loop: send bulk calls on a fixed timetable
+#           -mode <phased|roundtrip> - roundtrip reveals each batch as soon as it is protected
+#           -duration <seconds> - timed run: replay the workload for this long per phase
+#           -warmup <seconds> / -cooldown <seconds> - excluded from the reported metrics
+#           -nobodycache - re-serialize every bulk request body (disables the body cache)
+#           -streamparse - parse bulk responses incrementally off the socket (needs ijson)
+#           -streambody - send bulk request bodies chunked, serialized item by item
+#           -compress <gzip|zstd> - compress bulk request bodies and accept compressed responses
+#           -breakdown - time each bulk call's serialize / send / ttfb / download / parse phases
+#           -transport <http1|h2c|h2> - HTTP/1.1 (default) or HTTP/2 multiplexed (needs httpx[http2])
+#           -connections <count> - HTTP/2 connections shared by the workers (default 1)
+#           -nopool - open connections per worker and phase instead of the run's pre-warmed pool
+#           -tls - call CRDP over https (resumed TLS sessions, handshake cost reported)
+#           -cacert <filename> / -tlsverify - verify the server certificate (CA bundle / certifi CAs)
+#           -results <keep|discard|sample:N|spool:file> - what is kept of the calls' results
+#           -metricsport <[host:]port> - serve live Prometheus metrics (txns/sec, in flight, latency, errors, CPU)
+#           -metricslog <filename> - write the same live metrics as one JSON line per second
+#           -quiet - headless: no progress bars and no colored output (e.g. output to a log file)
 #           -payload <filename> - a single file encrypted in its entirety
 #           -csvlist <filename> - a CSV file; every data cell is protected and a
 #                                 <name>_protected<ext> copy is written at the end
@@ -21,6 +49,13 @@ import argparse
 import time
 from CRDP_REST_API import *
 from parallel_execution import *
+from async_engine import *
+from http2_transport import *
+from endpoint_balancer import *
+from batch_tuner import *
+from concurrency_limiter import *
+from workload import *
+from live_metrics import *
 import random
 from tqdm import tqdm
 from termcolor import colored
@@ -56,7 +91,11 @@ class charSet(Enum):
 # Code for collecting and parsing input information from command line
 #####################################################################
 parser = argparse.ArgumentParser()
-parser.add_argument("-endpoint", nargs=1, action="store", required=True, dest="endpointCRDP", help="CRDP Endpoint FQDN or IP Address")
+parser.add_argument("-endpoint", nargs=1, action="store", required=True, dest="endpointCRDP", help="CRDP Endpoint FQDN or IP Address. A comma-separated list spreads the bulk calls over all of them (see -balance)")
+parser.add_argument(
+    "-balance", nargs=1, action="store", required=False, dest="balance", choices=list(BALANCE_POLICIES), default=["leastoutstanding"],
+    help="With several -endpoint entries: send each bulk call to the endpoint with the fewest outstanding requests (leastoutstanding - default) or the lowest EWMA latency x outstanding requests (ewma). Endpoints that keep failing are skipped for a while (circuit breaker) and failed calls are retried on another endpoint"
+)
 parser.add_argument(
     "-policy", nargs=1, action="store", required=True, dest="protectionPolicy", help="CRDP Protection Policy Name"
 )
@@ -65,12 +104,124 @@ parser.add_argument(
 )
 parser.add_argument("-user", nargs=1, action="store", required=True, dest="username", help="Username of user to be used against Access Policy")
 parser.add_argument(
-    "-batchsize", nargs=1, action="store", required=False, dest="batchsize", type=int, default=[1],
-    help="Number of plaintext payloads sent in a single message to CRDP.  Use a value of 0 if all plaintext iterations or plaintext messages should be sent in a single message."
+    "-batchsize", nargs=1, action="store", required=False, dest="batchsize", default=["1"],
+    help="Number of plaintext payloads sent in a single message to CRDP.  Use a value of 0 if all plaintext iterations or plaintext messages should be sent in a single message, or 'auto' to pick the size with the best txns/sec in a calibration window before PROTECT."
+)
+parser.add_argument(
+    "-calibrate", nargs=1, action="store", required=False, dest="calibrate", type=float,
+    help="With -batchsize auto: seconds each calibration step runs one message size (default %s)" % TUNE_STEP_SECONDS
+)
+parser.add_argument(
+    "-p99budget", nargs=1, action="store", required=False, dest="p99Budget", type=float,
+    help="With -batchsize auto: only choose message sizes whose p99 per-call latency stays within this many milliseconds"
 )
 parser.add_argument(
     "-threads", nargs=1, action="store", required=False, dest="numThreads", type=int, default=[1], metavar="NUMTHREADS", help="Number of concurrent client threads sending data to CRDP for processing"
 )
+parser.add_argument(
+    "-dispatch", nargs=1, action="store", required=False, dest="dispatch", choices=["shared", "static"], default=["shared"],
+    help="How messages reach the workers: 'shared' (default) - each worker pulls the next message from one queue when it is ready, so a slow connection or pod does not hold back a fixed share; 'static' - fixed round-robin shares per worker. The time spent with fewer than all workers busy is reported per phase"
+)
+parser.add_argument(
+    "-adaptive", nargs=1, action="store", required=False, dest="adaptive", choices=list(LIMIT_ALGORITHMS),
+    help="Adapt the number of bulk calls in flight at runtime to the observed call latency ('aimd' or 'gradient'), between 1 and -threads, instead of keeping every worker busy. The concurrency limit is reported over time per phase (thread engine, single process, closed loop)"
+)
+parser.add_argument(
+    "-timeout", nargs=1, action="store", required=False, dest="callTimeout", type=float,
+    help="Per-call deadline in seconds (default %s): the connect and every read of a call (the whole call with -engine async). A call that runs out of time fails like a transport error" % NET_TIMEOUT
+)
+parser.add_argument(
+    "-retries", nargs=1, action="store", required=False, dest="retries", type=int, default=[0],
+    help="Re-send a bulk call that failed with a transport error, timeout, 5xx or 429 up to this many times, after a jittered exponential backoff. A call that still fails is counted and skipped and the worker carries on"
+)
+parser.add_argument(
+    "-hedge", action="store_true", required=False, dest="hedge",
+    help="Hedged requests (thread engine): send a second copy of a bulk call that is still unanswered after the phase's running p95 latency - to another endpoint when there are several - and take the first reply. Hedges, wins and the wasted work are reported per phase"
+)
+parser.add_argument(
+    "-engine", nargs=1, action="store", required=False, dest="engine", choices=["thread", "async"], default=["thread"],
+    help="Load engine: 'thread' (one OS thread per in-flight call) or 'async' (asyncio + aiohttp; -threads then sets the number of concurrent in-flight calls and can be in the hundreds or thousands)"
+)
+parser.add_argument(
+    "-processes", nargs=1, action="store", required=False, dest="numProcesses", type=int, default=[1],
+    help="Number of worker processes (thread engine only). Messages are sharded across processes, each running -threads worker threads, and the results are merged into one summary - sidesteps the GIL without multi_client.py"
+)
+parser.add_argument(
+    "-rate", nargs=1, action="store", required=False, dest="targetRate", type=float,
+    help="Open-loop mode: offer a constant arrival rate of this many txns/sec (payloads/sec), releasing bulk calls on a fixed timetable independent of completions. Latency is also reported from each call's intended send time (coordinated-omission corrected). -threads caps the calls in flight"
+)
+parser.add_argument(
+    "-mode", nargs=1, action="store", required=False, dest="runMode", choices=["phased", "roundtrip"], default=["phased"],
+    help="'phased' (default) runs all of PROTECT, then all of REVEAL. 'roundtrip' has each worker reveal every batch as soon as it is protected, recording per-stage and end-to-end round-trip latency with ciphertext memory bounded by the batches in flight"
+)
+parser.add_argument(
+    "-duration", nargs=1, action="store", required=False, dest="duration", type=float,
+    help="Timed run: each phase replays the workload for -warmup + DURATION + -cooldown seconds and txns/sec and latency are measured over the DURATION window only. The workload built from -iterations / -payload / -csvlist is the message pool that gets replayed"
+)
+parser.add_argument(
+    "-warmup", nargs=1, action="store", required=False, dest="warmup", type=float, default=[0.0],
+    help="Seconds at the start of each phase excluded from the reported metrics (connection setup, server-side caches and JIT warming up)"
+)
+parser.add_argument(
+    "-cooldown", nargs=1, action="store", required=False, dest="cooldown", type=float, default=[0.0],
+    help="Seconds at the end of each phase excluded from the reported metrics (the ragged tail as workers finish)"
+)
+parser.add_argument(
+    "-nobodycache", action="store_true", required=False, dest="noBodyCache",
+    help="Serialize every bulk request body afresh instead of reusing the encoded body of a message that was already sent (for A/B comparison of client-side serialization cost)"
+)
+parser.add_argument(
+    "-streamparse", action="store_true", required=False, dest="streamParse",
+    help="Parse bulk responses incrementally as they arrive (ijson) instead of buffering the whole body and then parsing it - keeps peak memory down with -batchsize 0 or large payload files"
+)
+parser.add_argument(
+    "-streambody", action="store_true", required=False, dest="streamBody",
+    help="Send bulk request bodies with chunked Transfer-Encoding, serializing one item at a time as the upload proceeds, instead of building the whole JSON body first - keeps client memory near one item with large -payload files (bypasses the request body cache)"
+)
+parser.add_argument(
+    "-compress", nargs=1, action="store", required=False, dest="compress", choices=list(COMPRESSION_CODECS),
+    help="Send bulk request bodies with this Content-Encoding and ask for compressed responses (Accept-Encoding). zstd needs the zstandard package. Bytes on the wire are reported per phase either way"
+)
+parser.add_argument(
+    "-breakdown", action="store_true", required=False, dest="breakdown",
+    help="Time every bulk call's client-side phases - serialize, connect/send, time to first byte, body download and parse - and report them per phase, to show whether the load generator or CRDP is the wall. Thread engine only"
+)
+parser.add_argument(
+    "-transport", nargs=1, action="store", required=False, dest="transport", choices=["http1"] + list(H2_MODES), default=["http1"],
+    help="HTTP transport for the thread engine: http1 (requests, one connection per worker - default), h2c (HTTP/2 cleartext) or h2 (HTTP/2 over TLS). HTTP/2 multiplexes the workers' calls as streams over -connections connections. Needs httpx[http2]"
+)
+parser.add_argument(
+    "-connections", nargs=1, action="store", required=False, dest="connections", type=int, default=[1],
+    help="Number of HTTP/2 connections the workers share with -transport h2c/h2 (default 1)"
+)
+parser.add_argument(
+    "-nopool", action="store_true", required=False, dest="noPool",
+    help="Do not use the run's connection pool: every worker opens its own connection in each phase (and a single thread uses bare per-call requests) instead of sharing connections that are opened and warmed before PROTECT and reused by REVEAL (for A/B comparison)"
+)
+parser.add_argument(
+    "-tls", action="store_true", required=False, dest="tls",
+    help="Call CRDP over https. Worker connections share one TLS context and resume TLS sessions from tickets; handshakes, resumptions and handshake time are reported per phase. Certificates are not verified unless -cacert or -tlsverify is given"
+)
+parser.add_argument(
+    "-cacert", nargs=1, action="store", required=False, dest="caCert",
+    help="With -tls: verify the CRDP server certificate against this CA bundle (PEM)"
+)
+parser.add_argument(
+    "-tlsverify", action="store_true", required=False, dest="tlsVerify",
+    help="With -tls: verify the CRDP server certificate against the default (certifi) CA bundle"
+)
+parser.add_argument(
+    "-results", nargs=1, action="store", required=False, dest="results", default=["keep"],
+    help="What is kept of the bulk calls' results: 'keep' (default) - the leading results the display, the protected CSV and REVEAL need; 'discard' - only the first pass over the cells, for REVEAL (counted, no protected CSV); 'sample:N' - plus a uniform sample of N items per phase, the revealed ones checked against the plaintexts; 'spool:FILE' - plus every call's results appended to FILE as JSON lines"
+)
+parser.add_argument(
+    "-metricsport", nargs=1, action="store", required=False, dest="metricsPort",
+    help="Serve live metrics of the running phase (txns/sec, calls in flight, latency histogram, errors, client CPU) in the Prometheus text format on [HOST:]PORT (GET /metrics), refreshed every second"
+)
+parser.add_argument(
+    "-metricslog", nargs=1, action="store", required=False, dest="metricsLog",
+    help="Write the same live metrics to this file as JSON lines, one per phase and second"
+)
 parser.add_argument(
     "-jsonout", nargs=1, action="store", required=False, dest="jsonout",
     help="Write machine-readable results (txns/sec, latency percentiles, rolling throughput, client CPU) to this JSON file for run-to-run comparison"
@@ -80,6 +231,11 @@ parser.add_argument(
     help="Optional tag recorded in the JSON results to identify this run (e.g. testA-4clients)"
 )
 
+parser.add_argument(
+    "-quiet", action="store_true", required=False, dest="quiet",
+    help="Headless mode: no progress bars and no colored output, for runs whose output goes to a log file (multi_client.py children)"
+)
+
 fileGroup = parser.add_mutually_exclusive_group(required=False)
 fileGroup.add_argument(
     "-payload", nargs=1, action="store", dest="payloadFile", help="Binary or image file that will be used as plaintext")
@@ -96,16 +252,48 @@ parser.add_argument("-charset", nargs=1, action="store", dest="charSetValue", re
 
 args = parser.parse_args()
 
+# -quiet: termcolor leaves the text unstyled while ANSI_COLORS_DISABLED is set,
+# in every module; the progress bars are dropped in parallel_execution.
+if args.quiet:
+    os.environ["ANSI_COLORS_DISABLED"] = "1"
+set_quiet(args.quiet)
+
 # Echo Input Parameters
-endpointCRDP = args.endpointCRDP[0]
+# A comma-separated -endpoint list is balanced per bulk call (endpoint_balancer.py);
+# the balancer stands in for the endpoint string everywhere it is passed.
+endpoints = [e.strip() for e in args.endpointCRDP[0].split(",") if e.strip()]
+if not endpoints:
+    tmpStr = "\n*** CRDP ERROR:  -endpoint needs at least one CRDP endpoint. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+balancePolicy = args.balance[0] if len(endpoints) > 1 else None
+endpointCRDP = EndpointBalancer(endpoints, balancePolicy) if len(endpoints) > 1 else endpoints[0]
 
 iterations = 0
 if args.iterations:
     iterations = args.iterations[0]
 
-batchsize = args.batchsize[0]
-if batchsize < 0:
-    tmpStr = "\n*** CRDP ERROR:  -batchsize must be 0 or a positive integer. ***"
+# -batchsize auto: the size is chosen by the calibration window (batch_tuner.py)
+# once the workload is built; until then batchsize is None.
+autoBatch = args.batchsize[0].strip().lower() == "auto"
+batchsize = None
+if not autoBatch:
+    try:
+        batchsize = int(args.batchsize[0])
+    except ValueError:
+        batchsize = -1
+    if batchsize < 0:
+        tmpStr = "\n*** CRDP ERROR:  -batchsize must be 0, a positive integer or 'auto'. ***"
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+calibrateSeconds = args.calibrate[0] if args.calibrate is not None else TUNE_STEP_SECONDS
+p99Budget = args.p99Budget[0] if args.p99Budget is not None else None
+if (args.p99Budget is not None or args.calibrate is not None) and not autoBatch:
+    tmpStr = "\n*** CRDP ERROR:  -calibrate / -p99budget need -batchsize auto. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+if calibrateSeconds <= 0 or (p99Budget is not None and p99Budget <= 0):
+    tmpStr = "\n*** CRDP ERROR:  -calibrate and -p99budget must be positive. ***"
     print(colored(tmpStr, "yellow", attrs=["bold"]))
     exit()
 
@@ -115,6 +303,30 @@ r_user = args.username[0]
 jsonout = args.jsonout[0] if args.jsonout else ""
 runLabel = args.label[0] if args.label else ""
 
+try:
+    resultsMode, resultsArg = parse_results(args.results[0])
+except ValueError:
+    tmpStr = "\n*** CRDP ERROR:  -results must be keep, discard, sample:N (N > 0) or spool:FILE. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+if resultsMode == "spool":
+    # The phases' sinks append to it; start from an empty file.
+    try:
+        open(resultsArg, "wb").close()
+    except OSError as e:
+        tmpStr = "\n*** CRDP ERROR:  Cannot create -results spool file: %s ***" % e
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+
+metricsHost, metricsPort = "", None
+if args.metricsPort:
+    metricsHost, _, metricsPort = args.metricsPort[0].rpartition(":")
+    if not metricsPort.isdigit() or not 0 < int(metricsPort) < 65536:
+        tmpStr = "\n*** CRDP ERROR:  -metricsport must be PORT or HOST:PORT (port 1-65535). ***"
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+    metricsPort = int(metricsPort)
+
 # Parse number of tasks (parallel workers)
 numThreads = args.numThreads[0] if args.numThreads else 1
 if numThreads < 1:
@@ -122,6 +334,151 @@ if numThreads < 1:
     print(colored(tmpStr, "yellow", attrs=["bold"]))
     exit()
 
+engine = args.engine[0]
+if engine == "async" and not ASYNC_AVAILABLE:
+    tmpStr = "\n*** CRDP ERROR:  -engine async requires the aiohttp package (pip install aiohttp). ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+
+numProcesses = args.numProcesses[0]
+if numProcesses < 1:
+    tmpStr = "\n*** CRDP ERROR: Number of processes must be >= 1. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+if numProcesses > 1 and engine != "thread":
+    tmpStr = "\n*** CRDP ERROR:  -processes is only supported with -engine thread. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+if numProcesses > 1 and not MULTIPROCESS_AVAILABLE:
+    tmpStr = "\n*** CRDP ERROR:  -processes needs the 'fork' start method (POSIX). Use multi_client.py on this platform. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+
+targetRate = args.targetRate[0] if args.targetRate else None
+if targetRate is not None:
+    if targetRate <= 0:
+        tmpStr = "\n*** CRDP ERROR:  -rate must be a positive number of txns/sec. ***"
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+    if engine != "thread" or numProcesses > 1:
+        tmpStr = "\n*** CRDP ERROR:  -rate is only supported with -engine thread and a single process. ***"
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+    if autoBatch:
+        # The offered rate fixes throughput, so there is no txns/sec to climb.
+        tmpStr = "\n*** CRDP ERROR:  -batchsize auto cannot be combined with -rate. ***"
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+
+runMode = args.runMode[0]
+if runMode == "roundtrip" and (engine != "thread" or numProcesses > 1 or targetRate is not None):
+    tmpStr = "\n*** CRDP ERROR:  -mode roundtrip is only supported with -engine thread, a single process and no -rate. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+
+adaptive = args.adaptive[0] if args.adaptive else None
+if adaptive is not None and (engine != "thread" or numProcesses > 1 or targetRate is not None):
+    tmpStr = "\n*** CRDP ERROR:  -adaptive is only supported with -engine thread, a single process and no -rate. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+
+set_dispatch(args.dispatch[0])
+
+callTimeout = args.callTimeout[0] if args.callTimeout else None
+retries = args.retries[0]
+if (callTimeout is not None and callTimeout <= 0) or retries < 0:
+    tmpStr = "\n*** CRDP ERROR:  -timeout must be > 0 seconds and -retries >= 0. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+if args.hedge and engine != "thread":
+    tmpStr = "\n*** CRDP ERROR:  -hedge is only supported with -engine thread. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+set_call_timeout(callTimeout)
+# Retries and hedging wrap every worker's bulk calls (parallel_execution.CallPolicy).
+callPolicy = None
+if retries or args.hedge:
+    callPolicy = CallPolicy(retries, args.hedge, numThreads)
+    set_call_policy(callPolicy)
+
+duration = args.duration[0] if args.duration else None
+warmup = args.warmup[0]
+cooldown = args.cooldown[0]
+if (duration is not None and duration <= 0) or warmup < 0 or cooldown < 0:
+    tmpStr = "\n*** CRDP ERROR:  -duration must be > 0 and -warmup / -cooldown must be >= 0 seconds. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+
+# Timed runs last warmup + duration + cooldown per phase. Without -duration the
+# workload runs once and -warmup / -cooldown just trim the ends of each phase.
+runSeconds = warmup + duration + cooldown if duration is not None else None
+measureWindow = duration is not None or warmup > 0 or cooldown > 0
+
+BODY_CACHE.enabled = not args.noBodyCache
+
+if args.streamParse and not STREAM_PARSE_AVAILABLE:
+    tmpStr = "\n*** CRDP ERROR:  -streamparse requires the ijson package (pip install ijson). ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+set_stream_parse(args.streamParse)
+set_stream_body(args.streamBody)
+
+compressCodec = args.compress[0] if args.compress else None
+if compressCodec is not None and not compression_available(compressCodec):
+    tmpStr = "\n*** CRDP ERROR:  -compress %s requires the zstandard package (pip install zstandard). ***" % compressCodec
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+set_compression(compressCodec)
+
+if args.breakdown and engine != "thread":
+    tmpStr = "\n*** CRDP ERROR:  -breakdown is only supported with -engine thread. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+set_call_breakdown(args.breakdown)
+
+transport = args.transport[0]
+numConnections = args.connections[0]
+if args.tls and transport == "h2c":
+    tmpStr = "\n*** CRDP ERROR:  -tls cannot be combined with -transport h2c (cleartext HTTP/2). Use -transport h2. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+
+# -transport h2 is HTTP/2 over TLS, so it implies -tls.
+useTLS = args.tls or transport == "h2"
+tlsVerify = False
+if (args.caCert or args.tlsVerify) and not useTLS:
+    tmpStr = "\n*** CRDP ERROR:  -cacert / -tlsverify need -tls. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
+if args.caCert:
+    tlsVerify = str(args.caCert[0])
+    if not os.path.isfile(tlsVerify):
+        tmpStr = "\n*** CRDP ERROR:  CA bundle '%s' not found. ***" % tlsVerify
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+elif args.tlsVerify:
+    tlsVerify = True
+if useTLS:
+    set_tls(tlsVerify, ["h2"] if transport == "h2" else None)
+
+h2Pool = None
+if transport != "http1":
+    if not H2_AVAILABLE:
+        tmpStr = "\n*** CRDP ERROR:  -transport %s requires the httpx and h2 packages (pip install httpx[http2]). ***" % transport
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+    if engine != "thread":
+        tmpStr = "\n*** CRDP ERROR:  -transport %s is only supported with -engine thread. ***" % transport
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+    if numConnections < 1:
+        tmpStr = "\n*** CRDP ERROR:  -connections must be >= 1. ***"
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+    # With -processes each child opens its own -connections connections.
+    h2Pool = H2Pool(transport, numConnections, verify=tls_context() if useTLS else False)
+    set_http2_pool(h2Pool)
+
 payloadFile = ""
 fileSize = 0
 if args.payloadFile:
@@ -180,22 +537,58 @@ print(" Input Parameters:")
 
 # include filename if it is specified
 
-batchsizeLabel = "all-in-one (0)" if batchsize == 0 else str(batchsize)
+if autoBatch:
+    batchsizeLabel = "auto (%ss calibration steps%s)" % (calibrateSeconds, ", p99 <= %sms" % p99Budget if p99Budget is not None else "")
+else:
+    batchsizeLabel = "all-in-one (0)" if batchsize == 0 else str(batchsize)
+engineLabel = "async (%s)" % EVENT_LOOP_IMPL if engine == "async" else "thread"
+if runMode == "roundtrip":
+    engineLabel += ", round-trip pipeline"
+if adaptive is not None:
+    engineLabel += ", adaptive concurrency (%s)" % adaptive
+if callPolicy is not None:
+    engineLabel += ", %d retries%s" % (retries, " + hedging" if args.hedge else "")
+if callTimeout is not None:
+    engineLabel += ", %ss call deadline" % callTimeout
+if targetRate is not None:
+    engineLabel += ", open-loop @ %s txns/sec" % "{:,.0f}".format(targetRate)
+if runSeconds is not None:
+    engineLabel += ", timed %ss (+%ss warm-up, +%ss cool-down)" % (duration, warmup, cooldown)
+elif measureWindow:
+    engineLabel += ", trimmed %ss warm-up / %ss cool-down" % (warmup, cooldown)
+if stream_parse_enabled():
+    engineLabel += ", streaming parse"
+if stream_body_enabled():
+    engineLabel += ", streaming request bodies"
+if compressCodec is not None:
+    engineLabel += ", %s compression" % compressCodec
+if h2Pool is not None:
+    engineLabel += ", HTTP/2 %s over %d connection(s)" % (transport, numConnections)
+if balancePolicy is not None:
+    engineLabel += ", balanced over %d endpoints (%s)" % (len(endpoints), balancePolicy)
+if useTLS:
+    if tlsVerify is True:
+        tlsLabel = "verify: certifi CAs"
+    elif tlsVerify:
+        tlsLabel = "verify: %s" % tlsVerify
+    else:
+        tlsLabel = "no verify"
+    engineLabel += ", TLS (%s)" % tlsLabel
 
 if len(csvListFile) > 0:
     tmpStr = (
-        "  CRDPEndpoint: %s\n  ProtectionPolicy: %s\n  CSV List File: %s\n  Data Rows: %s\n  Data Cells: %s\n  Iterations: %s\n  Batch Size: %s\n  Parallel Tasks: %s\n"
-        % (endpointCRDP, protectionPolicy, csvListFile, len(csvRows), len(csvCells), iterations, batchsizeLabel, numThreads)
+        "  CRDPEndpoint: %s\n  ProtectionPolicy: %s\n  CSV List File: %s\n  Data Rows: %s\n  Data Cells: %s\n  Iterations: %s\n  Batch Size: %s\n  Parallel Tasks: %s\n  Processes: %s\n  Engine: %s\n"
+        % (endpointCRDP, protectionPolicy, csvListFile, len(csvRows), len(csvCells), iterations, batchsizeLabel, numThreads, numProcesses, engineLabel)
     )
 elif len(payloadFile) > 0:
     tmpStr = (
-        "  CRDPEndpoint: %s\n  ProtectionPolicy: %s\n  Payload File: %s\n  File Size: %5.2f MB\n  Iterations: %s\n  Batch Size: %s\n  Parallel Tasks: %s\n"
-        % (endpointCRDP, protectionPolicy, payloadFile, fileSize/1000000, iterations, batchsizeLabel, numThreads)
+        "  CRDPEndpoint: %s\n  ProtectionPolicy: %s\n  Payload File: %s\n  File Size: %5.2f MB\n  Iterations: %s\n  Batch Size: %s\n  Parallel Tasks: %s\n  Processes: %s\n  Engine: %s\n"
+        % (endpointCRDP, protectionPolicy, payloadFile, fileSize/1000000, iterations, batchsizeLabel, numThreads, numProcesses, engineLabel)
     )
 else:
     tmpStr = (
-        "  CRDPEndpoint: %s\n  Iterations: %s\n  Batch Size: %s\n  ProtectionPolicy: %s\n  Character Set: %s\n  Parallel Tasks: %s\n"
-        % (endpointCRDP, iterations, batchsizeLabel, protectionPolicy, charSetValue, numThreads)
+        "  CRDPEndpoint: %s\n  Iterations: %s\n  Batch Size: %s\n  ProtectionPolicy: %s\n  Character Set: %s\n  Parallel Tasks: %s\n  Processes: %s\n  Engine: %s\n"
+        % (endpointCRDP, iterations, batchsizeLabel, protectionPolicy, charSetValue, numThreads, numProcesses, engineLabel)
     )
 
 print(tmpStr)
@@ -234,15 +627,16 @@ match(charSetValue):
 
 
 # Reserve some variables for later use
-p_data_array = []  # reserve for later use - cleartext (plaintext)
+workload_cells = []  # reserve for later use - distinct cleartext (plaintext) payloads
 c_data = []  # reserve for later use - protectedtext
 c_data_array = []  # reserve for later use - protectedtext
 c_version = []  # reserve for later use - cipher version
 r_data = []  # reserve for later use - revealedtext
 r_data_array = []  # reserve for later use - revealtext
 
-# Build the workload (p_count items) and the plaintext array (p_data_array).
-# Then split p_data_array into bulk messages of size `batchsize`.
+# Build the workload: p_count payloads cycling over workload_cells. The
+# payloads and their bulk messages of size `batchsize` are produced on demand
+# (workload.MessageSource), never as one flat array.
 f_content = None
 badColumns = set()
 base_cell_count = 0  # CSV mode: cells per iteration (for _protected.csv output)
@@ -256,9 +650,12 @@ if csvListFile:
             if col not in columnSample and cell != "":
                 columnSample[col] = cell
 
+    # With -transport h2c/h2 the samples go over the HTTP/2 pool too, since the
+    # endpoint may not speak HTTP/1.1 at all.
+    screenSession = h2Pool.session(0) if h2Pool is not None else None
     badColumnReason = {}
     for col, sample in columnSample.items():
-        ok, msg = screenProtectPolicy(endpointCRDP, sample, protectionPolicy)
+        ok, msg = screenProtectPolicy(endpoints[0], sample, protectionPolicy, screenSession)
         if not ok:
             badColumns.add(col)
             badColumnReason[col] = msg
@@ -287,12 +684,12 @@ if csvListFile:
         print(colored(tmpStr, "yellow", attrs=["bold"]))
         exit()
 
-    # Repeat the cell list `iterations` times for stress repetition. The
+    # The cell list is repeated `iterations` times for stress repetition. The
     # _protected.csv output is written from the first iteration's results only.
-    p_data_array = base_cells * iterations
-    p_count = len(p_data_array)
-    data_size = sum(len(cell.encode("utf-8")) for cell in p_data_array)
-    p_data = p_data_array[0]
+    workload_cells = base_cells
+    p_count = base_cell_count * iterations
+    data_size = sum(len(cell.encode("utf-8")) for cell in base_cells) * iterations
+    p_data = base_cells[0]
 
 elif payloadFile:
     p_count = iterations
@@ -303,99 +700,340 @@ elif payloadFile:
         f_encoded = base64.b64encode(f_content).decode("ascii")
 
     p_data = f_encoded
-    p_data_array = [f_encoded] * p_count
+    workload_cells = [f_encoded]
 
 else:
     # Random plaintext mode - encrypt the same generated payload `iterations` times.
     p_count = iterations
     data_size = len(p_data) * p_count
-    p_data_array = [p_data] * p_count
-
-# Split the flat plaintext array into bulk messages. batchsize == 0 means
-# everything goes in one message; otherwise chunks of `batchsize` (last may be smaller).
-if batchsize == 0:
-    messages = [p_data_array]
-else:
-    messages = [p_data_array[i:i + batchsize] for i in range(0, p_count, batchsize)]
+    workload_cells = [p_data]
+
+def split_messages(size):
+    # The workload as bulk messages. size == 0 means everything goes in one
+    # message; otherwise messages of `size` (last may be smaller), built as the
+    # workers take them. Random and payload modes send the same payload p_count
+    # times, so every full message is one shared list - the request body cache
+    # then serializes it once for the whole run.
+    return MessageSource(workload_cells, p_count, size)
+
+
+def calibration_step(size):
+    # One -batchsize auto step: replay the workload in messages of `size` for
+    # -calibrate seconds on the same engine as the run. Results are discarded.
+    step_messages = split_messages(size)
+    step_processes = min(numProcesses, len(step_messages))
+    step_threads = min(numThreads, -(-len(step_messages) // step_processes))
+    discard = ResultSink(keep_msgs=0)
+    if engine == "async":
+        agg, _, _ = execute_protect_messages_async(
+            step_messages, step_threads, endpointCRDP, protectionPolicy, calibrateSeconds, discard
+        )
+    elif step_processes > 1:
+        agg, _, _ = execute_protect_messages_multiprocess(
+            step_messages, step_processes, step_threads, endpointCRDP, protectionPolicy, calibrateSeconds, discard
+        )
+    else:
+        agg, _, _ = execute_protect_messages_parallel(
+            step_messages, step_threads, endpointCRDP, protectionPolicy, calibrateSeconds, discard
+        )
+    BODY_CACHE.clear()
+    return agg
+
+
+# -processes: fork the worker processes now, while this is the only thread -
+# before the live metrics exporter, calibration and the phases start theirs.
+# Calibration and both phases run their shards in these children.
+shardPool = None
+if numProcesses > 1:
+    shardPool = ShardPool(numProcesses).start()
+    set_shard_pool(shardPool)
+
+# -metricsport / -metricslog: publish the running phase every second. The
+# workers hand their metrics to it (watch_worker) as they start.
+liveMetrics = None
+if metricsPort is not None or args.metricsLog:
+    liveMetrics = LiveMetrics(log_path=args.metricsLog[0] if args.metricsLog else None, port=metricsPort, host=metricsHost)
+    try:
+        liveMetrics.start()
+    except OSError as e:
+        tmpStr = "\n*** CRDP ERROR:  Cannot start the live metrics exporter: %s ***" % e
+        print(colored(tmpStr, "yellow", attrs=["bold"]))
+        exit()
+    set_live_metrics(liveMetrics)
+    if metricsPort is not None:
+        print(colored("  Live metrics: http://%s:%d/metrics" % (metricsHost or "0.0.0.0", metricsPort), "cyan"))
+
+# -batchsize auto: hill-climb the message size on live PROTECT traffic before
+# the measured phases (which then run at the chosen size). Calibration runs
+# before the run pool is opened, so its connections do not count against it.
+batchTuner = None
+if autoBatch:
+    if liveMetrics is not None:
+        liveMetrics.new_phase("calibrate")
+    print(colored("*** CRDP BATCH SIZE Calibration Started ***", "white", attrs=["bold"]))
+    batchTuner = BatchTuner(calibration_step, p_count, p99Budget, calibrateSeconds)
+    batchsize = batchTuner.run()
+    tmpStr = "  Chosen batchsize: %d (%d step(s) explored)" % (batchsize, len(batchTuner.curve))
+    if not batchTuner.curve[batchsize]["within_budget"]:
+        tmpStr += "  *** WARNING: no size met the p99 budget ***"
+    print(colored(tmpStr, "green", attrs=["bold"]))
+
+messages = split_messages(batchsize)
 message_count = len(messages)
+# Only the leading messages' results are kept: the first pass over the cells,
+# which seeds the REVEAL corpus (and, with -csvlist, the protected CSV). That is
+# one message in random and payload modes. -results discard keeps the same pass,
+# so REVEAL replays the same ciphertexts - and body cache reuse - as with keep.
+keep_msgs = -(-len(messages.cells) // messages.size)
+
+
+def new_sink(phase):
+    return ResultSink(
+        keep_msgs,
+        sample_size=resultsArg if resultsMode == "sample" else 0,
+        spool_path=resultsArg if resultsMode == "spool" else None,
+        phase=phase,
+    )
 
-# Cap thread count to the number of messages - no benefit in having idle workers.
-numThreads = min(numThreads, message_count)
 
-print(colored("  Total payloads: %d  |  Messages: %d  |  Workers: %d" % (p_count, message_count, numThreads), "cyan"))
+protectSink = new_sink("protect")
+revealSink = new_sink("reveal")
+
+# Cap thread count to the number of messages - no benefit in having idle workers.
+# With -processes the cap applies per process, to that process's shard.
+numProcesses = min(numProcesses, message_count)
+numThreads = min(numThreads, -(-message_count // numProcesses))
+if callPolicy is not None:
+    # The hedge threads and spare slots must match the run pool sized below
+    # (2 x the capped workers), or hedges and losers could take the workers'
+    # own connections.
+    callPolicy.resize(numThreads)
+
+print(colored("  Total payloads: %d  |  Messages: %d  |  Workers: %d" % (p_count, message_count, numThreads * numProcesses), "cyan"))
+
+# Run-owned HTTP/1.1 connection pool: one keep-alive connection per worker,
+# opened now (outside the timed phases) and reused by every phase. -processes
+# children open their own connections, and the async engine keeps its aiohttp
+# connector per phase.
+runPool = None
+if engine == "thread" and numProcesses == 1 and h2Pool is None and not args.noPool:
+    # Hedged calls run beside the workers' own, so they need connections of their own.
+    runPool = RunConnectionPool(numThreads * 2 if args.hedge else numThreads, len(endpoints))
+    set_run_pool(runPool)
+    for endpoint in endpoints:
+        runPool.warm(endpoint)
+    tmpStr = "  Connection pool: %d of %d connection(s) pre-warmed in %.1fms" % (runPool.warmed, runPool.size * len(endpoints), runPool.warm_seconds * 1000)
+    warmTLS = runPool.warm_tls()
+    if warmTLS is not None:
+        tmpStr += " | TLS: %d handshake(s), %.0f%% resumed | mean %.2fms, max %.2fms" % (
+            warmTLS["handshakes"], warmTLS["resumed_pct"], warmTLS["handshake_ms_mean"], warmTLS["handshake_ms_max"])
+    print(colored(tmpStr, "cyan"))
+
+# -adaptive: the worker threads are the ceiling; the limiter decides how many
+# of them have a call in flight. Installed after calibration so -batchsize auto
+# measures every size at the full -threads.
+concurrencyLimiter = None
+if adaptive is not None:
+    concurrencyLimiter = ConcurrencyLimiter(numThreads, adaptive)
+    set_concurrency_limiter(concurrencyLimiter)
+
+# The run pool, HTTP/2, TLS, the endpoint balancer and the concurrency limiter
+# need the workers' sessions (shared connections / resumed TLS sessions /
+# routed or limited calls), so a single thread goes through the parallel path too.
+workerSessions = (runPool is not None or h2Pool is not None or useTLS or balancePolicy is not None
+                  or concurrencyLimiter is not None or args.hedge)
 
 #####################################################################
 # PROTECT phase: every call goes through the bulk REST API. The plaintext
 # array has been split into `messages` (each a list of `batchsize` payloads).
-# With numThreads > 1, messages are distributed round-robin across workers.
+# With numThreads > 1, workers pull messages from a shared queue (or own
+# round-robin shares with -dispatch static). The async engine uses the same
+# dispatch with coroutines instead of threads.
+# With -rate, workers instead pull messages off a shared fixed-rate timetable.
+# With -mode roundtrip, each protected message is revealed straight away by the
+# same worker, so this one block runs both operations.
 #####################################################################
-print(colored("*** CRDP PROTECTION Test Started ***", "white", attrs=["bold"]))
+if runMode == "roundtrip":
+    print(colored("*** CRDP ROUND-TRIP (PROTECT -> REVEAL) Test Started ***", "white", attrs=["bold"]))
+else:
+    print(colored("*** CRDP PROTECTION Test Started ***", "white", attrs=["bold"]))
 
+roundtrip_agg_metrics = None
+if liveMetrics is not None:
+    # Round-trip workers file their REVEAL calls under "reveal" themselves.
+    liveMetrics.new_phase("protect")
 protect_cpu = ClientCpuSampler().start()
-if numThreads > 1:
+if runMode == "roundtrip":
+    starttime = time.time()
+    (protect_agg_metrics, reveal_agg_metrics, roundtrip_agg_metrics,
+     c_data_array, r_data_array, c_version) = execute_roundtrip_messages_parallel(
+        messages, numThreads, endpointCRDP, protectionPolicy, r_user,
+        protectSink, revealSink, runSeconds
+    )
+    endtime = time.time()
+    protect_time = reveal_time = endtime - starttime
+elif engine == "async":
+    starttime = time.time()
+    protect_agg_metrics, c_data_array, c_version = execute_protect_messages_async(
+        messages, numThreads, endpointCRDP, protectionPolicy, runSeconds, protectSink
+    )
+    endtime = time.time()
+    protect_time = endtime - starttime
+elif targetRate is not None:
+    starttime = time.time()
+    protect_agg_metrics, c_data_array, c_version = execute_protect_messages_open_loop(
+        messages, numThreads, targetRate, endpointCRDP, protectionPolicy, runSeconds, protectSink
+    )
+    endtime = time.time()
+    protect_time = endtime - starttime
+elif numProcesses > 1:
+    starttime = time.time()
+    protect_agg_metrics, c_data_array, c_version = execute_protect_messages_multiprocess(
+        messages, numProcesses, numThreads, endpointCRDP, protectionPolicy, runSeconds, protectSink
+    )
+    endtime = time.time()
+    protect_time = endtime - starttime
+elif numThreads > 1 or runSeconds is not None or workerSessions:
+    # Timed runs need the replaying workers (and the connection pools the
+    # workers' sessions), so a single thread goes through the parallel path too.
     starttime = time.time()
     protect_agg_metrics, c_data_array, c_version = execute_protect_messages_parallel(
-        messages, numThreads, endpointCRDP, protectionPolicy
+        messages, numThreads, endpointCRDP, protectionPolicy, runSeconds, protectSink
     )
     endtime = time.time()
     protect_time = endtime - starttime
 else:
     starttime = time.time()
-    c_data_array = []
     c_version = None
-    protect_records = []
-    for msg in tqdm(messages, desc="Bulk PROTECT Progress"):
-        call_start = time.time()
-        chunk, version = protectBulkData(endpointCRDP, msg, protectionPolicy)
+    protect_stats = watch_worker(WorkerMetrics(0))
+    for msg_idx, msg in enumerate(tqdm(messages, desc="Bulk PROTECT Progress", disable=quiet_mode())):
+        try:
+            call_start, (chunk, version) = guarded_call(
+                None, lambda s, m: protectBulkData(endpointCRDP, msg, protectionPolicy, m), protect_stats, len(msg)
+            )
+        except Exception as e:
+            if skip_failed_call(protect_stats, 0, msg_idx, e):
+                continue
+            tmpStr = "\n*** CRDP ERROR:  Bulk PROTECT failed: %s ***" % e
+            print(colored(tmpStr, "yellow", attrs=["bold"]))
+            exit()
         call_end = time.time()
-        protect_records.append((call_start, call_end, len(msg)))
-        c_data_array.extend(chunk)
+        protect_stats.record_call(call_start, call_end, len(msg))
+        protectSink.add(0, msg_idx, chunk)
         if c_version is None:
             c_version = version
     endtime = time.time()
+    c_data_array = protectSink.items()
     protect_time = endtime - starttime
     # Build the same rich metrics object the parallel path produces so the
     # single-thread baseline is directly comparable.
-    protect_agg_metrics = single_worker_aggregate(protect_records, starttime, endtime)
+    protect_agg_metrics = single_worker_aggregate(protect_stats.call_records, starttime, endtime, protect_stats)
 protect_cpu.stop()
+if runPool is not None:
+    protect_agg_metrics.connection_stats = runPool.take_stats()
+    if roundtrip_agg_metrics is not None:
+        # One pipeline drove both operations over the same connections.
+        reveal_agg_metrics.connection_stats = roundtrip_agg_metrics.connection_stats = protect_agg_metrics.connection_stats
+
+if not c_data_array:
+    tmpStr = "\n*** CRDP ERROR:  No payloads were protected - nothing to reveal. ***"
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+    exit()
 
-p_data = p_data_array[0]
+p_data = workload_cells[0]
 c_data = c_data_array[0][CRDP_PROTECTED_DATA_NAME]
 
 
-#####################################################################
-# REVEAL phase: re-chunk the protected data into messages of `batchsize`
-# and submit through the bulk REVEAL API using the same scheme.
-#####################################################################
-print(colored("*** CRDP REVEAL Test Started ***", "white", attrs=["bold"]))
-
-if batchsize == 0:
-    reveal_messages = [c_data_array]
-else:
-    reveal_messages = [c_data_array[i:i + batchsize] for i in range(0, len(c_data_array), batchsize)]
-
-reveal_cpu = ClientCpuSampler().start()
-if numThreads > 1:
-    starttime = time.time()
-    reveal_agg_metrics, r_data_array = execute_reveal_messages_parallel(
-        reveal_messages, numThreads, endpointCRDP, protectionPolicy, c_version, r_user
-    )
-    endtime = time.time()
-    reveal_time = endtime - starttime
+if runMode == "roundtrip":
+    # REVEAL already ran interleaved with PROTECT; one CPU sampler covered both.
+    reveal_cpu = protect_cpu
 else:
-    starttime = time.time()
-    r_data_array = []
-    reveal_records = []
-    for msg in tqdm(reveal_messages, desc="Bulk REVEAL Progress"):
-        call_start = time.time()
-        chunk = revealBulkData(endpointCRDP, msg, protectionPolicy, c_version, r_user)
-        call_end = time.time()
-        reveal_records.append((call_start, call_end, len(msg)))
-        r_data_array.extend(chunk)
-    endtime = time.time()
-    reveal_time = endtime - starttime
-    reveal_agg_metrics = single_worker_aggregate(reveal_records, starttime, endtime)
-reveal_cpu.stop()
+    #####################################################################
+    # REVEAL phase: reveal as many payloads as the PROTECT pass protected, in
+    # messages of `batchsize`, through the bulk REVEAL API using the same
+    # scheme. The corpus cycles over the kept ciphertexts (the first CSV pass,
+    # or the first message's copies of the one payload), so REVEAL does the
+    # same work without the whole PROTECT output held in memory.
+    #####################################################################
+    print(colored("*** CRDP REVEAL Test Started ***", "white", attrs=["bold"]))
+
+    # The PROTECT bodies are not sent again; release them before REVEAL.
+    BODY_CACHE.clear()
+    if concurrencyLimiter is not None:
+        # REVEAL calls take their own time; keep the limit, re-learn the baseline.
+        concurrencyLimiter.new_phase()
+    if callPolicy is not None:
+        callPolicy.new_phase()
+
+    reveal_messages = messages.aligned(c_data_array, min(protect_agg_metrics.total_items, p_count))
+
+    if liveMetrics is not None:
+        liveMetrics.new_phase("reveal")
+    reveal_cpu = ClientCpuSampler().start()
+    if engine == "async":
+        starttime = time.time()
+        reveal_agg_metrics, r_data_array = execute_reveal_messages_async(
+            reveal_messages, numThreads, endpointCRDP, protectionPolicy, c_version, r_user, runSeconds, revealSink
+        )
+        endtime = time.time()
+        reveal_time = endtime - starttime
+    elif targetRate is not None:
+        starttime = time.time()
+        reveal_agg_metrics, r_data_array = execute_reveal_messages_open_loop(
+            reveal_messages, numThreads, targetRate, endpointCRDP, protectionPolicy, c_version, r_user, runSeconds, revealSink
+        )
+        endtime = time.time()
+        reveal_time = endtime - starttime
+    elif numProcesses > 1:
+        starttime = time.time()
+        reveal_agg_metrics, r_data_array = execute_reveal_messages_multiprocess(
+            reveal_messages, numProcesses, numThreads, endpointCRDP, protectionPolicy, c_version, r_user, runSeconds, revealSink
+        )
+        endtime = time.time()
+        reveal_time = endtime - starttime
+    elif numThreads > 1 or runSeconds is not None or workerSessions:
+        starttime = time.time()
+        reveal_agg_metrics, r_data_array = execute_reveal_messages_parallel(
+            reveal_messages, numThreads, endpointCRDP, protectionPolicy, c_version, r_user, runSeconds, revealSink
+        )
+        endtime = time.time()
+        reveal_time = endtime - starttime
+    else:
+        starttime = time.time()
+        reveal_stats = watch_worker(WorkerMetrics(0))
+        for msg_idx, msg in enumerate(tqdm(reveal_messages, desc="Bulk REVEAL Progress", disable=quiet_mode())):
+            try:
+                call_start, chunk = guarded_call(
+                    None, lambda s, m: revealBulkData(endpointCRDP, msg, protectionPolicy, c_version, r_user, m),
+                    reveal_stats, len(msg)
+                )
+            except Exception as e:
+                if skip_failed_call(reveal_stats, 0, msg_idx, e):
+                    continue
+                tmpStr = "\n*** CRDP ERROR:  Bulk REVEAL failed: %s ***" % e
+                print(colored(tmpStr, "yellow", attrs=["bold"]))
+                exit()
+            call_end = time.time()
+            reveal_stats.record_call(call_start, call_end, len(msg))
+            revealSink.add(0, msg_idx, chunk)
+        endtime = time.time()
+        r_data_array = revealSink.items()
+        reveal_time = endtime - starttime
+        reveal_agg_metrics = single_worker_aggregate(reveal_stats.call_records, starttime, endtime, reveal_stats)
+    reveal_cpu.stop()
+    if runPool is not None:
+        reveal_agg_metrics.connection_stats = runPool.take_stats()
+
+protectSink.close()
+revealSink.close()
+if shardPool is not None:
+    shardPool.close()
+    set_shard_pool(None)
+if liveMetrics is not None:
+    liveMetrics.stop()
+    set_live_metrics(None)
+# -breakdown patched urllib3 for the phases only.
+set_call_breakdown(False)
 
 r_data = r_data_array[0][CRDP_DATA_NAME]
 if len(payloadFile) > 0:
@@ -407,6 +1045,23 @@ if len(payloadFile) > 0:
         p_data = f_content
 
 
+# Restrict the reported metrics to the steady-state window (-duration,
+# -warmup, -cooldown). In timed runs data_size describes one pass over the
+# workload, so each phase's byte count is scaled to the txns it actually sent.
+phase_aggs = [protect_agg_metrics, reveal_agg_metrics]
+if roundtrip_agg_metrics is not None:
+    phase_aggs.append(roundtrip_agg_metrics)
+if measureWindow:
+    for agg in phase_aggs:
+        agg.set_measurement_window(warmup, cooldown, duration)
+
+
+def phase_data_size(agg):
+    if runSeconds is None or p_count == 0:
+        return data_size
+    return data_size * agg.total_items / p_count
+
+
 #####################################################################
 # Final Summary - display CRDP Test Completed for both phases
 #####################################################################
@@ -415,8 +1070,10 @@ print(colored("\n==================== CRDP Test Summary ====================", "
 # Both paths now produce an AggregatedMetrics, so the summary (MB/s plus the
 # txns/sec, latency, rolling-throughput, and client-CPU attribution lines) is
 # rendered the same way whether the run was sequential or parallel.
-display_test_summary(protect_agg_metrics, data_size, "PROTECT", protect_cpu)
-display_test_summary(reveal_agg_metrics, data_size, "REVEAL", reveal_cpu)
+display_test_summary(protect_agg_metrics, phase_data_size(protect_agg_metrics), "PROTECT", protect_cpu)
+display_test_summary(reveal_agg_metrics, phase_data_size(reveal_agg_metrics), "REVEAL", reveal_cpu)
+if roundtrip_agg_metrics is not None:
+    display_test_summary(roundtrip_agg_metrics, phase_data_size(roundtrip_agg_metrics), "ROUND-TRIP", protect_cpu)
 
 
 print(colored("============================================================\n", "white", attrs=["bold"]))
@@ -427,12 +1084,43 @@ print(outStr)
 outStr = " PT: %s\n CT: %s\n RT: %s\n" % (p_data[0:63], c_data[0:63], r_data[0:63])
 print(colored(outStr, "grey", attrs=["bold"]))
 
+# -results: what became of the results that were not kept.
+sampleVerified = None
+if resultsMode == "discard":
+    tmpStr = "Results discarded: %s protected / %s revealed items counted" % (
+        "{:,}".format(protectSink.received), "{:,}".format(revealSink.received))
+    print(colored(tmpStr, "cyan"))
+elif resultsMode == "sample":
+    # Every revealed value must be one of the plaintexts the workload sent.
+    plainValues = set(workload_cells)
+    sampleVerified = sum(1 for item in revealSink.sample if item.get(CRDP_DATA_NAME) in plainValues)
+    tmpStr = "Results sampled: %d of %s protected / %d of %s revealed items | %d/%d revealed values match a workload plaintext" % (
+        len(protectSink.sample), "{:,}".format(protectSink.received),
+        len(revealSink.sample), "{:,}".format(revealSink.received), sampleVerified, len(revealSink.sample))
+    print(colored(tmpStr, "cyan" if sampleVerified == len(revealSink.sample) else "yellow", attrs=["bold"]))
+elif resultsMode == "spool":
+    tmpStr = "Results spooled to: %s  (%s PROTECT / %s REVEAL calls)" % (
+        resultsArg, "{:,}".format(protectSink.spooled_calls), "{:,}".format(revealSink.spooled_calls))
+    print(colored(tmpStr, "green", attrs=["bold"]))
+
 #####################################################################
 # CSV list mode - write the _protected copy once, after the round trip.
 # The header row is preserved as-is; every data cell is replaced with its
 # protected/tokenized equivalent.
 #####################################################################
-if csvListFile:
+protectFailedCalls = sum(m.failed_calls for m in protect_agg_metrics.worker_metrics)
+if csvListFile and resultsMode == "discard":
+    tmpStr = "  *** NOTE: -results discard - protected CSV not written."
+    print(colored(tmpStr, "yellow"))
+elif csvListFile and protectFailedCalls:
+    # A skipped message leaves a gap, so the values would land in the wrong cells.
+    tmpStr = "  *** WARNING: %d PROTECT call(s) failed and were skipped - protected CSV not written." % protectFailedCalls
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+elif csvListFile and len(c_data_array) < base_cell_count:
+    # A timed run can end before the first pass over the cells completes.
+    tmpStr = "  *** WARNING: Only %d of %d cells were protected before the run ended - protected CSV not written." % (len(c_data_array), base_cell_count)
+    print(colored(tmpStr, "yellow", attrs=["bold"]))
+elif csvListFile:
     # Only the first iteration's protected values feed the output file -
     # subsequent iterations are duplicate stress passes over the same cells.
     protected_values = [item[CRDP_PROTECTED_DATA_NAME] for item in c_data_array[:base_cell_count]]
@@ -494,22 +1182,66 @@ if jsonout:
         "hostname": socket.gethostname(),
         "label": runLabel,
         "params": {
-            "endpoint": endpointCRDP,
+            "endpoint": str(endpointCRDP),
+            "endpoints": endpoints,
+            "balance": balancePolicy,
             "protection_policy": protectionPolicy,
             "mode": mode,
             "source": source,
             "iterations": iterations,
             "batchsize": batchsize,
             "threads": numThreads,
+            "results": args.results[0],
+            "dispatch": args.dispatch[0],
+            "adaptive": adaptive,
+            "timeout_sec": call_timeout(),
+            "retries": retries,
+            "hedge": args.hedge,
+            "processes": numProcesses,
+            "run_mode": runMode,
+            "target_rate_txns_per_sec": targetRate,
+            "body_cache": BODY_CACHE.enabled,
+            "stream_parse": stream_parse_enabled(),
+            "stream_body": stream_body_enabled(),
+            "compression": compressCodec,
+            "breakdown": args.breakdown,
+            "metrics_port": metricsPort,
+            "metrics_log": args.metricsLog[0] if args.metricsLog else None,
+            "quiet": args.quiet,
+            "transport": transport,
+            "http2_connections": numConnections if h2Pool is not None else None,
+            "connection_pool": runPool is not None,
+            "tls": useTLS,
+            "tls_verify": tlsVerify,
+            "duration_sec": duration,
+            "warmup_sec": warmup,
+            "cooldown_sec": cooldown,
+            "engine": engine,
             "total_payloads": p_count,
             "message_count": message_count,
             "data_size_bytes": data_size,
         },
-        "protect": build_phase_record(protect_agg_metrics, data_size, protect_cpu, "PROTECT"),
-        "reveal": build_phase_record(reveal_agg_metrics, data_size, reveal_cpu, "REVEAL"),
+        "protect": build_phase_record(protect_agg_metrics, phase_data_size(protect_agg_metrics), protect_cpu, "PROTECT"),
+        "reveal": build_phase_record(reveal_agg_metrics, phase_data_size(reveal_agg_metrics), reveal_cpu, "REVEAL"),
+    }
+    result["batch_tuning"] = batchTuner.record() if batchTuner is not None else None
+    result["peak_rss"] = peak_rss_record()
+    result["results"] = {
+        "mode": resultsMode,
+        "protect": protectSink.record(),
+        "reveal": revealSink.record(),
+        "sample_verified": sampleVerified,
     }
+    if roundtrip_agg_metrics is not None:
+        result["roundtrip"] = build_phase_record(roundtrip_agg_metrics, phase_data_size(roundtrip_agg_metrics), protect_cpu, "ROUND-TRIP")
 
     with open(jsonout, "w") as jf:
         json.dump(result, jf, indent=2)
 
-    print(colored("Results written to: %s" % jsonout, "green", attrs=["bold"]))
\ No newline at end of file
+    print(colored("Results written to: %s" % jsonout, "green", attrs=["bold"]))
+if h2Pool is not None:
+    h2Pool.close()
+if runPool is not None:
+    runPool.close()
+if callPolicy is not None:
+    callPolicy.close()
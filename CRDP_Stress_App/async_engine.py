@@ -0,0 +1,376 @@
+# Asyncio Load Engine for CRDP Stress Testing
+#
+# An alternative to the ThreadPoolExecutor engine in parallel_execution.py.
+# Every in-flight bulk call in the thread engine costs one OS thread blocked
+# inside `requests`, which caps a single process at a few dozen concurrent calls.
+# Here each "worker" is a coroutine sharing one event loop and one aiohttp
+# connection pool, so a single process can keep hundreds to thousands of
+# /v1/protectbulk and /v1/revealbulk calls in flight.
+#
+# The engine deliberately reuses WorkerMetrics / AggregatedMetrics (one
+# WorkerMetrics per coroutine, same (start, end, n_items) call records), so
+# display_test_summary() and build_phase_record() report async runs exactly
+# like thread runs and the two engines are directly comparable.
+#
+######################################################################
+import asyncio
+import time
+from termcolor import colored
+from CRDP_REST_API import (
+    _loads_bytes, BODY_CACHE, ijson, stream_parse_enabled,
+    CRDP_BULK_PROTECT, CRDP_BULK_REVEAL, bulk_headers, _record_wire, _record_endpoint, _record_failure, crdp_url, tls_context,
+    CRDP_PROTECTION_POLICY_NAME, CRDP_DATA_ARRAY_NAME, CRDP_USERNAME_NAME,
+    CRDP_PROTECTED_DATA_ARRAY_NAME, CRDP_EXTERNAL_VER_NAME,
+    STATUS_CODE_OK, CRDPHTTPError, call_timeout,
+)
+from endpoint_balancer import EndpointBalancer, is_endpoint_failure
+from parallel_execution import WorkerMetrics, AggregatedMetrics, ProgressReporter, watch_worker, iter_messages, dispatch_messages, call_policy, retry_backoff, skip_failed_call
+from workload import IndexedMessages, ResultSink, payload_count
+
+# aiohttp is only needed when `-engine async` is selected, so it is optional in
+# the same way psutil is: the name is bound to None when absent and the CLI
+# refuses the async engine with a clear message instead of failing at import.
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# uvloop is a drop-in, faster event loop (POSIX only). Used when installed;
+# the stock asyncio loop is used otherwise.
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+ASYNC_AVAILABLE = aiohttp is not None
+# Whether aiohttp can decode zstd responses (-compress zstd asks for them only then).
+ASYNC_ZSTD_RESPONSES = getattr(getattr(aiohttp, "compression_utils", None), "HAS_ZSTD", False)
+EVENT_LOOP_IMPL = "uvloop" if uvloop is not None else "asyncio"
+
+
+# -------------------- Event Loop / Client Helpers --------------------
+
+def _run(coro):
+    """Run a coroutine to completion on a fresh (uvloop when available) event loop."""
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _new_client(concurrency):
+    """
+    One shared aiohttp session per phase. The connector is sized to the
+    concurrency level so every coroutine can hold its own keep-alive connection
+    (the async equivalent of one requests.Session per worker thread). With -tls
+    the connections use the shared resuming TLS context.
+    """
+    if aiohttp is None:
+        raise RuntimeError("aiohttp is not installed (pip install aiohttp)")
+    ssl_context = tls_context()
+    connector = aiohttp.TCPConnector(
+        limit=concurrency, limit_per_host=concurrency, ssl=ssl_context if ssl_context is not None else True
+    )
+    timeout = aiohttp.ClientTimeout(total=call_timeout())
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def _print_http_error(t_str, status, reason, text):
+    # Same layout as CRDP_REST_API.kPrintError, which expects a requests Response.
+    print("  --> %s Status Code: %s\n   Reason: %s\n   Error: %s" % (t_str, status, reason, text))
+
+
+def _request_data(t_body):
+    """
+    aiohttp streams async iterables with chunked encoding but not plain
+    generators, so wrap the -streambody generator from BodyCache.encode.
+    """
+    if isinstance(t_body, (bytes, str)):
+        return t_body
+
+    async def pieces():
+        for piece in t_body:
+            yield piece
+    return pieces()
+
+
+def _response_wire_bytes(r):
+    # aiohttp decodes Content-Encoding before data reaches r.content, so the
+    # compressed size is only known from Content-Length; chunked responses fall
+    # back to the decoded byte count.
+    if r.content_length is not None:
+        return r.content_length
+    return r.content.total_bytes
+
+
+async def _read_array(r, t_name):
+    """
+    Return the `t_name` array of a bulk response. With -streamparse the items
+    are parsed incrementally off the connection (ijson's async interface), as
+    the thread engine does, instead of after buffering the whole body.
+    """
+    if stream_parse_enabled():
+        items = [item async for item in ijson.items_async(r.content, t_name + ".item", use_float=True)]
+        await r.read()  # drain the tail so the connection can be reused
+        return items
+    return _loads_bytes(await r.read())[t_name]
+
+
+# -------------------- Async API Wrappers --------------------
+
+async def protectBulkData_async(client, t_endpointCRDP, t_dataArray, t_protectionPolicy, metrics=None):
+    """
+    Coroutine version of protectBulkData_session (same body cache use).
+    Raises on transport errors or a non-200 status, like the session wrapper.
+    """
+    if isinstance(t_endpointCRDP, EndpointBalancer):
+        return await t_endpointCRDP.call_async(lambda t_host: protectBulkData_async(
+            client, t_host, t_dataArray, t_protectionPolicy, metrics), metrics)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_BULK_PROTECT)
+    t_headers = bulk_headers(ASYNC_ZSTD_RESPONSES)
+    t_dataStr = {
+        CRDP_PROTECTION_POLICY_NAME: t_protectionPolicy,
+        CRDP_DATA_ARRAY_NAME: t_dataArray,
+    }
+    t_body = BODY_CACHE.encode((CRDP_BULK_PROTECT, t_protectionPolicy), t_dataArray, t_dataStr, metrics)
+
+    try:
+        async with client.post(t_endpoint, data=_request_data(t_body), headers=t_headers) as r:
+            if r.status != STATUS_CODE_OK:
+                body = await r.read()
+                _print_http_error("protectBulkData_async", r.status, r.reason, body.decode("utf-8", "replace"))
+                _record_failure(metrics, t_endpointCRDP, r.status)
+                raise CRDPHTTPError(r.status)
+            t_protectedData = await _read_array(r, CRDP_PROTECTED_DATA_ARRAY_NAME)
+            _record_wire(metrics, t_body, _response_wire_bytes(r))
+            _record_endpoint(metrics, t_endpointCRDP, r.status)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        _record_failure(metrics, t_endpointCRDP, None)
+        raise
+
+    # external_version is optional - policies without key rotation omit it from
+    # the per-item entries in protected_data_array.
+    t_version = t_protectedData[0].get(CRDP_EXTERNAL_VER_NAME) if t_protectedData else None
+
+    return t_protectedData, t_version
+
+
+async def revealBulkData_async(client, t_endpointCRDP, t_dataArray, t_protectionPolicy, t_externalVersion, t_user, metrics=None):
+    """
+    Coroutine version of revealBulkData_session.
+    """
+    if isinstance(t_endpointCRDP, EndpointBalancer):
+        return await t_endpointCRDP.call_async(lambda t_host: revealBulkData_async(
+            client, t_host, t_dataArray, t_protectionPolicy, t_externalVersion, t_user, metrics), metrics)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_BULK_REVEAL)
+    t_headers = bulk_headers(ASYNC_ZSTD_RESPONSES)
+    t_dataStr = {
+        CRDP_PROTECTION_POLICY_NAME: t_protectionPolicy,
+        CRDP_USERNAME_NAME: t_user,
+        CRDP_PROTECTED_DATA_ARRAY_NAME: t_dataArray,
+    }
+    t_body = BODY_CACHE.encode((CRDP_BULK_REVEAL, t_protectionPolicy, t_user), t_dataArray, t_dataStr, metrics)
+
+    try:
+        async with client.post(t_endpoint, data=_request_data(t_body), headers=t_headers) as r:
+            if r.status != STATUS_CODE_OK:
+                body = await r.read()
+                _print_http_error("revealBulkData_async", r.status, r.reason, body.decode("utf-8", "replace"))
+                _record_failure(metrics, t_endpointCRDP, r.status)
+                raise CRDPHTTPError(r.status)
+            t_revealedDataArray = await _read_array(r, CRDP_DATA_ARRAY_NAME)
+            _record_wire(metrics, t_body, _response_wire_bytes(r))
+            _record_endpoint(metrics, t_endpointCRDP, r.status)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        _record_failure(metrics, t_endpointCRDP, None)
+        raise
+
+    return t_revealedDataArray
+
+
+async def _retrying(attempt, metrics, n):
+    """
+    await attempt() with the run's -retries applied, as CallPolicy.call does
+    for the thread engine (hedging is thread engine only).
+    """
+    policy = call_policy()
+    retry = 0
+    metrics.in_flight += 1
+    try:
+        while True:
+            try:
+                return await attempt()
+            except Exception as e:
+                if policy is None or retry >= policy.retries or not is_endpoint_failure(e):
+                    raise
+                retry += 1
+                metrics.retries += 1
+                metrics.wasted_calls += 1
+                metrics.wasted_items += n
+                await asyncio.sleep(retry_backoff(retry))
+    finally:
+        metrics.in_flight -= 1
+
+
+# -------------------- Worker Coroutines --------------------
+
+async def worker_protect_messages_async(task_id, indexed_messages, client, endpointCRDP, protectionPolicy, sink, progress, deadline=None):
+    """
+    Coroutine counterpart of worker_protect_messages: sends its messages one
+    after another (each coroutine has at most one call in flight), replaying
+    them until `deadline` in timed runs.
+    Results go to `sink`. Returns metrics, c_version.
+    """
+    metrics = watch_worker(WorkerMetrics(task_id))
+    metrics.start_time = time.time()
+
+    c_version = None
+    total_items = 0
+
+    try:
+        for lap, msg_idx, payloads in iter_messages(indexed_messages, deadline):
+            n = len(payloads)
+            call_start = time.time()
+            try:
+                c_data_array, version = await _retrying(lambda: protectBulkData_async(
+                    client, endpointCRDP, payloads, protectionPolicy, metrics
+                ), metrics, n)
+            except Exception as e:
+                if not skip_failed_call(metrics, task_id, msg_idx, e):
+                    raise
+                continue
+            call_end = time.time()
+            sink.add(lap, msg_idx, c_data_array)
+            if c_version is None:
+                c_version = version
+            metrics.record_call(call_start, call_end, n)
+            total_items += n
+            progress.update(n)
+        metrics.items_processed = total_items
+    except Exception as e:
+        metrics.errors.append(str(e))
+        print(colored(f"\nWorker {task_id} error: {e}", "red"))
+    finally:
+        metrics.end_time = time.time()
+
+    return metrics, c_version
+
+
+async def worker_reveal_messages_async(task_id, indexed_messages, client, endpointCRDP, protectionPolicy, c_version, r_user, sink, progress, deadline=None):
+    """
+    Coroutine counterpart of worker_reveal_messages.
+    Results go to `sink`. Returns metrics.
+    """
+    metrics = watch_worker(WorkerMetrics(task_id))
+    metrics.start_time = time.time()
+
+    total_items = 0
+
+    try:
+        for lap, msg_idx, payloads in iter_messages(indexed_messages, deadline):
+            n = len(payloads)
+            call_start = time.time()
+            try:
+                r_data_array = await _retrying(lambda: revealBulkData_async(
+                    client, endpointCRDP, payloads, protectionPolicy, c_version, r_user, metrics
+                ), metrics, n)
+            except Exception as e:
+                if not skip_failed_call(metrics, task_id, msg_idx, e):
+                    raise
+                continue
+            call_end = time.time()
+            sink.add(lap, msg_idx, r_data_array)
+            metrics.record_call(call_start, call_end, n)
+            total_items += n
+            progress.update(n)
+        metrics.items_processed = total_items
+    except Exception as e:
+        metrics.errors.append(str(e))
+        print(colored(f"\nWorker {task_id} error: {e}", "red"))
+    finally:
+        metrics.end_time = time.time()
+
+    return metrics
+
+
+# -------------------- Orchestration Functions --------------------
+
+async def _gather_workers(worker_messages, make_worker, concurrency):
+    """Open the shared client, run one coroutine per non-empty message list, return their results."""
+    async with _new_client(concurrency) as client:
+        coros = [
+            make_worker(task_id, msg_list, client)
+            for task_id, msg_list in enumerate(worker_messages)
+            if msg_list
+        ]
+        return await asyncio.gather(*coros)
+
+
+def execute_protect_messages_async(messages, concurrency, endpointCRDP, protectionPolicy, run_seconds=None, sink=None):
+    """
+    Execute bulk PROTECT with `concurrency` coroutines on one event loop.
+    Messages are dispatched exactly as in
+    execute_protect_messages_parallel, and the return value has the same shape.
+    run_seconds makes it a timed run (see execute_protect_messages_parallel).
+
+    Returns:
+        AggregatedMetrics, flat c_data_array (the sink's kept results, in payload order), c_version
+    """
+    worker_messages = dispatch_messages(IndexedMessages(messages), concurrency)
+
+    total_items = payload_count(messages) if run_seconds is None else None
+    agg_metrics = AggregatedMetrics()
+    sink = sink if sink is not None else ResultSink()
+    c_version = None
+
+    with ProgressReporter(total_items, "Async PROTECT Progress") as progress:
+        agg_metrics.overall_start = time.time()
+        deadline = agg_metrics.overall_start + run_seconds if run_seconds is not None else None
+        outcomes = _run(_gather_workers(
+            worker_messages,
+            lambda task_id, msg_list, client: worker_protect_messages_async(
+                task_id, msg_list, client, endpointCRDP, protectionPolicy, sink, progress.counter(), deadline
+            ),
+            concurrency,
+        ))
+        agg_metrics.overall_end = time.time()
+
+    for metrics, version in outcomes:
+        agg_metrics.add_worker_metrics(metrics)
+        if c_version is None and version is not None:
+            c_version = version
+
+    return agg_metrics, sink.items(), c_version
+
+
+def execute_reveal_messages_async(messages, concurrency, endpointCRDP, protectionPolicy, c_version, r_user, run_seconds=None, sink=None):
+    """
+    Execute bulk REVEAL with `concurrency` coroutines on one event loop.
+    Same distribution and return shape as execute_reveal_messages_parallel.
+
+    Returns:
+        AggregatedMetrics, flat r_data_array (the sink's kept results, in payload order)
+    """
+    worker_messages = dispatch_messages(IndexedMessages(messages), concurrency)
+
+    total_items = payload_count(messages) if run_seconds is None else None
+    agg_metrics = AggregatedMetrics()
+    sink = sink if sink is not None else ResultSink()
+
+    with ProgressReporter(total_items, "Async REVEAL Progress") as progress:
+        agg_metrics.overall_start = time.time()
+        deadline = agg_metrics.overall_start + run_seconds if run_seconds is not None else None
+        outcomes = _run(_gather_workers(
+            worker_messages,
+            lambda task_id, msg_list, client: worker_reveal_messages_async(
+                task_id, msg_list, client, endpointCRDP, protectionPolicy, c_version, r_user, sink, progress.counter(), deadline
+            ),
+            concurrency,
+        ))
+        agg_metrics.overall_end = time.time()
+
+    for metrics in outcomes:
+        agg_metrics.add_worker_metrics(metrics)
+
+    return agg_metrics, sink.items()
@@ -0,0 +1,117 @@
+# Bulk Message Size Auto-Tuning for CRDP Stress Testing
+#
+# With -batchsize auto the bulk message size is not guessed up front: a short
+# calibration window before PROTECT runs the workload at a series of message
+# sizes, each for -calibrate seconds, and measures txns/sec and p99 per-call
+# latency from the call records of each step. Starting at TUNE_START the size
+# doubles for as long as throughput keeps improving by at least TUNE_MIN_GAIN;
+# the search then narrows around the best size (halving the step factor in log
+# space) until the step drops below TUNE_MIN_FACTOR. With a p99 budget, sizes
+# whose p99 exceeds it are never chosen (larger messages mean longer calls),
+# so the result is the fastest size that still meets the latency target.
+#
+# The chosen size is used for the rest of the run, and the explored curve is
+# reported in the -jsonout results (batch_tuning).
+#
+######################################################################
+from termcolor import colored
+
+TUNE_START = 8
+TUNE_FACTOR = 2.0
+TUNE_MIN_FACTOR = 1.2
+TUNE_MIN_GAIN = 0.03
+TUNE_STEP_SECONDS = 2.0
+# The first part of each step (connection setup, the server adjusting to the
+# new message size) is left out of the measurement.
+TUNE_SETTLE_FRACTION = 0.25
+
+
+class BatchTuner:
+    """
+    Hill-climbs the bulk message size. `measure(size)` runs one calibration step
+    at that size and returns its AggregatedMetrics; sizes are kept within
+    1..`max_size`. `p99_budget_ms` (optional) rejects sizes whose p99 per-call
+    latency exceeds it.
+    """
+    def __init__(self, measure, max_size, p99_budget_ms=None, step_seconds=TUNE_STEP_SECONDS):
+        self.measure = measure
+        self.max_size = max(1, max_size)
+        self.p99_budget_ms = p99_budget_ms
+        self.step_seconds = step_seconds
+        self.curve = {}
+        self.chosen = None
+
+    def _probe(self, size):
+        size = max(1, min(int(round(size)), self.max_size))
+        if size not in self.curve:
+            agg = self.measure(size)
+            agg.set_measurement_window(warmup=self.step_seconds * TUNE_SETTLE_FRACTION)
+            pct = agg.latency_percentiles()
+            point = {
+                "batchsize": size,
+                "txns_per_sec": agg.txns_per_sec(),
+                "p50_ms": pct["p50"] * 1000,
+                "p99_ms": pct["p99"] * 1000,
+                "calls": agg.call_count(),
+            }
+            point["within_budget"] = point["calls"] > 0 and (
+                self.p99_budget_ms is None or point["p99_ms"] <= self.p99_budget_ms
+            )
+            self.curve[size] = point
+            tmpStr = "  Calibrate batchsize %6d: %s txns/sec | p99 %.1fms%s" % (
+                size, "{:,.0f}".format(point["txns_per_sec"]), point["p99_ms"],
+                "" if point["within_budget"] else "  (over budget)" if point["calls"] else "  (no calls completed)",
+            )
+            print(colored(tmpStr, "cyan"))
+        return self.curve[size]
+
+    def _better(self, point, best):
+        if not point["within_budget"]:
+            return False
+        if not best["within_budget"]:
+            return True
+        return point["txns_per_sec"] > best["txns_per_sec"] * (1 + TUNE_MIN_GAIN)
+
+    def run(self):
+        """Explore the size curve and return the chosen size."""
+        best = self._probe(min(TUNE_START, self.max_size))
+
+        # Even the starting size misses the budget: look for one below it.
+        while not best["within_budget"] and best["batchsize"] > 1:
+            point = self._probe(best["batchsize"] / TUNE_FACTOR)
+            if point["within_budget"]:
+                best = point
+                break
+            best = point
+
+        # Climb while a bigger message still pays off.
+        while best["within_budget"] and best["batchsize"] < self.max_size:
+            point = self._probe(best["batchsize"] * TUNE_FACTOR)
+            if not self._better(point, best):
+                break
+            best = point
+
+        # Narrow the step around the best size.
+        factor = TUNE_FACTOR
+        while best["within_budget"]:
+            factor = factor ** 0.5
+            if factor < TUNE_MIN_FACTOR:
+                break
+            for size in (best["batchsize"] * factor, best["batchsize"] / factor):
+                point = self._probe(size)
+                if self._better(point, best):
+                    best = point
+                    break
+
+        self.chosen = best["batchsize"]
+        return self.chosen
+
+    def record(self):
+        """JSON-serializable summary: chosen size, budget and the explored curve."""
+        return {
+            "chosen": self.chosen,
+            "p99_budget_ms": self.p99_budget_ms,
+            "step_sec": self.step_seconds,
+            "steps": len(self.curve),
+            "curve": [self.curve[s] for s in sorted(self.curve)],
+        }
@@ -0,0 +1,153 @@
+# Compact Call Records for CRDP Stress Testing
+#
+# Every bulk call a worker makes leaves a (call_start, call_end, n_items)
+# record; latency, throughput and the measured window all derive from them.
+# Kept as a list of tuples that is ~130 bytes a call (tuple, two float objects,
+# list slot) - hundreds of MB at batchsize 1 and millions of calls - and the
+# summary re-walked it in Python for every metric. Instead:
+#
+#   CallRecords  - one worker's records as three typed columns (array module:
+#                  start/end epoch seconds as doubles, item counts as int64),
+#                  24 bytes a call. The arrays grow in place, over-allocating
+#                  as a list does (amortized O(1) appends), and the object
+#                  still appends, iterates and pickles like the list of tuples
+#                  it replaces.
+#   CallColumns  - the records of a whole phase (or a slice of its time line)
+#                  concatenated column-wise, with the derivations the summary
+#                  needs: counts, items, latencies, the rolling txns/sec series.
+#                  Computed with NumPy (vectorized, over zero-copy views of the
+#                  arrays) when it is installed, in plain Python otherwise.
+#
+######################################################################
+from array import array
+from itertools import compress
+
+# NumPy vectorizes the phase summaries. It is an optional dependency: without
+# it `np` stays None and CallColumns falls back to plain Python over the same
+# arrays (same results, just slower on very large runs).
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CallRecords:
+    """
+    (call_start, call_end, n_items) records of one worker's bulk calls, stored
+    column-wise in typed arrays. append() / extend() / iteration / len() /
+    indexing behave as for a list of those tuples.
+    """
+    def __init__(self, records=()):
+        self.starts = array("d")
+        self.ends = array("d")
+        self.items = array("q")
+        self.extend(records)
+
+    def append(self, record):
+        start, end, n = record
+        self.starts.append(start)
+        self.ends.append(end)
+        self.items.append(n)
+
+    def extend(self, records):
+        if isinstance(records, CallRecords):
+            self.starts.extend(records.starts)
+            self.ends.extend(records.ends)
+            self.items.extend(records.items)
+            return
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends, self.items)
+
+    def __getitem__(self, i):
+        return self.starts[i], self.ends[i], self.items[i]
+
+    def nbytes(self):
+        """Bytes held by the three columns (allocated length, not capacity)."""
+        return sum(col.itemsize * len(col) for col in (self.starts, self.ends, self.items))
+
+
+class CallColumns:
+    """
+    The call records of several CallRecords, concatenated: `starts`, `ends`
+    and `items` are NumPy arrays when NumPy is installed, array.array otherwise.
+    """
+    def __init__(self, starts, ends, items):
+        self.starts = starts
+        self.ends = ends
+        self.items = items
+
+    @classmethod
+    def concat(cls, record_sets):
+        record_sets = [r for r in record_sets if len(r)]
+        if np is not None:
+            if not record_sets:
+                return cls(np.empty(0), np.empty(0), np.empty(0, dtype=np.int64))
+            return cls(*(np.concatenate([np.frombuffer(getattr(r, col), dtype=dtype) for r in record_sets])
+                         for col, dtype in (("starts", np.float64), ("ends", np.float64), ("items", np.int64))))
+        merged = CallRecords()
+        for r in record_sets:
+            merged.extend(r)
+        return cls(merged.starts, merged.ends, merged.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def window(self, lo=None, hi=None):
+        """The calls that ended in [lo, hi) (either bound may be None: open)."""
+        if lo is None and hi is None:
+            return self
+        if np is not None:
+            keep = np.ones(len(self.ends), dtype=bool)
+            if lo is not None:
+                keep &= self.ends >= lo
+            if hi is not None:
+                keep &= self.ends < hi
+            return CallColumns(self.starts[keep], self.ends[keep], self.items[keep])
+        lo = float("-inf") if lo is None else lo
+        hi = float("inf") if hi is None else hi
+        keep = [lo <= end < hi for end in self.ends]
+        if all(keep):
+            return self
+        return CallColumns(array("d", compress(self.starts, keep)), array("d", compress(self.ends, keep)),
+                           array("q", compress(self.items, keep)))
+
+    def total_items(self):
+        if np is not None:
+            return int(self.items.sum())
+        return sum(self.items)
+
+    def latencies(self):
+        """Per-call wall times in seconds, in record order."""
+        if np is not None:
+            return self.ends - self.starts
+        return [end - start for start, end in zip(self.starts, self.ends)]
+
+    def records(self):
+        """The calls as a list of (call_start, call_end, n_items) tuples."""
+        if np is not None:
+            return list(zip(self.starts.tolist(), self.ends.tolist(), self.items.tolist()))
+        return list(zip(self.starts, self.ends, self.items))
+
+    def throughput_series(self, t0, bucket=1.0):
+        """Txns/sec series: items binned by call-end time into `bucket`-second bins from t0."""
+        if not len(self):
+            return []
+        if np is not None:
+            bins = ((self.ends - t0) // bucket).astype(np.int64)
+            # Calls that ended before t0 are not part of the series.
+            ok = bins >= 0
+            if not ok.any():
+                return []
+            totals = np.bincount(bins[ok], weights=self.items[ok])
+            return (totals / bucket).tolist()
+        buckets = {}
+        for end, n in zip(self.ends, self.items):
+            idx = int((end - t0) // bucket)
+            buckets[idx] = buckets.get(idx, 0) + n
+        return [buckets.get(i, 0) / bucket for i in range(max(buckets) + 1)]
@@ -0,0 +1,107 @@
+# Adaptive Concurrency Limiting for CRDP Stress Testing
+#
+# -threads fixes how many bulk calls are in flight: too few leave CRDP idle,
+# too many just queue inside the pods and inflate latency without adding
+# throughput. With -adaptive the worker threads become a ceiling and a shared
+# ConcurrencyLimiter decides, call by call, how many of them may have a call in
+# flight, driven by the observed call latency against a no-load baseline:
+#
+#   aimd      - additive increase / multiplicative decrease: while latency stays
+#               within AIMD_TOLERANCE x the baseline the limit grows by about
+#               one per round trip; beyond it, or on a failed call, it is cut by
+#               AIMD_BACKOFF (at most once per round trip).
+#   gradient  - the limit is scaled by the gradient GRADIENT_TOLERANCE x
+#               baseline / latency (clamped to 0.5..1) plus a sqrt(limit) queue
+#               allowance, smoothed, so it settles where latency starts to rise
+#               with concurrency.
+#
+# Latency is an EWMA over the calls (RTT_ALPHA) so one slow or fast call does
+# not swing the limit; the baseline is the lowest smoothed latency seen in the
+# phase, i.e. the call time before CRDP starts queueing.
+#
+# Each call records the limit it finished under, so the concurrency level can
+# be reported over time next to the rolling throughput.
+#
+######################################################################
+import math
+import threading
+import time
+
+LIMIT_ALGORITHMS = ("aimd", "gradient")
+LIMIT_START = 4
+RTT_ALPHA = 0.1
+AIMD_TOLERANCE = 2.0
+AIMD_BACKOFF = 0.9
+GRADIENT_TOLERANCE = 1.5
+GRADIENT_SMOOTHING = 0.2
+
+
+class ConcurrencyLimiter:
+    """
+    Shared in-flight call limit for the workers of one process, between 1 and
+    `max_limit` (the worker thread count). Thread-safe; call() wraps one bulk
+    call: it waits for a free slot, times the call and adapts the limit.
+    """
+    def __init__(self, max_limit, algorithm="aimd", initial=LIMIT_START):
+        self.max_limit = max(1, max_limit)
+        self.algorithm = algorithm
+        self.limit = float(min(self.max_limit, max(1, initial)))
+        self.inflight = 0
+        self._cond = threading.Condition()
+        self._last_decrease = 0.0
+        self.new_phase()
+
+    def new_phase(self):
+        """Forget the latency baseline (the next phase's calls take a different time); the limit carries over."""
+        with self._cond:
+            self._rtt = None
+            self._baseline = math.inf
+
+    def _update(self, rtt, failed):
+        now = time.time()
+        if failed:
+            # A failed call's time says nothing about queueing; back off.
+            if now - self._last_decrease >= (self._rtt or 0.0):
+                self.limit *= AIMD_BACKOFF
+                self._last_decrease = now
+        else:
+            self._rtt = rtt if self._rtt is None else self._rtt + RTT_ALPHA * (rtt - self._rtt)
+            self._baseline = min(self._baseline, self._rtt)
+            if self.algorithm == "gradient":
+                gradient = max(0.5, min(1.0, GRADIENT_TOLERANCE * self._baseline / self._rtt)) if self._rtt > 0 else 1.0
+                target = self.limit * gradient + math.sqrt(self.limit)
+                self.limit += GRADIENT_SMOOTHING * (target - self.limit)
+            elif self._rtt <= self._baseline * AIMD_TOLERANCE:
+                self.limit += 1.0 / self.limit
+            elif now - self._last_decrease >= self._rtt:
+                self.limit *= AIMD_BACKOFF
+                self._last_decrease = now
+        self.limit = min(float(self.max_limit), max(1.0, self.limit))
+
+    def acquire(self):
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self.inflight += 1
+
+    def release(self, rtt, failed=False):
+        """End a call that took `rtt` seconds; returns the limit after adapting to it."""
+        with self._cond:
+            self.inflight -= 1
+            self._update(rtt, failed)
+            self._cond.notify_all()
+            return self.limit
+
+    def call(self, fn, metrics=None):
+        """fn() once a slot is free; the limit it finished under goes to metrics.concurrency_samples."""
+        self.acquire()
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = fn()
+            failed = False
+            return result
+        finally:
+            limit = self.release(time.perf_counter() - start, failed)
+            if metrics is not None:
+                metrics.concurrency_samples.append((time.time(), limit))
@@ -0,0 +1,171 @@
+# Endpoint Load Balancing for CRDP Stress Testing
+#
+# With a comma-separated -endpoint list, one client process spreads its bulk
+# calls over several CRDP endpoints (pods / NodePorts) itself instead of pinning
+# a whole process to one of them. Each call goes to the endpoint with the fewest
+# outstanding requests ("leastoutstanding") or the lowest EWMA latency weighted
+# by its outstanding requests ("ewma"), so a slow node simply gets fewer calls
+# while the others absorb the rest.
+#
+# Each endpoint has a circuit breaker: BREAKER_FAILURES consecutive failures
+# (transport errors, 5xx, 429) open it for BREAKER_OPEN_SECONDS, after which it
+# is half-open and gets one probe call at a time until a success closes it
+# again. A call that fails on one endpoint is retried on another that has not
+# been tried yet, so a dead node costs failovers rather than workers.
+#
+# The session wrappers in parallel_execution.py / async_engine.py hand their
+# request to EndpointBalancer.call() / call_async() when they are given a
+# balancer instead of an endpoint string.
+#
+######################################################################
+import threading
+import time
+from CRDP_REST_API import CRDPHTTPError
+
+BALANCE_POLICIES = ("leastoutstanding", "ewma")
+BREAKER_FAILURES = 5
+BREAKER_OPEN_SECONDS = 5.0
+EWMA_ALPHA = 0.2
+
+
+def is_endpoint_failure(exc):
+    """True when a failed call says something about the endpoint's health (not a 4xx request error)."""
+    if isinstance(exc, CRDPHTTPError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    return True
+
+
+class _EndpointState:
+    def __init__(self):
+        self.outstanding = 0
+        self.ewma: float | None = None
+        self.consecutive_failures = 0
+        self.tripped = False
+        self.open_until = 0.0
+        self.probing = False
+
+
+class EndpointBalancer:
+    """
+    Routes bulk calls over `endpoints` by `policy` (see BALANCE_POLICIES), with a
+    circuit breaker per endpoint. Thread-safe; with -processes every child works
+    on its own copy. str() gives the comma-separated endpoint list.
+    """
+    def __init__(self, endpoints, policy="leastoutstanding"):
+        self.endpoints = list(endpoints)
+        self.policy = policy
+        self._state = {e: _EndpointState() for e in self.endpoints}
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def __str__(self):
+        return ",".join(self.endpoints)
+
+    def __getstate__(self):
+        # The lock cannot be pickled (-processes shard arguments).
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _score(self, state):
+        if self.policy == "ewma":
+            # Unmeasured endpoints score 0 so each gets tried early.
+            return (state.ewma or 0.0) * (state.outstanding + 1), state.outstanding
+        return state.outstanding, state.ewma or 0.0
+
+    def acquire(self, exclude=()):
+        """Pick the endpoint for the next call and count it as outstanding."""
+        now = time.time()
+        with self._lock:
+            # Rotate the starting point so ties spread round-robin.
+            n = len(self.endpoints)
+            order = [self.endpoints[(self._next + i) % n] for i in range(n)]
+            self._next = (self._next + 1) % n
+            candidates = [e for e in order if e not in exclude] or order
+            closed = [e for e in candidates if not self._state[e].tripped]
+            half_open = [e for e in candidates
+                         if self._state[e].tripped and not self._state[e].probing and now >= self._state[e].open_until]
+            if closed or half_open:
+                endpoint = min(closed + half_open, key=lambda e: self._score(self._state[e]))
+            else:
+                # Every breaker is open: use the one that reopens first rather than fail outright.
+                endpoint = min(candidates, key=lambda e: self._state[e].open_until)
+            state = self._state[endpoint]
+            if state.tripped:
+                state.probing = True
+            state.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint, elapsed, failed):
+        """
+        End an outstanding call. `elapsed` (seconds) feeds the EWMA when given;
+        `failed` marks an endpoint failure for the breaker. Returns True when
+        this release tripped (or re-opened) the breaker.
+        """
+        with self._lock:
+            state = self._state[endpoint]
+            state.outstanding -= 1
+            if not failed:
+                if elapsed is not None:
+                    state.ewma = elapsed if state.ewma is None else state.ewma + EWMA_ALPHA * (elapsed - state.ewma)
+                state.consecutive_failures = 0
+                state.tripped = state.probing = False
+                return False
+            state.consecutive_failures += 1
+            if state.probing or (not state.tripped and state.consecutive_failures >= BREAKER_FAILURES):
+                state.tripped = True
+                state.probing = False
+                state.open_until = time.time() + BREAKER_OPEN_SECONDS
+                return True
+            return False
+
+    def _attempt_done(self, endpoint, start, exc, tried, metrics):
+        # Book one attempt; returns True when the caller should fail over.
+        elapsed = time.perf_counter() - start
+        failed = exc is not None and is_endpoint_failure(exc)
+        tripped = self.release(endpoint, elapsed if exc is None else None, failed)
+        if metrics is not None:
+            counts = metrics.endpoint_calls.setdefault(endpoint, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += exc is not None
+            counts[2] += tripped
+        tried.add(endpoint)
+        if failed and len(tried) < len(self.endpoints):
+            if metrics is not None:
+                metrics.failovers += 1
+            return True
+        return False
+
+    def call(self, fn, metrics=None):
+        """fn(endpoint) on the chosen endpoint, failing over to untried endpoints on endpoint failures."""
+        tried = set()
+        while True:
+            endpoint = self.acquire(tried)
+            start = time.perf_counter()
+            try:
+                result = fn(endpoint)
+            except Exception as e:
+                if self._attempt_done(endpoint, start, e, tried, metrics):
+                    continue
+                raise
+            self._attempt_done(endpoint, start, None, tried, metrics)
+            return result
+
+    async def call_async(self, fn, metrics=None):
+        """Coroutine version of call(): awaits fn(endpoint)."""
+        tried = set()
+        while True:
+            endpoint = self.acquire(tried)
+            start = time.perf_counter()
+            try:
+                result = await fn(endpoint)
+            except Exception as e:
+                if self._attempt_done(endpoint, start, e, tried, metrics):
+                    continue
+                raise
+            self._attempt_done(endpoint, start, None, tried, metrics)
+            return result
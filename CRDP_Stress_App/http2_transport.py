@@ -0,0 +1,154 @@
+# HTTP/2 Transport for CRDP Stress Testing
+#
+# requests only speaks HTTP/1.1, so each in-flight bulk call holds a TCP
+# connection of its own and N worker threads need N connections through the
+# NGINX ingress. This module lets the thread engine multiplex its workers' calls
+# as HTTP/2 streams over a small number of connections (httpx + h2), either as
+# h2c (cleartext, prior knowledge) or h2 (TLS, negotiated via ALPN).
+#
+# H2Session mimics the part of requests.Session / Response that the session
+# wrappers in parallel_execution.py use (post(), status_code, reason, text,
+# content, raw.read()/tell()/drain_conn()), so the wrappers - and with them the
+# body cache, compression, streaming and byte accounting - work unchanged over
+# either transport. Each response carries a connection_key so the wrappers can
+# count streams per connection.
+#
+######################################################################
+import os
+import threading
+import requests
+from CRDP_REST_API import NET_TIMEOUT
+
+# httpx (with the h2 package for http2=True) is only needed for -transport
+# h2c/h2, so it is optional like aiohttp: the CLI refuses those transports with
+# a clear message when either package is missing.
+try:
+    import httpx
+    import h2  # noqa: F401 - imported only to confirm httpx's HTTP/2 support is installed
+except ImportError:
+    httpx = None
+
+H2_AVAILABLE = httpx is not None
+H2_MODES = ("h2c", "h2")
+
+
+class H2Pool:
+    """
+    `connections` httpx clients shared by all workers of a run; each client
+    keeps one HTTP/2 connection (more only if the server's concurrent-stream
+    limit is reached) and the workers assigned to it multiplex over it.
+    Clients are created lazily per process, so a pool configured before
+    -processes forks is safe to use in the children.
+    """
+    def __init__(self, mode, connections=1, verify=False):
+        self.mode = mode
+        self.connections = max(1, connections)
+        self.verify = verify
+        self._clients = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _new_client(self):
+        # http1=False: h2c needs prior knowledge, and over TLS it keeps ALPN from
+        # silently falling back to HTTP/1.1 and measuring the wrong thing.
+        return httpx.Client(http1=False, http2=True, verify=self.verify, timeout=NET_TIMEOUT)
+
+    def session(self, task_id):
+        """A requests.Session stand-in for worker `task_id`, bound to one shared client."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._clients = [self._new_client() for _ in range(self.connections)]
+                self._pid = os.getpid()
+            client = self._clients[task_id % self.connections]
+        return H2Session(client)
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                for client in self._clients:
+                    client.close()
+            self._clients = []
+            self._pid = None
+
+
+class H2Session:
+    """The subset of requests.Session the session wrappers use, over a shared httpx client."""
+    def __init__(self, client):
+        self._client = client
+
+    def post(self, url, data=None, headers=None, verify=None, timeout=None, stream=False):
+        # `verify` is fixed per client (H2Pool); accepted for signature parity.
+        request = self._client.build_request("POST", url, content=data, headers=headers, timeout=timeout)
+        try:
+            resp = self._client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            # Surface transport errors the way the wrappers already handle them.
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        return H2Response(resp)
+
+    def close(self):
+        # The client (and its connection) is shared and owned by the H2Pool.
+        pass
+
+
+class H2Response:
+    """The subset of requests.Response the session wrappers read."""
+    def __init__(self, resp):
+        self._resp = resp
+        self.status_code = resp.status_code
+        self.reason = resp.reason_phrase
+        self.raw = _H2Raw(resp)
+        # (pid, connection identity): one key per HTTP/2 connection, unique
+        # across -processes children.
+        stream = resp.extensions.get("network_stream")
+        self.connection_key = (os.getpid(), id(stream)) if stream is not None else None
+
+    @property
+    def content(self):
+        return self._resp.read()
+
+    @property
+    def text(self):
+        self._resp.read()
+        return self._resp.text
+
+    def json(self):
+        self._resp.read()
+        return self._resp.json()
+
+
+class _H2Raw:
+    """File-like view of a (streamed) httpx response body, as urllib3's HTTPResponse offers requests."""
+    def __init__(self, resp):
+        self._resp = resp
+        self._chunks = None
+        self._buf = b""
+        # httpx always decodes Content-Encoding; kept so callers can set it as with urllib3.
+        self.decode_content = True
+
+    def read(self, n=-1):
+        if self._chunks is None:
+            self._chunks = self._resp.iter_bytes()
+        while n < 0 or len(self._buf) < n:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buf += chunk
+        if n < 0:
+            out, self._buf = self._buf, b""
+        else:
+            out, self._buf = self._buf[:n], self._buf[n:]
+        return out
+
+    def tell(self):
+        # Body bytes received before content decoding.
+        return self._resp.num_bytes_downloaded
+
+    def drain_conn(self):
+        if not self._resp.is_closed:
+            if self._chunks is not None:
+                for _ in self._chunks:
+                    pass
+            else:
+                self._resp.read()
+            self._resp.close()
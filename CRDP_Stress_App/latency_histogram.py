@@ -0,0 +1,180 @@
+# Mergeable Latency Histograms for CRDP Stress Testing
+#
+# Per-call latency percentiles used to come from sorting every call's latency,
+# and across clients (multi_client.py) all that was left were each client's own
+# p50/p95/p99 - which cannot be combined: the mean of eight p99s is not the p99
+# of the eight clients together. Each worker now records its call latencies
+# into a LatencyHistogram instead:
+#
+#   - HDR-style log-linear buckets: values (integer microseconds) are grouped by
+#     power of two, and each power of two is split into SUB_BUCKETS_HALF linear
+#     sub-buckets, so every value is resolved to within 1/SUB_BUCKETS_HALF
+#     (~0.1%) of itself from 1 us to hours, in a bounded number of counters.
+#   - Only the non-empty counters are held, so a histogram's size depends on
+#     the spread of the latencies, never on how many calls it counts.
+#   - Two histograms merge exactly by adding counters: the pooled percentiles of
+#     a -processes run, or of 100 multi_client.py children, are the same as if a
+#     single histogram had recorded every call.
+#
+# -jsonout carries each phase's histogram (to_dict()) so the launchers can pool
+# the clients' latencies without the raw calls.
+#
+######################################################################
+import math
+
+# NumPy (optional) bins a whole array of latencies at once in record_values().
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SUB_BUCKET_BITS = 11
+SUB_BUCKETS_HALF = 1 << (SUB_BUCKET_BITS - 1)
+UNIT_SECONDS = 1e-6
+
+
+class LatencyHistogram:
+    """
+    Counts of latencies (seconds) in log-linear buckets of microseconds, with the
+    exact min and max. record() is O(1); merge() adds another histogram's counts.
+    Percentiles are nearest-rank, reported as the middle of the value's bucket
+    (clamped to the exact min/max).
+    """
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min_us = None
+        self.max_us = None
+
+    def __len__(self):
+        return self.total
+
+    @classmethod
+    def from_values(cls, seconds):
+        return cls().record_values(seconds)
+
+    @staticmethod
+    def _index(us):
+        shift = max(0, us.bit_length() - SUB_BUCKET_BITS)
+        return (shift << (SUB_BUCKET_BITS - 1)) + (us >> shift)
+
+    @staticmethod
+    def _bounds(index):
+        """(lowest, highest) microsecond value of the bucket at `index`."""
+        if index < 2 * SUB_BUCKETS_HALF:
+            return index, index
+        shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+        sub = index - (shift << (SUB_BUCKET_BITS - 1))
+        return sub << shift, ((sub + 1) << shift) - 1
+
+    def record(self, seconds, count=1):
+        us = max(0, int(round(seconds / UNIT_SECONDS)))
+        i = self._index(us)
+        self.counts[i] = self.counts.get(i, 0) + count
+        self.total += count
+        if self.min_us is None or us < self.min_us:
+            self.min_us = us
+        if self.max_us is None or us > self.max_us:
+            self.max_us = us
+
+    def record_values(self, seconds):
+        """record() every latency in `seconds` (vectorized for NumPy arrays); returns self."""
+        if np is None or not isinstance(seconds, np.ndarray):
+            # record() inlined: this loop bins whole phases without NumPy.
+            counts = self.counts
+            us_values = [max(0, int(round(s / UNIT_SECONDS))) for s in seconds]
+            for us in us_values:
+                shift = us.bit_length() - SUB_BUCKET_BITS
+                i = us if shift <= 0 else (shift << (SUB_BUCKET_BITS - 1)) + (us >> shift)
+                counts[i] = counts.get(i, 0) + 1
+            if us_values:
+                self.total += len(us_values)
+                lo, hi = min(us_values), max(us_values)
+                self.min_us = lo if self.min_us is None else min(self.min_us, lo)
+                self.max_us = hi if self.max_us is None else max(self.max_us, hi)
+            return self
+        if not len(seconds):
+            return self
+        us = np.maximum(np.rint(seconds / UNIT_SECONDS), 0).astype(np.int64)
+        # frexp's exponent is the bit length of an integer below 2**53.
+        shift = np.maximum(np.frexp(us)[1] - SUB_BUCKET_BITS, 0)
+        index = (shift << (SUB_BUCKET_BITS - 1)) + (us >> shift)
+        values, counts = np.unique(index, return_counts=True)
+        for i, n in zip(values.tolist(), counts.tolist()):
+            self.counts[i] = self.counts.get(i, 0) + n
+        self.total += len(us)
+        lo, hi = int(us.min()), int(us.max())
+        self.min_us = lo if self.min_us is None else min(self.min_us, lo)
+        self.max_us = hi if self.max_us is None else max(self.max_us, hi)
+        return self
+
+    def merge(self, other):
+        """Add `other`'s counts to this histogram (exact); returns self."""
+        for i, n in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + n
+        self.total += other.total
+        if other.total:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+            self.max_us = other.max_us if self.max_us is None else max(self.max_us, other.max_us)
+        return self
+
+    def value_at(self, p):
+        """Latency (seconds) at quantile p (0..1); 0.0 when empty."""
+        if not self.total:
+            return 0.0
+        if p >= 1.0:
+            return self.max_us * UNIT_SECONDS
+        rank = max(1, math.ceil(p * self.total - 1e-9))
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                lo, hi = self._bounds(i)
+                us = min(self.max_us, max(self.min_us, (lo + hi) / 2))
+                return us * UNIT_SECONDS
+        return self.max_us * UNIT_SECONDS
+
+    def percentiles(self):
+        """p50/p95/p99/p999/max in seconds, the keys compute_percentiles() uses plus p999."""
+        return {
+            "p50": self.value_at(0.50),
+            "p95": self.value_at(0.95),
+            "p99": self.value_at(0.99),
+            "p999": self.value_at(0.999),
+            "max": self.value_at(1.0),
+        }
+
+    def to_dict(self):
+        """
+        Compact JSON form: the non-empty buckets as one flat list of
+        (bucket index delta, count) pairs in index order.
+        """
+        buckets = []
+        prev = 0
+        for i in sorted(self.counts):
+            buckets.extend((i - prev, self.counts[i]))
+            prev = i
+        return {
+            "unit_us": 1,
+            "sub_bucket_bits": SUB_BUCKET_BITS,
+            "count": self.total,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "buckets": buckets,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        """Inverse of to_dict(). Raises ValueError for another bucket layout."""
+        if d.get("sub_bucket_bits") != SUB_BUCKET_BITS or d.get("unit_us") != 1:
+            raise ValueError("unsupported latency histogram layout")
+        hist = cls()
+        buckets = d.get("buckets", [])
+        i = 0
+        for k in range(0, len(buckets), 2):
+            i += buckets[k]
+            hist.counts[i] = buckets[k + 1]
+        hist.total = sum(hist.counts.values())
+        hist.min_us = d.get("min_us")
+        hist.max_us = d.get("max_us")
+        return hist
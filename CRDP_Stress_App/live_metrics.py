@@ -0,0 +1,306 @@
+# Live Metrics Exporter for CRDP Stress Testing
+#
+# AggregatedMetrics is built once a phase has ended, so during a long run all
+# there is to watch is the tqdm bar - nothing to line up against the CRDP /
+# ingress / HSM samplers while it happens. LiveMetrics publishes the running
+# phase once a second, while the execute_* functions are still going:
+#
+#   - txns/sec and calls/sec over the last interval, and the running totals
+#   - bulk calls in flight right now
+#   - call latency: a per-interval histogram (and p50/p99) plus the running
+#     one as cumulative Prometheus buckets
+#   - failed attempts, calls skipped for good, retries
+#   - client-host CPU (system-wide) and this process's CPU
+#
+# as a Prometheus text endpoint (-metricsport, GET /metrics) and/or a JSONL
+# stream (-metricslog, one line per phase and second).
+#
+# Nothing is added to the workers' hot path beyond an in-flight counter: the
+# workers hand their WorkerMetrics over once (parallel_execution.watch_worker)
+# and a background thread reads the call records and latency histograms they
+# already keep, remembering how far it got in each. -processes children keep
+# their WorkerMetrics to themselves until they exit, so for them only the items
+# relayed for the progress bar (txns/sec, items) are live.
+#
+######################################################################
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from latency_histogram import LatencyHistogram, UNIT_SECONDS
+
+# psutil (optional) supplies the CPU readings; without it they are reported as null.
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+LIVE_INTERVAL = 1.0
+# Upper bounds (seconds) of the Prometheus latency buckets; +Inf is implied.
+PROMETHEUS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _PhaseState:
+    """Running totals of one phase, advanced by LiveMetrics.sample()."""
+    def __init__(self, name):
+        self.name = name
+        self.start = time.time()
+        self.workers = []
+        self.seen = {}  # id(WorkerMetrics) -> calls already counted
+        self.calls = 0
+        self.items = 0
+        self.relayed_items = 0
+        self.counts = {}
+        self.last_time = self.start
+        self.last_calls = 0
+        self.last_items = 0
+        self.snapshot = None
+        self.finished = False
+
+
+class LiveMetrics:
+    """
+    Samples the watched workers every `interval` seconds in a background thread.
+    `log_path`: write one JSON line per phase and sample. `port` (with `host`,
+    default all interfaces): serve the latest sample in the Prometheus text
+    format. start() raises OSError when the port cannot be bound.
+    """
+    def __init__(self, interval=LIVE_INTERVAL, log_path=None, port=None, host=""):
+        self.interval = interval
+        self.log_path = log_path
+        self.port = port
+        self.host = host
+        self.phases = {}
+        self.current = None
+        self._text = ""
+        self._log = None
+        self._server = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._proc = psutil.Process() if psutil is not None else None
+        self._cpu = None
+
+    def start(self):
+        if self.port is not None:
+            live = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] not in ("/", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = live.prometheus_text().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        if self.log_path is not None:
+            self._log = open(self.log_path, "w", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        # psutil keeps the system-wide reading per calling thread, so only this
+        # thread reads the CPU; the samples taken at phase changes reuse it.
+        if psutil is not None:
+            psutil.cpu_percent(None)
+            self._proc.cpu_percent(None)
+        while not self._stop.wait(self.interval):
+            if psutil is not None:
+                self._cpu = {"system": psutil.cpu_percent(None), "process": self._proc.cpu_percent(None)}
+            self.sample()
+
+    def stop(self):
+        """Take a last sample of every open phase, then close the log and the endpoint."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 2)
+        self.sample(final=True)
+        with self._lock:
+            for state in self.phases.values():
+                state.finished = True
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def new_phase(self, name):
+        """Make `name` the phase new workers belong to; the other phases get a last sample and stop."""
+        self.sample(final=True)
+        with self._lock:
+            for state in self.phases.values():
+                state.finished = True
+            self.phases[name] = _PhaseState(name)
+            self.current = name
+
+    def _phase(self, name):
+        name = name or self.current or "run"
+        state = self.phases.get(name)
+        if state is None or state.finished:
+            state = self.phases[name] = _PhaseState(name)
+            if self.current is None:
+                self.current = name
+        return state
+
+    def watch(self, metrics, phase=None):
+        """Follow a worker's WorkerMetrics (in the current phase unless `phase` is given)."""
+        with self._lock:
+            self._phase(phase).workers.append(metrics)
+
+    def add_items(self, n, phase=None):
+        """Count `n` items done that no watched worker reports (-processes progress relay)."""
+        with self._lock:
+            self._phase(phase).relayed_items += n
+
+    def sample(self, final=False):
+        """
+        Advance every open phase and publish it. A `final` sample (phase change,
+        stop) skips the phases with nothing new since a tick less than half an
+        interval ago, rather than publish an empty, zero-rate interval.
+        """
+        now = time.time()
+        cpu = self._cpu
+        with self._lock:
+            lines = []
+            for state in self.phases.values():
+                if not state.finished and not (final and self._idle(state, now)):
+                    lines.append(self._advance(state, now, cpu))
+            self._text = self._render(cpu)
+            if self._log is not None and lines:
+                for snapshot in lines:
+                    self._log.write(json.dumps(snapshot) + "\n")
+                self._log.flush()
+
+    def _idle(self, state, now):
+        if now - state.last_time >= self.interval / 2:
+            return False
+        if state.items + state.relayed_items != state.last_items:
+            return False
+        return all(len(m.call_records) <= state.seen.get(id(m), 0) for m in state.workers)
+
+    def _advance(self, state, now, cpu):
+        in_flight = errors = failed = retries = 0
+        for m in state.workers:
+            records = m.call_records
+            calls = len(records)
+            done = state.seen.get(id(m), 0)
+            if calls > done:
+                state.items += sum(records.items[done:calls])
+                state.calls += calls - done
+                state.seen[id(m)] = calls
+            in_flight += m.in_flight
+            errors += len(m.call_errors)
+            failed += m.failed_calls
+            retries += m.retries
+        # dict() copies the counters in one step, so a worker recording
+        # meanwhile cannot change them under the loop.
+        counts = {}
+        for m in state.workers:
+            for i, n in dict(m.latency_histogram.counts).items():
+                counts[i] = counts.get(i, 0) + n
+        interval = _histogram({i: n - state.counts.get(i, 0) for i, n in counts.items() if n > state.counts.get(i, 0)})
+        state.counts = counts
+
+        items = state.items + state.relayed_items
+        elapsed = max(now - state.last_time, 1e-9)
+        state.snapshot = {
+            "time": now,
+            "phase": state.name,
+            "elapsed": now - state.start,
+            "txns_per_sec": (items - state.last_items) / elapsed,
+            "calls_per_sec": (state.calls - state.last_calls) / elapsed,
+            "items": items,
+            "calls": state.calls,
+            "in_flight": in_flight,
+            "call_errors": errors,
+            "failed_calls": failed,
+            "retries": retries,
+            "latency_ms": {k: round(v * 1000, 3) for k, v in interval.percentiles().items() if k in ("p50", "p99", "max")} if len(interval) else None,
+            "latency_histogram": interval.to_dict(),
+            "client_cpu": cpu,
+        }
+        state.last_time = now
+        state.last_items = items
+        state.last_calls = state.calls
+        return state.snapshot
+
+    def prometheus_text(self):
+        with self._lock:
+            return self._text
+
+    def _render(self, cpu):
+        out = []
+
+        def metric(name, kind, help_text, rows):
+            out.append("# HELP crdp_stress_%s %s" % (name, help_text))
+            out.append("# TYPE crdp_stress_%s %s" % (name, kind))
+            for labels, value in rows:
+                out.append("crdp_stress_%s%s %s" % (name, labels, _number(value)))
+
+        snapshots = [s.snapshot for s in self.phases.values() if s.snapshot is not None]
+        label = {s["phase"]: '{phase="%s"}' % s["phase"] for s in snapshots}
+        metric("phase_active", "gauge", "1 for the phase currently running.",
+               [(label[s.name], int(s.name == self.current and not s.finished)) for s in self.phases.values() if s.name in label])
+        for key, name, kind, help_text in (
+            ("items", "items_total", "counter", "Items (txns) completed."),
+            ("calls", "calls_total", "counter", "Bulk calls completed."),
+            ("txns_per_sec", "txns_per_second", "gauge", "Txns/sec over the last sample interval."),
+            ("in_flight", "in_flight_calls", "gauge", "Bulk calls in flight."),
+            ("call_errors", "call_errors_total", "counter", "Failed call attempts (retried or not)."),
+            ("failed_calls", "failed_calls_total", "counter", "Calls that failed for good and were skipped."),
+            ("retries", "retries_total", "counter", "Call attempts re-sent after a failure."),
+        ):
+            metric(name, kind, help_text, [(label[s["phase"]], s[key]) for s in snapshots])
+
+        out.append("# HELP crdp_stress_call_latency_seconds Bulk call latency.")
+        out.append("# TYPE crdp_stress_call_latency_seconds histogram")
+        for state in self.phases.values():
+            if state.snapshot is None:
+                continue
+            hist = _histogram(state.counts)
+            below = {le: 0 for le in PROMETHEUS_BUCKETS}
+            total_us = 0.0
+            for i, n in hist.counts.items():
+                lo, hi = hist._bounds(i)
+                total_us += (lo + hi) / 2 * n
+                for le in PROMETHEUS_BUCKETS:
+                    if hi * UNIT_SECONDS <= le:
+                        below[le] += n
+            for le in PROMETHEUS_BUCKETS:
+                out.append('crdp_stress_call_latency_seconds_bucket{phase="%s",le="%s"} %d' % (state.name, _number(le), below[le]))
+            out.append('crdp_stress_call_latency_seconds_bucket{phase="%s",le="+Inf"} %d' % (state.name, hist.total))
+            out.append('crdp_stress_call_latency_seconds_sum{phase="%s"} %s' % (state.name, _number(total_us * UNIT_SECONDS)))
+            out.append('crdp_stress_call_latency_seconds_count{phase="%s"} %d' % (state.name, hist.total))
+
+        if cpu is not None:
+            metric("client_cpu_percent", "gauge", "Client-host CPU utilization, system-wide.", [("", cpu["system"])])
+            metric("process_cpu_percent", "gauge", "CPU of this load generator process (100 = one core).", [("", cpu["process"])])
+        return "\n".join(out) + "\n"
+
+
+def _histogram(counts):
+    """A LatencyHistogram over bare bucket counts (min/max are the outer buckets' bounds)."""
+    hist = LatencyHistogram()
+    hist.counts = counts
+    hist.total = sum(counts.values())
+    if counts:
+        hist.min_us = hist._bounds(min(counts))[0]
+        hist.max_us = hist._bounds(max(counts))[1]
+    return hist
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -16,24 +16,32 @@
 # Usage:
 #   py multi_client.py -clients N [-label BASE] [-outdir DIR] \
 #       -endpoint HOST -policy NAME -user NAME \
-#       [-iterations N] [-batchsize N] [-threads N] [-charset ...] \
+#       [-iterations N] [-batchsize N] [-threads N] [-charset ...] [-progress] \
 #       [-payload FILE | -csvlist FILE]
 #
-# Every argument other than -clients / -label / -outdir is forwarded verbatim
-# to each child CRDP_Stress.py, so all of that tool's flags work here unchanged.
-# Each child additionally receives its own -jsonout and -label.
+# Every argument other than -clients / -label / -outdir / -progress is forwarded
+# verbatim to each child CRDP_Stress.py, so all of that tool's flags work here
+# unchanged. Each child additionally receives its own -jsonout and -label, and
+# -quiet: its output only goes to a log file, so it draws no progress bars
+# (-progress keeps them, and the colors).
 #
 # NOTE: The client-CPU figure captured by each child is SYSTEM-WIDE (psutil
 # reports whole-host utilization), so with N co-located clients every child sees
 # the same shared host CPU. That is exactly what Test A wants: it reveals when
 # the load host itself saturates.
 #
+# Latency is pooled exactly: each child's JSON carries its per-phase latency
+# histogram (latency_histogram.py), and the launcher adds the histograms up, so
+# the pooled p99/p99.9 are those of every call of every client - not an average
+# of the clients' own percentiles.
+#
 import argparse
 import json
 import os
 import subprocess
 import sys
 import time
+from latency_histogram import LatencyHistogram
 
 try:
     from termcolor import colored
@@ -55,6 +63,8 @@ def parse_args():
                         help="Base label; each child is tagged <label>-cN (default: testA).")
     parser.add_argument("-outdir", default=None,
                         help="Directory for per-child JSON + logs (default: ./multi_client_<label>).")
+    parser.add_argument("-progress", action="store_true",
+                        help="Let the children draw progress bars and colored output into their logs (default: -quiet).")
     # Everything else is forwarded to the child unchanged.
     known, passthrough = parser.parse_known_args()
     if known.clients < 1:
@@ -91,8 +101,10 @@ def main():
             "-jsonout", json_path,
             "-label", child_label,
         ]
+        if not known.progress and "-quiet" not in passthrough:
+            cmd.append("-quiet")
         logf = open(log_path, "w")
-        # Child stdout/stderr (colored text + tqdm bars) go to the per-child log
+        # Child stdout/stderr (the summary, plus colors and bars with -progress) go to the per-child log
         # so the aggregate view stays clean and failures remain debuggable.
         p = subprocess.Popen(cmd, stdout=logf, stderr=subprocess.STDOUT, cwd=script_dir)
         procs.append({"idx": i, "proc": p, "json": json_path, "log": log_path, "logf": logf})
@@ -150,11 +162,19 @@ def aggregate_phase(results, phase_key):
 
     # Rigorous overlapped-window rate: total txns across all clients divided by
     # the union wall-clock window (earliest phase start -> latest phase end).
+    # When every client recorded a measured window (-duration/-warmup/-cooldown),
+    # only the measured txns count, over the windows' overlap instead (if any).
     starts = [p["wall_start_epoch"] for p in phases if p.get("wall_start_epoch")]
     ends = [p["wall_end_epoch"] for p in phases if p.get("wall_end_epoch")]
+    windows = [p["measured_window"] for p in phases if p.get("measured_window")]
     window_rate = None
     overlap_note = ""
-    if starts and ends:
+    if windows and len(windows) == len(phases):
+        window = min(w["end_epoch"] for w in windows) - max(w["start_epoch"] for w in windows)
+        if window > 0:
+            window_rate = sum(w["txns"] for w in windows) / window
+            overlap_note = "  (measured windows overlap %.1fs)" % window
+    if window_rate is None and starts and ends:
         window = max(ends) - min(starts)
         if window > 0:
             window_rate = total_txns / window
@@ -181,6 +201,13 @@ def aggregate_phase(results, phase_key):
         print(colored("  Aggregate throughput (overlapped window):    %s txns/sec%s"
                       % (_fmt(window_rate), overlap_note), "green"))
     print("  Total txns: %s across %d clients" % (_fmt(total_txns), len(phases)))
+    pooled, pooled_clients = pool_latency(phases)
+    if pooled is not None:
+        pct = pooled.percentiles()
+        print("  Pooled latency/bulk-call (%s calls, %d/%d clients): p50 %.1fms | p95 %.1fms | "
+              "p99 %.1fms | p99.9 %.1fms | max %.1fms" % (
+                  _fmt(pooled.total), pooled_clients, len(phases), pct["p50"] * 1000, pct["p95"] * 1000,
+                  pct["p99"] * 1000, pct["p999"] * 1000, pct["max"] * 1000))
     print("  Per-client txns/sec: min %s | mean %s | max %s" % (
         _fmt(min(per_client)), _fmt(sum_of_rates / len(per_client)), _fmt(max(per_client))))
     if cpu_line:
@@ -188,6 +215,24 @@ def aggregate_phase(results, phase_key):
     print()
 
 
+def pool_latency(phases):
+    """
+    Merge the phases' latency histograms: (histogram, clients merged), or
+    (None, 0) when no client recorded one (e.g. JSON from an older version).
+    """
+    pooled = LatencyHistogram()
+    merged = 0
+    for p in phases:
+        if not p.get("latency_histogram"):
+            continue
+        try:
+            pooled.merge(LatencyHistogram.from_dict(p["latency_histogram"]))
+        except ValueError:
+            continue
+        merged += 1
+    return (pooled, merged) if merged else (None, 0)
+
+
 def _fmt(n):
     return "{:,.0f}".format(n)
 
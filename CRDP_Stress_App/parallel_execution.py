@@ -5,14 +5,30 @@
 # metrics collection, and workload distribution logic.
 #
 ######################################################################
+import os
+import sys
 import time
+import random
 import threading
+import multiprocessing
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import urllib3
+from collections import deque
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from threading import Lock
 from tqdm import tqdm
 from termcolor import colored
-from CRDP_REST_API import _dumps, _loads
+from CRDP_REST_API import (
+    _dumps, _loads, _loads_array, _record_wire, _record_stream, _record_tls, _record_endpoint, _record_failure, bulk_headers, response_wire_bytes, crdp_url,
+    stream_body_enabled, compression_codec, BODY_CACHE,
+    TLSAdapter, tls_context, tls_verify, settle_tls, CRDP_BULK_PROTECT, CRDPHTTPError, call_timeout,
+    CallTimer, bulk_stream, _record_breakdown,
+)
+from endpoint_balancer import EndpointBalancer, is_endpoint_failure
+from workload import IndexedMessages, ResultSink, payload_count
+from latency_histogram import LatencyHistogram
+from call_records import CallRecords, CallColumns
 
 # psutil powers the client-host CPU sampler (attribution: is the Python load
 # generator itself the bottleneck?). It is an optional dependency - when absent,
@@ -25,9 +41,69 @@ try:
 except ImportError:
     psutil = None
 
+# NumPy (optional, as in call_records.py) vectorizes the per-call derivations of
+# AggregatedMetrics that pair the call records with another per-call list; they
+# fall back to plain Python over the same data without it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# resource (POSIX only) gives the kernel's exact peak-RSS high-water mark for
+# the run, which the sampler's periodic readings can miss on short spikes.
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# The -processes pool relies on the "fork" start method: CRDP_Stress.py is a
+# top-level script without a __main__ guard, so "spawn" (the only method on
+# Windows) would re-execute the whole run in every child. On hosts without fork
+# the CLI refuses -processes and points at multi_client.py instead.
+MULTIPROCESS_AVAILABLE = "fork" in multiprocessing.get_all_start_methods()
+
 
 # -------------------- Metrics Classes --------------------
 
+BREAKDOWN_PHASES = ("serialize", "send", "ttfb", "download", "parse", "download_parse")
+# The phases spent in the load generator itself rather than waiting on the
+# network / CRDP (send and download are both, depending on the link; so is
+# download_parse, the two overlapped under -streamparse).
+BREAKDOWN_CLIENT_PHASES = ("serialize", "parse")
+
+
+class CallBreakdown:
+    """
+    -breakdown: per-call client-side phase times of one worker (CRDP_REST_API.
+    CallTimer) - per phase, the calls that recorded it, total seconds and a
+    LatencyHistogram. merge() adds another worker's.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.phases = {}
+
+    def add(self, phases):
+        self.calls += 1
+        for name, seconds in phases.items():
+            entry = self.phases.get(name)
+            if entry is None:
+                entry = self.phases[name] = [0, 0.0, LatencyHistogram()]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2].record(seconds)
+
+    def merge(self, other):
+        self.calls += other.calls
+        for name, (n, total, hist) in other.phases.items():
+            entry = self.phases.get(name)
+            if entry is None:
+                entry = self.phases[name] = [0, 0.0, LatencyHistogram()]
+            entry[0] += n
+            entry[1] += total
+            entry[2].merge(hist)
+        return self
+
+
 class WorkerMetrics:
     """Metrics collected by each worker thread"""
     def __init__(self, worker_id):
@@ -41,8 +117,82 @@ class WorkerMetrics:
         self.errors: list[str] = []
         # One (call_start_ts, call_end_ts, n_items) tuple per bulk REST call this
         # worker made. Latency, per-call size, and rolling throughput all derive
-        # from these records - they are the raw material for attribution.
-        self.call_records: list[tuple[float, float, int]] = []
+        # from these records - they are the raw material for attribution. Stored
+        # column-wise in typed arrays (CallRecords), 24 bytes a call.
+        self.call_records = CallRecords()
+        # The same calls' latencies, as a mergeable histogram (record_call()).
+        self.latency_histogram = LatencyHistogram()
+        # Open-loop (-rate) runs only: one entry per call record, how late the
+        # call was actually sent relative to its scheduled send time (seconds).
+        # Empty for closed-loop runs.
+        self.schedule_lags: list[float] = []
+        # Request body cache (CRDP_REST_API.BodyCache) counters: bodies reused vs
+        # encoded, time spent encoding, and encode time the reuses avoided.
+        self.body_cache_hits = 0
+        self.body_cache_misses = 0
+        self.serialize_seconds = 0.0
+        self.serialize_seconds_saved = 0.0
+        # One (request_bytes, response_bytes) entry per call record: body bytes
+        # on the wire, after compression. Empty for metrics whose calls do not
+        # go through the bulk wrappers (e.g. the round-trip end-to-end records).
+        self.call_bytes: list[tuple[int, int]] = []
+        # (endpoint, http_status) per entry in call_records, and one
+        # (time, endpoint, http_status or None) per failed call.
+        self.call_endpoints: list[tuple[str, int]] = []
+        self.call_errors: list[tuple[float, str, int | None]] = []
+        # HTTP/2 transport only: calls (streams) made per connection key.
+        self.h2_streams: dict = {}
+        # -tls only: one (handshake_seconds, resumed) tuple per new connection.
+        self.tls_handshakes: list[tuple[float, bool]] = []
+        # Multi-endpoint runs only: {endpoint: [calls, errors, breaker_trips]}
+        # and calls retried on another endpoint after an endpoint failure.
+        self.endpoint_calls: dict = {}
+        self.failovers = 0
+        # -adaptive only: one (call_end_ts, concurrency_limit) per limited call.
+        self.concurrency_samples: list[tuple[float, float]] = []
+        # Retries and hedging (CallPolicy): attempts re-sent after a failure,
+        # hedge attempts sent and how many of them answered first, calls that
+        # failed for good (skipped), and the calls / items sent for nothing.
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # Hedges not sent because every spare hedge thread / connection was
+        # still held by an earlier call's loser.
+        self.hedges_skipped = 0
+        self.failed_calls = 0
+        self.wasted_calls = 0
+        self.wasted_items = 0
+        # -breakdown only: the calls' serialize / send / ttfb / download / parse times.
+        self.call_breakdown = CallBreakdown()
+        # Bulk calls this worker has in flight right now (guarded_call), read
+        # by the live metrics exporter.
+        self.in_flight = 0
+
+    def absorb(self, other):
+        """Add the per-call entries and counters another attempt recorded (hedged calls)."""
+        for name, value in vars(other).items():
+            mine = getattr(self, name)
+            if name in ("worker_id", "start_time", "end_time"):
+                continue
+            if isinstance(value, (LatencyHistogram, CallBreakdown)):
+                mine.merge(value)
+            elif isinstance(value, CallRecords):
+                mine.extend(value)
+            elif isinstance(value, list):
+                mine.extend(value)
+            elif isinstance(value, dict):
+                for key, v in value.items():
+                    if isinstance(v, list):
+                        mine[key] = [a + b for a, b in zip(mine[key], v)] if key in mine else list(v)
+                    else:
+                        mine[key] = mine.get(key, 0) + v
+            else:
+                setattr(self, name, mine + value)
+
+    def record_call(self, call_start, call_end, n):
+        """Record one completed bulk call of n items."""
+        self.call_records.append((call_start, call_end, n))
+        self.latency_histogram.record(call_end - call_start)
 
     def duration(self):
         """Return duration in seconds (0 until both timestamps are recorded)."""
@@ -60,6 +210,19 @@ class AggregatedMetrics:
         self.overall_end: float | None = None
         self.worker_metrics: list[WorkerMetrics] = []
         self.total_items = 0
+        # Offered load (txns/sec) for open-loop runs; None for closed-loop runs.
+        self.target_rate: float | None = None
+        # Measured (steady-state) window set by set_measurement_window(). While
+        # unset, every call counts; once set, throughput and latency cover only
+        # calls that completed inside it and warm-up / cool-down are reported apart.
+        self.measure_start: float | None = None
+        self.measure_end: float | None = None
+        # RunConnectionPool.take_stats() for the phase; None without the run pool.
+        self.connection_stats: dict | None = None
+        # call_columns() cache: (per-worker record counts, all calls' CallColumns)
+        # and ((measure_start, measure_end), that window's CallColumns).
+        self._columns = None
+        self._measured_columns = None
 
     def add_worker_metrics(self, metrics):
         """Add metrics from a single worker"""
@@ -99,52 +262,368 @@ class AggregatedMetrics:
             return 0
         return ((max_dur - min_dur) / max_dur) * 100
 
+    def busy_profile(self):
+        """
+        How long the phase ran with fewer than all workers busy: the ramp from
+        the first worker starting to the last, and the tail from the first
+        worker running out of messages to the last one finishing, with the
+        share of workers still busy during the tail and the worker-seconds
+        left idle in it. None with fewer than two workers.
+        """
+        ms = [m for m in self.worker_metrics if m.start_time is not None and m.end_time is not None]
+        if len(ms) < 2:
+            return None
+        starts = [m.start_time for m in ms]
+        ends = [m.end_time for m in ms]
+        tail = max(ends) - min(ends)
+        idle = sum(max(ends) - e for e in ends)
+        return {
+            "ramp_sec": max(starts) - min(starts),
+            "tail_sec": tail,
+            "tail_busy_pct": (1 - idle / (len(ms) * tail)) * 100 if tail > 0 else 100.0,
+            "idle_worker_sec": idle,
+        }
+
+    # -------------------- Measurement window --------------------
+
+    def set_measurement_window(self, warmup=0.0, cooldown=0.0, duration=None):
+        """
+        Restrict the reported metrics to a steady-state window. The window opens
+        `warmup` seconds after overall_start and lasts `duration` seconds (timed
+        runs) or, when duration is None, closes `cooldown` seconds before
+        overall_end. Must be called after the phase has finished.
+        """
+        if self.overall_start is None or self.overall_end is None:
+            return
+        self.measure_start = self.overall_start + warmup
+        if duration is not None:
+            self.measure_end = self.measure_start + duration
+        else:
+            self.measure_end = self.overall_end - cooldown
+        # An over-long warm-up/cool-down leaves an empty window rather than a negative one.
+        self.measure_end = max(self.measure_end, self.measure_start)
+
+    def has_measurement_window(self):
+        return self.measure_start is not None and self.measure_end is not None
+
+    def measured_duration(self):
+        """Length of the measured window (the whole phase when no window is set)."""
+        if self.measure_start is None or self.measure_end is None:
+            return self.overall_duration()
+        return self.measure_end - self.measure_start
+
+    def _in_window(self, end):
+        if self.measure_start is None or self.measure_end is None:
+            return True
+        return self.measure_start <= end < self.measure_end
+
+    def _window_mask(self, ends):
+        """NumPy counterpart of _in_window(): a boolean mask over an array of end times."""
+        if self.measure_start is None or self.measure_end is None:
+            return np.ones(len(ends), dtype=bool)
+        return (ends >= self.measure_start) & (ends < self.measure_end)
+
     # -------------------- Derived attribution metrics --------------------
     # All of these are computed AFTER the timed phase completes, from the raw
     # per-call records, so they add no overhead to the measured hot path.
 
+    def call_columns(self, measured=True):
+        """
+        Every worker's call records concatenated column-wise (CallColumns) -
+        restricted to the measured window when `measured` and one is set. Both
+        are reused until a worker's records or the window change.
+        """
+        key = tuple(len(m.call_records) for m in self.worker_metrics)
+        if self._columns is None or self._columns[0] != key:
+            self._columns = (key, CallColumns.concat([m.call_records for m in self.worker_metrics]))
+            self._measured_columns = None
+        cols = self._columns[1]
+        if not (measured and self.has_measurement_window()):
+            return cols
+        bounds = (self.measure_start, self.measure_end)
+        if self._measured_columns is None or self._measured_columns[0] != bounds:
+            self._measured_columns = (bounds, cols.window(*bounds))
+        return self._measured_columns[1]
+
+    def call_count(self, measured=True):
+        """Bulk calls completed (inside the measured window, when `measured` and set)."""
+        return len(self.call_columns(measured))
+
     def all_call_records(self):
         """Flatten every worker's per-call records into one list."""
-        recs = []
-        for m in self.worker_metrics:
-            recs.extend(m.call_records)
-        return recs
+        return self.call_columns(measured=False).records()
+
+    def measured_call_records(self):
+        """Call records that completed inside the measured window (all of them when unset)."""
+        return self.call_columns().records()
+
+    def measured_items(self):
+        """Transactions completed inside the measured window."""
+        if not self.has_measurement_window():
+            return self.total_items
+        return self.call_columns().total_items()
 
     def all_latencies(self):
-        """Per-bulk-call wall times in seconds."""
-        return [end - start for start, end, _ in self.all_call_records()]
+        """Per-bulk-call wall times in seconds (measured window only, when set)."""
+        return self.call_columns().latencies()
 
     def txns_per_sec(self):
         """Primary throughput metric: transactions (items) processed per second."""
-        dur = self.overall_duration()
-        return (self.total_items / dur) if dur > 0 else 0
+        dur = self.measured_duration()
+        return (self.measured_items() / dur) if dur > 0 else 0
+
+    def latency_histogram(self):
+        """
+        Per-bulk-call latency histogram: the workers' histograms merged, or -
+        when a measured window is set - rebuilt from the calls inside it.
+        """
+        if self.has_measurement_window():
+            return LatencyHistogram.from_values(self.all_latencies())
+        hist = LatencyHistogram()
+        for m in self.worker_metrics:
+            hist.merge(m.latency_histogram)
+        return hist
 
     def latency_percentiles(self):
-        """p50/p95/p99/max of per-bulk-call latency (seconds)."""
-        return compute_percentiles(sorted(self.all_latencies()))
+        """p50/p95/p99/p999/max of per-bulk-call latency (seconds)."""
+        return self.latency_histogram().percentiles()
+
+    def all_schedule_lags(self):
+        """Open-loop runs: send delay behind the timetable for every call (seconds)."""
+        lags = []
+        for m in self.worker_metrics:
+            lags.extend(m.schedule_lags)
+        return lags
+
+    def wire_bytes(self):
+        """
+        (request_bytes, response_bytes, calls) summed over the calls that ended
+        in the measured window - body bytes on the wire, after compression.
+        """
+        if np is not None:
+            sent = received = calls = 0
+            for m in self.worker_metrics:
+                k = min(len(m.call_records), len(m.call_bytes))
+                if not k:
+                    continue
+                ends = np.frombuffer(m.call_records.ends, dtype=np.float64)[:k]
+                sizes = _pairs(m.call_bytes[:k], np.int64)[self._window_mask(ends)]
+                sent += int(sizes[:, 0].sum())
+                received += int(sizes[:, 1].sum())
+                calls += len(sizes)
+            return sent, received, calls
+        sent = received = calls = 0
+        for m in self.worker_metrics:
+            for (_, end, _), (req, resp) in zip(m.call_records, m.call_bytes):
+                if self._in_window(end):
+                    sent += req
+                    received += resp
+                    calls += 1
+        return sent, received, calls
+
+    def h2_connection_streams(self):
+        """HTTP/2 transport: {connection_key: streams} merged over the workers (whole phase)."""
+        merged = {}
+        for m in self.worker_metrics:
+            for key, n in m.h2_streams.items():
+                merged[key] = merged.get(key, 0) + n
+        return merged
+
+    def tls_handshakes(self):
+        """-tls: (handshake_seconds, resumed) for every connection opened in the phase.
+
+        Not window-filtered: a phase opens its connections as its workers start
+        (or replaces dropped ones), which is exactly what -warmup excludes. The
+        run pool's pre-warmed connections are opened before any phase and are
+        reported by RunConnectionPool.warm_tls() instead.
+        """
+        return [h for m in self.worker_metrics for h in m.tls_handshakes]
+
+    def endpoint_breakdown(self):
+        """
+        Per endpoint, over the measured window: the CallColumns of its completed
+        calls and {http_status or None: count} of its failed calls.
+        """
+        per_endpoint = {}
+        if np is not None:
+            # The endpoint of every call, in call_columns() order (None past a
+            # worker's last call_endpoints entry).
+            labels = []
+            for m in self.worker_metrics:
+                k = min(len(m.call_records), len(m.call_endpoints))
+                labels.extend(endpoint for endpoint, _ in m.call_endpoints[:k])
+                labels.extend([None] * (len(m.call_records) - k))
+            if labels:
+                cols = self.call_columns(measured=False)
+                labels = np.array(labels, dtype=object)
+                keep = self._window_mask(cols.ends)
+                for endpoint in set(labels[keep].tolist()) - {None}:
+                    sel = keep & (labels == endpoint)
+                    per_endpoint[endpoint] = (CallColumns(cols.starts[sel], cols.ends[sel], cols.items[sel]), {})
+        else:
+            records = {}
+            for m in self.worker_metrics:
+                for record, (endpoint, _) in zip(m.call_records, m.call_endpoints):
+                    if self._in_window(record[1]):
+                        records.setdefault(endpoint, CallRecords()).append(record)
+            for endpoint, recs in records.items():
+                per_endpoint[endpoint] = (CallColumns(recs.starts, recs.ends, recs.items), {})
+        for m in self.worker_metrics:
+            for ts, endpoint, status in m.call_errors:
+                if self._in_window(ts):
+                    errors = per_endpoint.setdefault(endpoint, (CallColumns.concat([]), {}))[1]
+                    errors[status] = errors.get(status, 0) + 1
+        return per_endpoint
+
+    def endpoint_stats(self):
+        """Multi-endpoint runs: ({endpoint: [calls, errors, breaker_trips]}, failovers) for the whole phase."""
+        merged = {}
+        failovers = 0
+        for m in self.worker_metrics:
+            failovers += m.failovers
+            for endpoint, counts in m.endpoint_calls.items():
+                total = merged.setdefault(endpoint, [0, 0, 0])
+                for i, n in enumerate(counts):
+                    total[i] += n
+        return merged, failovers
+
+    def call_breakdown(self):
+        """-breakdown: the workers' CallBreakdowns merged (whole phase)."""
+        merged = CallBreakdown()
+        for m in self.worker_metrics:
+            merged.merge(m.call_breakdown)
+        return merged
+
+    def body_cache_stats(self):
+        """Request body cache counters summed over the workers (whole phase)."""
+        return {
+            "hits": sum(m.body_cache_hits for m in self.worker_metrics),
+            "misses": sum(m.body_cache_misses for m in self.worker_metrics),
+            "serialize_sec": sum(m.serialize_seconds for m in self.worker_metrics),
+            "serialize_saved_sec": sum(m.serialize_seconds_saved for m in self.worker_metrics),
+        }
+
+    def corrected_latencies(self):
+        """
+        Coordinated-omission-corrected latency: measured from each call's
+        *intended* send time rather than when a worker got around to sending it,
+        so time spent queued behind a slow server counts against the server just
+        as it would for a real caller. Equals all_latencies() for closed-loop runs.
+        """
+        if np is not None:
+            parts = []
+            for m in self.worker_metrics:
+                cols = CallColumns.concat([m.call_records])
+                lats, ends = cols.latencies(), cols.ends
+                if m.schedule_lags:
+                    k = min(len(lats), len(m.schedule_lags))
+                    lats, ends = lats[:k] + np.array(m.schedule_lags[:k]), ends[:k]
+                parts.append(lats[self._window_mask(ends)])
+            return np.concatenate(parts) if parts else np.empty(0)
+        lats = []
+        for m in self.worker_metrics:
+            if m.schedule_lags:
+                lats.extend(end - start + lag for (start, end, _), lag in zip(m.call_records, m.schedule_lags)
+                            if self._in_window(end))
+            else:
+                lats.extend(end - start for start, end, _ in m.call_records if self._in_window(end))
+        return lats
+
+    def corrected_latency_histogram(self):
+        """Histogram of corrected_latencies(); latency_histogram() for closed-loop runs."""
+        if not any(m.schedule_lags for m in self.worker_metrics):
+            return self.latency_histogram()
+        return LatencyHistogram.from_values(self.corrected_latencies())
+
+    def corrected_latency_percentiles(self):
+        """p50/p95/p99/p999/max of coordinated-omission-corrected latency (seconds)."""
+        return self.corrected_latency_histogram().percentiles()
 
     def rolling_throughput(self, bucket=1.0):
         """
         Txns/sec time series: bucket completed items by their call-end time into
-        `bucket`-second bins (relative to overall_start). Exposes ramp, steady
-        state, and collapse that a single wall-clock average hides.
+        `bucket`-second bins (relative to overall_start, or to the start of the
+        measured window when one is set). Exposes ramp, steady state, and
+        collapse that a single wall-clock average hides.
+        """
+        if self.overall_start is None:
+            return []
+        if self.measure_start is not None:
+            return self.call_columns().throughput_series(self.measure_start, bucket)
+        return self.call_columns(measured=False).throughput_series(self.overall_start, bucket)
+
+    def rolling_concurrency(self, bucket=1.0):
+        """
+        -adaptive only: mean concurrency limit per `bucket`-second bin, aligned
+        with rolling_throughput() (same origin and bins). Bins without a call
+        repeat the previous level.
         """
-        recs = self.all_call_records()
-        if not recs or self.overall_start is None:
+        if self.overall_start is None:
             return []
-        t0 = self.overall_start
+        t0 = self.measure_start if self.measure_start is not None else self.overall_start
+        if np is not None:
+            samples = _pairs(chain.from_iterable(m.concurrency_samples for m in self.worker_metrics), np.float64)
+            samples = samples[self._window_mask(samples[:, 0])]
+            bins = ((samples[:, 0] - t0) // bucket).astype(np.int64)
+            ok = bins >= 0
+            if not ok.any():
+                return []
+            counts = np.bincount(bins[ok])
+            means = np.divide(np.bincount(bins[ok], weights=samples[ok, 1]), counts,
+                              out=np.zeros(len(counts)), where=counts > 0)
+            # Empty bins repeat the level of the last bin with a call (0.0 before the first).
+            last = np.maximum.accumulate(np.where(counts > 0, np.arange(len(counts)), 0))
+            return means[last].tolist()
         buckets = {}
-        for _, end, n in recs:
-            idx = int((end - t0) // bucket)
-            buckets[idx] = buckets.get(idx, 0) + n
+        for m in self.worker_metrics:
+            for t, limit in m.concurrency_samples:
+                if self._in_window(t):
+                    buckets.setdefault(int((t - t0) // bucket), []).append(limit)
         if not buckets:
             return []
-        max_idx = max(buckets)
-        return [buckets.get(i, 0) / bucket for i in range(max_idx + 1)]
+        series = []
+        level = 0.0
+        for i in range(max(buckets) + 1):
+            if i in buckets:
+                level = sum(buckets[i]) / len(buckets[i])
+            series.append(level)
+        return series
+
+    def excluded_summary(self, which, bucket=1.0):
+        """
+        Metrics for the calls excluded from the measured window - `which` is
+        "warmup" (completed before it opened) or "cooldown" (after it closed) -
+        so ramp behaviour stays visible. None when no window is set.
+        """
+        if self.measure_start is None or self.measure_end is None or self.overall_start is None:
+            return None
+        cols = self.call_columns(measured=False)
+        if which == "warmup":
+            lo, hi = self.overall_start, self.measure_start
+            recs = cols.window(hi=self.measure_start)
+        else:
+            lo, hi = self.measure_end, max(self.overall_end or self.measure_end, self.measure_end)
+            recs = cols.window(lo=self.measure_end)
+        pct = LatencyHistogram.from_values(recs.latencies()).percentiles()
+        return {
+            "start_epoch": lo,
+            "end_epoch": hi,
+            "duration_sec": hi - lo,
+            "txns": recs.total_items(),
+            "num_bulk_calls": len(recs),
+            "latency_ms": {k: v * 1000 for k, v in pct.items()},
+            "rolling_txns_per_sec": recs.throughput_series(lo, bucket),
+        }
 
 
 # -------------------- Attribution Helpers --------------------
 
+
+def _pairs(pairs, dtype):
+    """An (n, 2) NumPy array from an iterable of 2-tuples (fromiter skips the per-row objects np.array makes)."""
+    return np.fromiter(chain.from_iterable(pairs), dtype=dtype).reshape(-1, 2)
+
+
 def compute_percentiles(sorted_latencies):
     """
     Linear-interpolated percentiles from an already-sorted list of latencies.
@@ -177,13 +656,16 @@ class ClientCpuSampler:
     Samples client-host CPU utilization in a background thread for the duration
     of a phase. This is the clearest single signal for "is the Python load
     generator the wall?" - if avg CPU sits near 100% x cores while throughput is
-    capped, the client is the bottleneck, not CRDP.
+    capped, the client is the bottleneck, not CRDP. Each sample also records the
+    resident memory of this process plus its children (-processes workers), so
+    a phase's peak RSS shows whether memory stays flat as batch size grows.
 
     No-ops gracefully (available=False) when psutil is not installed.
     """
     def __init__(self, interval=0.5):
         self.interval = interval
         self.samples: list[float] = []
+        self.rss_samples: list[int] = []
         self._stop = threading.Event()
         self._thread: threading.Thread | None = None
         # psutil.cpu_count() may legitimately return None on exotic platforms;
@@ -203,38 +685,72 @@ class ClientCpuSampler:
         # system-wide utilization over that window, so this loop is self-paced.
         if psutil is None:
             return
+        proc = psutil.Process()
         while not self._stop.is_set():
             self.samples.append(psutil.cpu_percent(interval=self.interval))
+            self.rss_samples.append(_tree_rss(proc))
 
     def stop(self):
         if self._thread is not None:
             self._stop.set()
             self._thread.join(timeout=2)
+            # Phases shorter than one interval still get an RSS reading.
+            if psutil is not None:
+                self.rss_samples.append(_tree_rss(psutil.Process()))
 
     def summary(self):
         if psutil is None:
             return {"available": False}
         if not self.samples:
-            return {"available": True, "avg": 0.0, "peak": 0.0, "cores": self.cores}
+            return {"available": True, "avg": 0.0, "peak": 0.0, "cores": self.cores, "rss_peak_mb": None}
         return {
             "available": True,
             "avg": sum(self.samples) / len(self.samples),
             "peak": max(self.samples),
             "cores": self.cores,
+            "rss_peak_mb": max(self.rss_samples) / 1_000_000 if self.rss_samples else None,
         }
 
 
-def single_worker_aggregate(call_records, overall_start, overall_end):
+def _tree_rss(proc):
+    """Resident bytes of `proc` plus its live children (children that exit mid-sample are skipped)."""
+    total = proc.memory_info().rss
+    for child in proc.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def peak_rss_record():
+    """
+    Exact peak resident memory (MB) of this process and of its largest reaped
+    child over the whole run, from getrusage. None where `resource` is missing.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux but in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1_000_000,
+        "children_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 1_000_000,
+    }
+
+
+def single_worker_aggregate(call_records, overall_start, overall_end, metrics=None):
     """
     Build an AggregatedMetrics from a sequential (single-thread) run's call
     records so the numThreads==1 path reports the same rich metrics as the
-    parallel path and the two are directly comparable.
+    parallel path and the two are directly comparable. `metrics` is the
+    WorkerMetrics the sequential loop passed to the API calls, if any.
     """
-    m = WorkerMetrics(0)
+    m = metrics if metrics is not None else WorkerMetrics(0)
     m.start_time = overall_start
     m.end_time = overall_end
-    m.call_records = call_records
-    m.items_processed = sum(n for _, _, n in call_records)
+    m.call_records = CallRecords(call_records)
+    m.latency_histogram = LatencyHistogram.from_values(CallColumns.concat([m.call_records]).latencies())
+    m.items_processed = sum(m.call_records.items)
 
     agg = AggregatedMetrics()
     agg.overall_start = overall_start
@@ -249,7 +765,8 @@ def build_phase_record(agg_metrics, data_size, cpu, operation_name):
     -jsonout results file.
     """
     dur = agg_metrics.overall_duration()
-    pct = agg_metrics.latency_percentiles()
+    hist = agg_metrics.latency_histogram()
+    pct = hist.percentiles()
     return {
         "operation": operation_name,
         "total_txns": agg_metrics.total_items,
@@ -257,14 +774,313 @@ def build_phase_record(agg_metrics, data_size, cpu, operation_name):
         "wall_start_epoch": agg_metrics.overall_start,
         "wall_end_epoch": agg_metrics.overall_end,
         "txns_per_sec": agg_metrics.txns_per_sec(),
-        "mb_per_sec": (data_size / dur / 1_000_000) if dur > 0 else 0,
+        "mb_per_sec": phase_mb_per_sec(agg_metrics, data_size),
         "data_size_bytes": data_size,
-        "num_bulk_calls": len(agg_metrics.all_call_records()),
+        "num_bulk_calls": agg_metrics.call_count(measured=False),
         "workers": len(agg_metrics.worker_metrics),
         "load_skew_pct": agg_metrics.load_skew_percent(),
+        "dispatch": dispatch_record(agg_metrics),
         "latency_ms": {k: v * 1000 for k, v in pct.items()},
+        "latency_histogram": hist.to_dict(),
         "rolling_txns_per_sec": agg_metrics.rolling_throughput(),
         "client_cpu": cpu.summary() if cpu is not None else {"available": False},
+        "open_loop": open_loop_record(agg_metrics),
+        "measured_window": measured_window_record(agg_metrics),
+        "warmup": agg_metrics.excluded_summary("warmup"),
+        "cooldown": agg_metrics.excluded_summary("cooldown"),
+        "body_cache": body_cache_record(agg_metrics),
+        "wire": wire_record(agg_metrics, data_size),
+        "http2": http2_record(agg_metrics),
+        "tls": tls_record(agg_metrics),
+        "connection_pool": agg_metrics.connection_stats,
+        "load_balancer": balancer_record(agg_metrics),
+        "endpoints": endpoint_record(agg_metrics),
+        "concurrency": concurrency_record(agg_metrics),
+        "resilience": resilience_record(agg_metrics),
+        "breakdown": breakdown_record(agg_metrics),
+    }
+
+
+def phase_mb_per_sec(agg_metrics, data_size):
+    """
+    Data-plane rate. data_size covers every txn in the phase; with a measured
+    window it is scaled to the window's txns (average bytes per txn).
+    """
+    if agg_metrics.has_measurement_window():
+        bytes_per_txn = data_size / agg_metrics.total_items if agg_metrics.total_items else 0
+        return agg_metrics.txns_per_sec() * bytes_per_txn / 1_000_000
+    dur = agg_metrics.overall_duration()
+    return (data_size / dur / 1_000_000) if dur > 0 else 0
+
+
+def wire_record(agg_metrics, data_size):
+    """
+    Bytes-on-wire section of a phase record (measured window): request and
+    response body bytes, bytes/txn, and wire MB/s next to the data-plane MB/s,
+    so a NIC- or ingress-bound run is visible. None when no call recorded bytes.
+    """
+    sent, received, calls = agg_metrics.wire_bytes()
+    if calls == 0:
+        return None
+    txns = agg_metrics.measured_items()
+    dur = agg_metrics.measured_duration()
+    return {
+        "compression": compression_codec(),
+        "request_bytes": sent,
+        "response_bytes": received,
+        "request_bytes_per_txn": sent / txns if txns else 0,
+        "response_bytes_per_txn": received / txns if txns else 0,
+        "bytes_per_txn": (sent + received) / txns if txns else 0,
+        "wire_mb_per_sec": (sent + received) / dur / 1_000_000 if dur > 0 else 0,
+        "data_mb_per_sec": phase_mb_per_sec(agg_metrics, data_size),
+    }
+
+
+def http2_record(agg_metrics):
+    """
+    HTTP/2 section of a phase record: connections the phase's calls used and how
+    many streams (bulk calls) each carried. None over HTTP/1.1.
+    """
+    streams = agg_metrics.h2_connection_streams()
+    if not streams:
+        return None
+    counts = list(streams.values())
+    return {
+        "mode": _http2_pool.mode if _http2_pool is not None else None,
+        "connections": len(counts),
+        "streams": sum(counts),
+        "streams_per_connection": sum(counts) / len(counts),
+        "max_streams_per_connection": max(counts),
+    }
+
+
+def tls_record(agg_metrics):
+    """
+    TLS section of a phase record: handshakes (new connections) the phase paid
+    for, how many resumed a session, their cost, and that cost spread per txn.
+    None without -tls (or on the async engine, whose handshakes are not timed).
+    """
+    handshakes = agg_metrics.tls_handshakes()
+    if not handshakes:
+        return None
+    secs = [h[0] for h in handshakes]
+    pct = compute_percentiles(sorted(secs))
+    resumed = sum(1 for h in handshakes if h[1])
+    calls = agg_metrics.call_count(measured=False)
+    total_ms = sum(secs) * 1000
+    return {
+        "verify": tls_verify(),
+        "handshakes": len(handshakes),
+        "resumed": resumed,
+        "resumed_pct": resumed / len(handshakes) * 100,
+        "handshake_ms_total": total_ms,
+        "handshake_ms_mean": total_ms / len(handshakes),
+        "handshake_ms": {k: v * 1000 for k, v in pct.items()},
+        "handshake_ms_per_txn": total_ms / agg_metrics.total_items if agg_metrics.total_items else 0,
+        "calls_per_connection": calls / len(handshakes),
+    }
+
+
+def endpoint_record(agg_metrics):
+    """
+    Per-endpoint section of a phase record (measured window): throughput,
+    per-call latency percentiles and errors by HTTP status ("transport" for
+    connection-level failures), so a slow or failing node stands out.
+    """
+    per_endpoint = agg_metrics.endpoint_breakdown()
+    if not per_endpoint:
+        return None
+    dur = agg_metrics.measured_duration()
+    out = {}
+    for endpoint, (cols, errors) in sorted(per_endpoint.items()):
+        txns = cols.total_items()
+        hist = LatencyHistogram.from_values(cols.latencies())
+        out[endpoint] = {
+            "calls": len(cols),
+            "txns": txns,
+            "txns_per_sec": txns / dur if dur > 0 else 0,
+            "latency_ms": {k: v * 1000 for k, v in hist.percentiles().items()},
+            "latency_histogram": hist.to_dict(),
+            "errors": sum(errors.values()),
+            "errors_by_status": {str(status) if status is not None else "transport": n
+                                 for status, n in sorted(errors.items(), key=lambda kv: str(kv[0]))},
+        }
+    return out
+
+
+def balancer_record(agg_metrics):
+    """
+    Load-balancing section of a phase record (multi-endpoint -endpoint lists):
+    each endpoint's share of the call attempts, its errors and circuit-breaker
+    trips, plus the calls that failed over. None with a single endpoint.
+    """
+    per_endpoint, failovers = agg_metrics.endpoint_stats()
+    if not per_endpoint:
+        return None
+    attempts = sum(c[0] for c in per_endpoint.values())
+    return {
+        "endpoints": {
+            endpoint: {
+                "calls": calls,
+                "share_pct": calls / attempts * 100 if attempts else 0.0,
+                "errors": errors,
+                "breaker_trips": trips,
+            }
+            for endpoint, (calls, errors, trips) in sorted(per_endpoint.items())
+        },
+        "failovers": failovers,
+    }
+
+
+def concurrency_record(agg_metrics):
+    """
+    -adaptive section of a phase record (measured window): the limiter's
+    algorithm and ceiling, the limit's range over the phase and its series
+    next to rolling_txns_per_sec. None without -adaptive.
+    """
+    samples = [s for m in agg_metrics.worker_metrics for s in m.concurrency_samples]
+    limits = [limit for t, limit in samples if agg_metrics._in_window(t)]
+    if _limiter is None or not limits:
+        return None
+    return {
+        "algorithm": _limiter.algorithm,
+        "ceiling": _limiter.max_limit,
+        "limit_mean": sum(limits) / len(limits),
+        "limit_min": min(limits),
+        "limit_max": max(limits),
+        "limit_final": max(samples)[1],
+        "rolling_limit": agg_metrics.rolling_concurrency(),
+    }
+
+
+def dispatch_record(agg_metrics):
+    """
+    Message dispatch section of a phase record: how messages reached the
+    workers and how much of the phase ran with fewer than all of them busy
+    (see AggregatedMetrics.busy_profile). None with fewer than two workers.
+    """
+    busy = agg_metrics.busy_profile()
+    if busy is None:
+        return None
+    dur = agg_metrics.overall_duration()
+    return {
+        "mode": _dispatch,
+        "workers": len(agg_metrics.worker_metrics),
+        **busy,
+        "partial_pct": (busy["ramp_sec"] + busy["tail_sec"]) / dur * 100 if dur else 0.0,
+    }
+
+
+def breakdown_record(agg_metrics):
+    """
+    -breakdown section of a phase record: per client-side phase of a bulk call,
+    the mean / p50 / p99 time and its share of the summed phase time, and the
+    share spent in the load generator (serialize + parse) versus waiting for
+    the first response byte. None when the breakdown is off.
+    """
+    bd = agg_metrics.call_breakdown()
+    if not bd.calls:
+        return None
+    total = sum(entry[1] for entry in bd.phases.values())
+    phases = {}
+    for name in BREAKDOWN_PHASES:
+        if name not in bd.phases:
+            continue
+        n, secs, hist = bd.phases[name]
+        pct = hist.percentiles()
+        phases[name] = {
+            "calls": n,
+            "total_ms": secs * 1000,
+            "mean_ms": secs / n * 1000,
+            "p50_ms": pct["p50"] * 1000,
+            "p99_ms": pct["p99"] * 1000,
+            "share_pct": secs / total * 100 if total else 0.0,
+        }
+    client = sum(bd.phases[name][1] for name in BREAKDOWN_CLIENT_PHASES if name in bd.phases)
+    wait = bd.phases["ttfb"][1] if "ttfb" in bd.phases else 0.0
+    return {
+        "calls": bd.calls,
+        "phases": phases,
+        "client_pct": client / total * 100 if total else 0.0,
+        "ttfb_pct": wait / total * 100 if total else 0.0,
+    }
+
+
+def resilience_record(agg_metrics):
+    """
+    Retries / hedging section of a phase record: attempts re-sent, hedges sent
+    and won, calls that failed for good, and the wasted work (calls and txns
+    sent whose results were thrown away). None when no call needed any of it
+    and neither -retries nor -hedge is set.
+    """
+    ms = agg_metrics.worker_metrics
+    counts = {name: sum(getattr(m, name) for m in ms)
+              for name in ("retries", "hedges", "hedge_wins", "hedges_skipped", "failed_calls", "wasted_calls", "wasted_items")}
+    if not any(counts.values()) and (_call_policy is None or not (_call_policy.retries or _call_policy.hedge)):
+        return None
+    sent_items = agg_metrics.total_items + counts["wasted_items"]
+    return {
+        "max_retries": _call_policy.retries if _call_policy is not None else 0,
+        "hedge": _call_policy is not None and _call_policy.hedge,
+        "deadline_sec": call_timeout(),
+        **counts,
+        "wasted_pct": counts["wasted_items"] / sent_items * 100 if sent_items else 0.0,
+    }
+
+
+def body_cache_record(agg_metrics):
+    """
+    Request body cache section of a phase record: bodies reused vs encoded, the
+    time spent encoding and the encode time the reuses saved. None when no
+    bulk call went through the cache (e.g. the discrete API).
+    """
+    stats = agg_metrics.body_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    if lookups == 0:
+        return None
+    return {
+        "enabled": BODY_CACHE.enabled,
+        "streamed": stream_body_enabled(),
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "hit_ratio": stats["hits"] / lookups,
+        "serialize_ms": stats["serialize_sec"] * 1000,
+        "serialize_saved_ms": stats["serialize_saved_sec"] * 1000,
+    }
+
+
+def measured_window_record(agg_metrics):
+    """Bounds of the measured (steady-state) window, or None when the whole phase counts."""
+    if not agg_metrics.has_measurement_window():
+        return None
+    return {
+        "start_epoch": agg_metrics.measure_start,
+        "end_epoch": agg_metrics.measure_end,
+        "duration_sec": agg_metrics.measured_duration(),
+        "txns": agg_metrics.measured_items(),
+        "num_bulk_calls": agg_metrics.call_count(),
+    }
+
+
+def open_loop_record(agg_metrics):
+    """
+    Open-loop section of a phase record: offered vs achieved rate, the raw
+    (service-time) and coordinated-omission-corrected latency percentiles side by
+    side, and how far behind the timetable the workers fell. None when closed-loop.
+    """
+    if agg_metrics.target_rate is None:
+        return None
+    lags = agg_metrics.all_schedule_lags()
+    corrected = agg_metrics.corrected_latency_histogram()
+    return {
+        "target_txns_per_sec": agg_metrics.target_rate,
+        "achieved_txns_per_sec": agg_metrics.txns_per_sec(),
+        "latency_ms_raw": {k: v * 1000 for k, v in agg_metrics.latency_percentiles().items()},
+        "latency_ms_corrected": {k: v * 1000 for k, v in corrected.percentiles().items()},
+        "latency_histogram_corrected": corrected.to_dict(),
+        "schedule_lag_ms": {k: v * 1000 for k, v in compute_percentiles(sorted(lags)).items()},
+        # A call counts as late when it left more than 1 ms after its slot.
+        "late_calls": sum(1 for lag in lags if lag > 0.001),
     }
 
 
@@ -308,10 +1124,10 @@ def protectData_session(session, t_endpointCRDP, t_data, t_protectionPolicy):
         CRDP_PROTECT, APP_CONTENT_TYPE, APP_JSON,
         CRDP_PROTECTION_POLICY_NAME, CRDP_DATA_NAME,
         CRDP_PROTECTED_DATA_NAME, CRDP_EXTERNAL_VER_NAME,
-        NET_TIMEOUT, STATUS_CODE_OK, kPrintError
+        STATUS_CODE_OK, kPrintError
     )
 
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_PROTECT)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_PROTECT)
     t_headers = {APP_CONTENT_TYPE: APP_JSON}
     t_dataStr = {
         CRDP_PROTECTION_POLICY_NAME: t_protectionPolicy,
@@ -321,7 +1137,7 @@ def protectData_session(session, t_endpointCRDP, t_data, t_protectionPolicy):
     try:
         r = session.post(
             t_endpoint, data=_dumps(t_dataStr),
-            headers=t_headers, verify=False, timeout=NET_TIMEOUT
+            headers=t_headers, verify=tls_verify(), timeout=call_timeout()
         )
     except requests.exceptions.RequestException as e:
         print("protectData_session-exception:\n", e)
@@ -329,7 +1145,7 @@ def protectData_session(session, t_endpointCRDP, t_data, t_protectionPolicy):
 
     if r.status_code != STATUS_CODE_OK:
         kPrintError("protectData_session", r)
-        raise Exception(f"HTTP {r.status_code}")
+        raise CRDPHTTPError(r.status_code)
 
     # external_version is optional - policies without key rotation omit it.
     t_json = _loads(r)
@@ -339,41 +1155,60 @@ def protectData_session(session, t_endpointCRDP, t_data, t_protectionPolicy):
     return t_protectedData, t_version
 
 
-def protectBulkData_session(session, t_endpointCRDP, t_dataArray, t_protectionPolicy):
+def protectBulkData_session(session, t_endpointCRDP, t_dataArray, t_protectionPolicy, metrics=None):
     """
-    Session-aware version of protectBulkData.
+    Session-aware version of protectBulkData. `metrics` (the calling worker's
+    WorkerMetrics) receives the body cache counters. t_endpointCRDP may be an
+    EndpointBalancer, which picks the endpoint for this call.
     """
+    if isinstance(t_endpointCRDP, EndpointBalancer):
+        return t_endpointCRDP.call(lambda t_host: protectBulkData_session(
+            session, t_host, t_dataArray, t_protectionPolicy, metrics), metrics)
     from CRDP_REST_API import (
-        CRDP_BULK_PROTECT, APP_CONTENT_TYPE, APP_JSON,
+        CRDP_BULK_PROTECT,
         CRDP_PROTECTION_POLICY_NAME, CRDP_DATA_ARRAY_NAME,
         CRDP_PROTECTED_DATA_ARRAY_NAME, CRDP_EXTERNAL_VER_NAME,
-        NET_TIMEOUT, STATUS_CODE_OK, kPrintError
+        STATUS_CODE_OK, kPrintError
     )
 
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_BULK_PROTECT)
-    t_headers = {APP_CONTENT_TYPE: APP_JSON}
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_BULK_PROTECT)
+    t_headers = bulk_headers()
     t_dataStr = {
         CRDP_PROTECTION_POLICY_NAME: t_protectionPolicy,
         CRDP_DATA_ARRAY_NAME: t_dataArray,
     }
+    t_timer = CallTimer()
+    t_body = BODY_CACHE.encode((CRDP_BULK_PROTECT, t_protectionPolicy), t_dataArray, t_dataStr, metrics)
+    t_timer.lap("serialize")
 
     try:
         r = session.post(
-            t_endpoint, data=_dumps(t_dataStr),
-            headers=t_headers, verify=False, timeout=NET_TIMEOUT
+            t_endpoint, data=t_body,
+            headers=t_headers, verify=tls_verify(), timeout=call_timeout(),
+            stream=bulk_stream(),
         )
     except requests.exceptions.RequestException as e:
         print("protectBulkData_session-exception:\n", e)
+        _record_failure(metrics, t_endpointCRDP, None)
         raise
 
+    t_timer.headers()
     if r.status_code != STATUS_CODE_OK:
         kPrintError("protectBulkData_session", r)
-        raise Exception(f"HTTP {r.status_code}")
+        _record_failure(metrics, t_endpointCRDP, r.status_code)
+        raise CRDPHTTPError(r.status_code)
 
+    t_timer.download(r)
     # external_version is optional - policies without key rotation omit it from
     # the per-item entries in protected_data_array.
-    t_protectedData = _loads(r)[CRDP_PROTECTED_DATA_ARRAY_NAME]
+    t_protectedData = _loads_array(r, CRDP_PROTECTED_DATA_ARRAY_NAME)
+    t_timer.parsed()
     t_version = t_protectedData[0].get(CRDP_EXTERNAL_VER_NAME) if t_protectedData else None
+    _record_wire(metrics, t_body, response_wire_bytes(r))
+    _record_breakdown(metrics, t_timer)
+    _record_stream(metrics, r)
+    _record_tls(metrics)
+    _record_endpoint(metrics, t_endpointCRDP, r.status_code)
 
     return t_protectedData, t_version
 
@@ -386,10 +1221,10 @@ def revealData_session(session, t_endpointCRDP, t_data, t_protectionPolicy, t_ex
         CRDP_REVEAL, APP_CONTENT_TYPE, APP_JSON,
         CRDP_PROTECTION_POLICY_NAME, CRDP_EXTERNAL_VER_NAME,
         CRDP_USERNAME_NAME, CRDP_PROTECTED_DATA_NAME, CRDP_DATA_NAME,
-        NET_TIMEOUT, STATUS_CODE_OK, kPrintError
+        STATUS_CODE_OK, kPrintError
     )
 
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_REVEAL)
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_REVEAL)
     t_headers = {APP_CONTENT_TYPE: APP_JSON}
     t_dataStr = {
         CRDP_PROTECTION_POLICY_NAME: t_protectionPolicy,
@@ -403,7 +1238,7 @@ def revealData_session(session, t_endpointCRDP, t_data, t_protectionPolicy, t_ex
     try:
         r = session.post(
             t_endpoint, data=_dumps(t_dataStr),
-            headers=t_headers, verify=False, timeout=NET_TIMEOUT
+            headers=t_headers, verify=tls_verify(), timeout=call_timeout()
         )
     except requests.exceptions.RequestException as e:
         print("revealData_session-exception:\n", e)
@@ -411,60 +1246,596 @@ def revealData_session(session, t_endpointCRDP, t_data, t_protectionPolicy, t_ex
 
     if r.status_code != STATUS_CODE_OK:
         kPrintError("revealData_session", r)
-        raise Exception(f"HTTP {r.status_code}")
+        raise CRDPHTTPError(r.status_code)
 
     t_revealedData = _loads(r)[CRDP_DATA_NAME]
 
     return t_revealedData
 
 
-def revealBulkData_session(session, t_endpointCRDP, t_dataArray, t_protectionPolicy, t_externalVersion, t_user):
+def revealBulkData_session(session, t_endpointCRDP, t_dataArray, t_protectionPolicy, t_externalVersion, t_user, metrics=None, cache_body=True):
     """
-    Session-aware version of revealBulkData.
+    Session-aware version of revealBulkData. cache_body=False skips storing the
+    encoded body (messages that are never sent twice, e.g. round-trip reveals).
+    t_endpointCRDP may be an EndpointBalancer, as for protectBulkData_session.
     """
+    if isinstance(t_endpointCRDP, EndpointBalancer):
+        return t_endpointCRDP.call(lambda t_host: revealBulkData_session(
+            session, t_host, t_dataArray, t_protectionPolicy, t_externalVersion, t_user, metrics, cache_body), metrics)
     from CRDP_REST_API import (
-        CRDP_BULK_REVEAL, APP_CONTENT_TYPE, APP_JSON,
+        CRDP_BULK_REVEAL,
         CRDP_PROTECTION_POLICY_NAME, CRDP_USERNAME_NAME,
         CRDP_PROTECTED_DATA_ARRAY_NAME, CRDP_DATA_ARRAY_NAME,
-        NET_TIMEOUT, STATUS_CODE_OK, kPrintError
+        STATUS_CODE_OK, kPrintError
     )
 
-    t_endpoint = "http://%s%s" % (t_endpointCRDP, CRDP_BULK_REVEAL)
-    t_headers = {APP_CONTENT_TYPE: APP_JSON}
+    t_endpoint = crdp_url(t_endpointCRDP, CRDP_BULK_REVEAL)
+    t_headers = bulk_headers()
     t_dataStr = {
         CRDP_PROTECTION_POLICY_NAME: t_protectionPolicy,
         CRDP_USERNAME_NAME: t_user,
         CRDP_PROTECTED_DATA_ARRAY_NAME: t_dataArray,
     }
+    t_timer = CallTimer()
+    t_body = BODY_CACHE.encode(
+        (CRDP_BULK_REVEAL, t_protectionPolicy, t_user), t_dataArray, t_dataStr, metrics, cache_body
+    )
+    t_timer.lap("serialize")
 
     try:
         r = session.post(
-            t_endpoint, data=_dumps(t_dataStr),
-            headers=t_headers, verify=False, timeout=NET_TIMEOUT
+            t_endpoint, data=t_body,
+            headers=t_headers, verify=tls_verify(), timeout=call_timeout(),
+            stream=bulk_stream(),
         )
     except requests.exceptions.RequestException as e:
         print("revealBulkData_session-exception:\n", e)
+        _record_failure(metrics, t_endpointCRDP, None)
         raise
 
+    t_timer.headers()
     if r.status_code != STATUS_CODE_OK:
         kPrintError("revealBulkData_session", r)
-        raise Exception(f"HTTP {r.status_code}")
-
-    t_revealedDataArray = _loads(r)[CRDP_DATA_ARRAY_NAME]
+        _record_failure(metrics, t_endpointCRDP, r.status_code)
+        raise CRDPHTTPError(r.status_code)
+
+    t_timer.download(r)
+    t_revealedDataArray = _loads_array(r, CRDP_DATA_ARRAY_NAME)
+    t_timer.parsed()
+    _record_wire(metrics, t_body, response_wire_bytes(r))
+    _record_breakdown(metrics, t_timer)
+    _record_stream(metrics, r)
+    _record_tls(metrics)
+    _record_endpoint(metrics, t_endpointCRDP, r.status_code)
 
     return t_revealedDataArray
 
 
+# -------------------- HTTP Transport --------------------
+# Workers get their session from new_session(). The CLI normally installs a
+# RunConnectionPool, so every worker session draws on connections the run opened
+# up front and keeps across phases. With -transport h2c/h2 it installs an
+# http2_transport.H2Pool instead and workers share its HTTP/2 connections.
+# Without either (-nopool, -processes) each worker gets a plain requests.Session
+# and opens its own connection per phase. With -tls the https pools use the
+# shared resuming TLS context.
+_http2_pool = None
+_run_pool = None
+# -adaptive: the ConcurrencyLimiter the closed-loop message workers' bulk calls go through.
+_limiter = None
+# -retries / -hedge: the CallPolicy every message worker's bulk calls go through.
+_call_policy = None
+# -dispatch: "shared" (workers pull from one MessageQueue) or "static" (fixed round-robin shares).
+_dispatch = "shared"
+# -metricsport / -metricslog: the LiveMetrics the workers' metrics are handed to.
+_live = None
+
+
+def set_http2_pool(pool):
+    global _http2_pool
+    _http2_pool = pool
+
+
+def set_run_pool(pool):
+    global _run_pool
+    _run_pool = pool
+
+
+def set_concurrency_limiter(limiter):
+    global _limiter
+    _limiter = limiter
+
+
+def set_call_policy(policy):
+    global _call_policy
+    _call_policy = policy
+
+
+def call_policy():
+    return _call_policy
+
+
+def set_dispatch(mode):
+    global _dispatch
+    _dispatch = mode
+
+
+def set_live_metrics(live):
+    global _live
+    _live = live
+
+
+def watch_worker(metrics, phase=None):
+    """Hand a worker's WorkerMetrics to the live metrics exporter, when one runs; returns metrics."""
+    if _live is not None:
+        _live.watch(metrics, phase)
+    return metrics
+
+
+def guarded_call(session, attempt, metrics, n):
+    """
+    (call_start, result) of one bulk call: attempt(session, metrics) under the
+    run's CallPolicy (retries / hedging, when set) and through the adaptive
+    concurrency limiter when one is installed. `n` is the call's item count
+    (wasted work). call_start is stamped once the limiter lets the call go, so
+    time spent waiting for a slot is not counted as call latency.
+    """
+    def fn():
+        if _call_policy is None:
+            return attempt(session, metrics)
+        return _call_policy.call(attempt, session, metrics, n)
+
+    metrics.in_flight += 1
+    try:
+        if _limiter is None:
+            return time.time(), fn()
+        started = []
+
+        def timed():
+            started.append(time.time())
+            return fn()
+
+        result = _limiter.call(timed, metrics)
+        return started[0], result
+    finally:
+        metrics.in_flight -= 1
+
+
+class PooledSession(requests.Session):
+    """Worker session over the run's shared adapter; closing it leaves the pooled connections open."""
+    def close(self):
+        pass
+
+
+class RunConnectionPool:
+    """
+    HTTP/1.1 keep-alive connections owned by the run rather than by each worker
+    and phase: one HTTPAdapter with a pool per endpoint, each holding `size`
+    connections (one per worker), opened by warm() before PROTECT starts and
+    reused by every phase.
+    Reuse is measured from urllib3's per-pool connection and request counters.
+    """
+    def __init__(self, size, endpoints=1):
+        self.size = max(1, size)
+        adapter_cls = TLSAdapter if tls_context() is not None else requests.adapters.HTTPAdapter
+        # pool_block: never open more than `size` connections per endpoint,
+        # even if a dropped keep-alive connection has to be replaced.
+        self.adapter = adapter_cls(pool_connections=endpoints, pool_maxsize=self.size, pool_block=True)
+        # Calls that found every connection taken, and the time they waited.
+        manager = self.adapter.poolmanager
+        manager.pool_classes_by_scheme = {scheme: type(cls.__name__, (_WaitTimedPool, cls), {"run_pool": self})
+                                          for scheme, cls in manager.pool_classes_by_scheme.items()}
+        self.warmed = 0
+        self.warm_seconds = 0.0
+        # -tls: (handshake_seconds, resumed) of the connections warm() opened.
+        self.tls_handshakes: list[tuple[float, bool]] = []
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._wait_lock = Lock()
+        self._taken = (0, 0)
+
+    def session(self):
+        session = PooledSession()
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        return session
+
+    def warm(self, endpointCRDP):
+        """Connect all `size` connections of the endpoint's pool now, outside any timed phase."""
+        # The same pool the bulk calls will be routed to (keyed by scheme, host
+        # and - requests >= 2.32.2 - TLS settings; older versions key by URL).
+        request = requests.Request("POST", crdp_url(endpointCRDP, CRDP_BULK_PROTECT)).prepare()
+        if hasattr(self.adapter, "get_connection_with_tls_context"):
+            pool = self.adapter.get_connection_with_tls_context(request, tls_verify())
+        else:
+            pool = self.adapter.get_connection(request.url)
+        start = time.time()
+        conns = [pool._get_conn() for _ in range(self.size)]
+        for conn in conns:
+            try:
+                conn.connect()
+                self.warmed += 1
+            except (OSError, urllib3.exceptions.HTTPError):
+                # Left unconnected; the first call on it connects (and reports) as usual.
+                pass
+        self.warm_seconds += time.time() - start
+        if tls_context() is not None:
+            settle_tls([conn.sock for conn in conns])
+        for conn in conns:
+            pool._put_conn(conn)
+        # Warm-up handshakes belong to no phase; the pool reports them (warm_tls()).
+        _record_tls(self)
+        self._taken = self._counts()
+        self.waits = 0
+        self.wait_seconds = self.max_wait_seconds = 0.0
+        return self.warmed
+
+    def warm_tls(self):
+        """-tls: the warm-up handshakes - count, resumed share, mean / max ms (None without any)."""
+        if not self.tls_handshakes:
+            return None
+        secs = [h[0] for h in self.tls_handshakes]
+        resumed = sum(1 for h in self.tls_handshakes if h[1])
+        return {
+            "handshakes": len(secs),
+            "resumed": resumed,
+            "resumed_pct": resumed / len(secs) * 100,
+            "handshake_ms_mean": sum(secs) / len(secs) * 1000,
+            "handshake_ms_max": max(secs) * 1000,
+        }
+
+    def _counts(self):
+        pools = self.adapter.poolmanager.pools
+        opened = sent = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return opened, sent
+
+    def take_stats(self):
+        """Connections opened and requests sent since the previous call (or warm())."""
+        opened, sent = self._counts()
+        new_connections = opened - self._taken[0]
+        requests_sent = sent - self._taken[1]
+        self._taken = (opened, sent)
+        with self._wait_lock:
+            waits, waited, longest = self.waits, self.wait_seconds, self.max_wait_seconds
+            self.waits = 0
+            self.wait_seconds = self.max_wait_seconds = 0.0
+        return {
+            "pool_size": self.size,
+            "prewarmed": self.warmed,
+            "warm_ms": self.warm_seconds * 1000,
+            "warm_tls": self.warm_tls(),
+            "requests": requests_sent,
+            "new_connections": new_connections,
+            "reuse_ratio": max(0.0, (requests_sent - new_connections) / requests_sent) if requests_sent else None,
+            "waits": waits,
+            "wait_ms": waited * 1000,
+            "max_wait_ms": longest * 1000,
+        }
+
+    def waited(self, seconds):
+        with self._wait_lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def close(self):
+        self.adapter.close()
+
+
+class _WaitTimedPool:
+    """Mixed into the run pool's urllib3 connection pools: reports the calls _get_conn blocks."""
+    run_pool = None
+
+    def _get_conn(self, timeout=None):
+        if self.pool is None or not self.pool.empty():
+            return super()._get_conn(timeout)
+        start = time.perf_counter()
+        try:
+            return super()._get_conn(timeout)
+        finally:
+            self.run_pool.waited(time.perf_counter() - start)
+
+
+def new_session(task_id):
+    if _http2_pool is not None:
+        return _http2_pool.session(task_id)
+    if _run_pool is not None:
+        return _run_pool.session()
+    session = requests.Session()
+    if tls_context() is not None:
+        session.mount("https://", TLSAdapter())
+    return session
+
+
+# -------------------- Retries, Deadlines and Hedged Calls --------------------
+# A bulk call that fails in a way worth retrying - a transport error or
+# timeout (-timeout), a 5xx or a 429, the same failures the endpoint balancer's
+# breakers count - is re-sent up to -retries times after a jittered exponential
+# backoff ("full jitter", so retrying workers do not stampede a recovering
+# pod). With -hedge, a call still unanswered after the phase's running p95
+# latency is sent a second time and the first reply wins (with several
+# endpoints the balancer routes it to the least busy one). Both attempts run on
+# a per-process pool of hedge threads so the worker can take whichever answers
+# first; the loser's work is counted as wasted. An HTTP/1.1 request cannot be
+# recalled once sent, so the loser runs to its end on its thread and pooled
+# connection; a call is only hedged while fewer than one loser or hedge per
+# worker is in flight, so the attempts never outnumber the 2 x workers hedge
+# threads and run pool connections and a worker's own call never queues
+# behind an earlier call's loser.
+
+RETRY_BACKOFF_BASE = 0.05
+RETRY_BACKOFF_CAP = 2.0
+HEDGE_MIN_SAMPLES = 20
+HEDGE_WINDOW = 1000
+
+
+def retry_backoff(retry):
+    """Seconds to wait before retry number `retry` (1-based): full jitter over an exponential cap."""
+    return random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** (retry - 1)))
+
+
+class CallPolicy:
+    """
+    Retry / hedge settings for the bulk calls of a run. `workers` sizes the
+    hedge thread pool (two attempts per worker at most: its call, and one
+    hedge or loser). Thread-safe; with -processes every child works on its own
+    copy.
+    """
+    def __init__(self, retries=0, hedge=False, workers=1):
+        self.retries = retries
+        self.hedge = hedge
+        self.workers = max(1, workers)
+        self._latencies = deque(maxlen=HEDGE_WINDOW)
+        self._p95 = None
+        self._lock = Lock()
+        self._executor = None
+        self._pid = None
+        self._local = threading.local()
+        self._sessions = []
+        # Hedges and losers in flight, at most `workers`.
+        self._spare = 0
+
+    def __getstate__(self):
+        # Locks, threads and sessions cannot be pickled (-processes shard arguments).
+        return {"retries": self.retries, "hedge": self.hedge, "workers": self.workers}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _observe(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+            if len(self._latencies) >= HEDGE_MIN_SAMPLES and len(self._latencies) % 10 == 0:
+                self._p95 = compute_percentiles(sorted(self._latencies))["p95"]
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging: the running p95 (None until enough calls are seen)."""
+        return self._p95
+
+    def new_phase(self):
+        """Forget the latency history (the next phase's calls take a different time)."""
+        with self._lock:
+            self._latencies.clear()
+            self._p95 = None
+
+    def _pool(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=2 * self.workers, thread_name_prefix="hedge")
+                self._sessions = []
+                self._spare = 0
+                self._pid = os.getpid()
+            return self._executor
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            with self._lock:
+                session = self._local.session = new_session(len(self._sessions))
+                self._sessions.append(session)
+        return session
+
+    def resize(self, workers):
+        """Size the hedge pool for `workers` workers; the next call opens a new one."""
+        self.close()
+        self.workers = max(1, workers)
+
+    def _take_spare(self):
+        with self._lock:
+            if self._spare >= self.workers:
+                return False
+            self._spare += 1
+            return True
+
+    def _release_spare(self, future=None):
+        with self._lock:
+            self._spare -= 1
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                self._executor.shutdown(wait=False)
+                for session in self._sessions:
+                    session.close()
+            self._executor = None
+            self._pid = None
+
+    def call(self, attempt, session, metrics, n):
+        """attempt(session, metrics) with retries (and hedging); raises the last failure."""
+        retry = 0
+        while True:
+            try:
+                if self.hedge:
+                    return self._hedged(attempt, metrics, n)
+                return attempt(session, metrics)
+            except Exception as e:
+                if retry >= self.retries or not is_endpoint_failure(e):
+                    raise
+                retry += 1
+                metrics.retries += 1
+                metrics.wasted_calls += 1
+                metrics.wasted_items += n
+                time.sleep(retry_backoff(retry))
+
+    def _hedged(self, attempt, metrics, n):
+        # Every attempt records into its own WorkerMetrics; the winner's (and any
+        # failed attempt's) entries are added to the worker's afterwards, so a
+        # late loser never adds a second entry for the same call.
+        pool = self._pool()
+        start = time.perf_counter()
+
+        def run(m):
+            return attempt(self._session(), m)
+
+        m = WorkerMetrics(metrics.worker_id)
+        primary = pool.submit(run, m)
+        attempts = {primary: m}
+        # Without a p95 yet (start of the phase) there is no hedge.
+        done, pending = wait({primary}, timeout=self.hedge_delay())
+        if not done:
+            if self._take_spare():
+                m = WorkerMetrics(metrics.worker_id)
+                hedge = pool.submit(run, m)
+                attempts[hedge] = m
+                pending.add(hedge)
+                metrics.hedges += 1
+            else:
+                metrics.hedges_skipped += 1
+        error = None
+        try:
+            while True:
+                for future in done:
+                    metrics.absorb(attempts[future])
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    if len(attempts) > 1:
+                        metrics.hedge_wins += future is not primary
+                        metrics.wasted_calls += len(attempts) - 1
+                        metrics.wasted_items += n * (len(attempts) - 1)
+                    self._observe(time.perf_counter() - start)
+                    return future.result()
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            metrics.wasted_calls += len(attempts) - 1
+            metrics.wasted_items += n * (len(attempts) - 1)
+            raise error
+        finally:
+            # The attempt still running (the loser) holds the hedge's spare slot until it ends.
+            if len(attempts) > 1:
+                if pending:
+                    pending.pop().add_done_callback(self._release_spare)
+                else:
+                    self._release_spare()
+
+
+# -------------------- Progress Reporting --------------------
+# Each worker counts the items it has done in a ProgressCounter of its own (one
+# writer, so no lock) and a single ProgressReporter thread per phase moves their
+# sum onto the tqdm bar a few times a second. Updating one shared bar under a
+# lock after every call serialized the workers at small batch sizes.
+PROGRESS_INTERVAL = 0.25
+# -quiet: no progress bars (colored output is switched off by the CLI).
+_quiet = False
+
+
+def set_quiet(quiet):
+    global _quiet
+    _quiet = quiet
+
+
+def quiet_mode():
+    return _quiet
+
+
+class ProgressCounter:
+    """Items one worker has completed; written by that worker only."""
+    __slots__ = ("n",)
+
+    def __init__(self):
+        self.n = 0
+
+    def update(self, n):
+        self.n += n
+
+
+class ProgressReporter:
+    """
+    Progress of a phase's workers. counter() hands each worker its own
+    ProgressCounter; a background thread adds their growth to a tqdm bar
+    (`total`, `desc`) - or passes it to `forward(n)` instead, e.g. a -processes
+    child relaying to the parent's bar - every `interval` seconds and once more
+    on stop(). Under -quiet there is no bar (a `forward` still gets the counts).
+    Use as a context manager, or start() / stop().
+    """
+    def __init__(self, total=None, desc=None, forward=None, interval=PROGRESS_INTERVAL):
+        self.total = total
+        self.desc = desc
+        self.forward = forward
+        self.interval = interval
+        self.reported = 0
+        self._counters: list[ProgressCounter] = []
+        self._bar = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def counter(self):
+        c = ProgressCounter()
+        self._counters.append(c)
+        return c
+
+    def start(self):
+        if self.forward is None and not _quiet:
+            self._bar = tqdm(total=self.total, desc=self.desc)
+        if self._bar is not None or self.forward is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._flush()
+
+    def _flush(self):
+        done = sum(c.n for c in list(self._counters))
+        if done > self.reported:
+            delta, self.reported = done - self.reported, done
+            if self.forward is not None:
+                self.forward(delta)
+            else:
+                self._bar.update(delta)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._flush()
+        if self._bar is not None:
+            self._bar.close()
+
+    __enter__ = start
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
 # -------------------- Worker Functions --------------------
 
-def worker_protect_discrete(task_id, start_idx, count, endpointCRDP, p_data_array, protectionPolicy, collect_results, pbar, lock):
+def worker_protect_discrete(task_id, start_idx, count, endpointCRDP, p_data_array, protectionPolicy, collect_results, progress):
     """
     Worker function for discrete PROTECT operations.
     Each worker makes individual protectData calls for its assigned slice of
     p_data_array. When collect_results is True (CSV list mode) every protected
     value is returned in order; otherwise only the last value is returned.
     """
-    session = requests.Session()
+    session = new_session(task_id)
     metrics = WorkerMetrics(task_id)
     metrics.start_time = time.time()
 
@@ -479,8 +1850,7 @@ def worker_protect_discrete(task_id, start_idx, count, endpointCRDP, p_data_arra
                 c_data_list.append(c_data)
 
             # Thread-safe progress update
-            with lock:
-                pbar.update(1)
+            progress.update(1)
 
         metrics.items_processed = count
     except Exception as e:
@@ -493,12 +1863,12 @@ def worker_protect_discrete(task_id, start_idx, count, endpointCRDP, p_data_arra
     return metrics, (c_data_list if collect_results else c_data), c_version
 
 
-def worker_protect_bulk(task_id, data_chunk, endpointCRDP, protectionPolicy, pbar, lock):
+def worker_protect_bulk(task_id, data_chunk, endpointCRDP, protectionPolicy, progress):
     """
     Worker function for bulk PROTECT operations.
     Each worker makes ONE protectBulkData call with its data chunk.
     """
-    session = requests.Session()
+    session = new_session(task_id)
     metrics = WorkerMetrics(task_id)
     metrics.start_time = time.time()
 
@@ -506,12 +1876,11 @@ def worker_protect_bulk(task_id, data_chunk, endpointCRDP, protectionPolicy, pba
     c_version = None
 
     try:
-        c_data_array, c_version = protectBulkData_session(session, endpointCRDP, data_chunk, protectionPolicy)
+        c_data_array, c_version = protectBulkData_session(session, endpointCRDP, data_chunk, protectionPolicy, metrics)
         metrics.items_processed = len(data_chunk)
 
         # Update progress bar once (bulk completes in one shot)
-        with lock:
-            pbar.update(len(data_chunk))
+        progress.update(len(data_chunk))
     except Exception as e:
         metrics.errors.append(str(e))
         print(colored(f"\nWorker {task_id} error: {e}", "red"))
@@ -522,11 +1891,11 @@ def worker_protect_bulk(task_id, data_chunk, endpointCRDP, protectionPolicy, pba
     return metrics, c_data_array, c_version
 
 
-def worker_reveal_discrete(task_id, start_idx, count, endpointCRDP, c_data, protectionPolicy, c_version, r_user, pbar, lock):
+def worker_reveal_discrete(task_id, start_idx, count, endpointCRDP, c_data, protectionPolicy, c_version, r_user, progress):
     """
     Worker function for discrete REVEAL operations.
     """
-    session = requests.Session()
+    session = new_session(task_id)
     metrics = WorkerMetrics(task_id)
     metrics.start_time = time.time()
 
@@ -537,8 +1906,7 @@ def worker_reveal_discrete(task_id, start_idx, count, endpointCRDP, c_data, prot
             r_data = revealData_session(session, endpointCRDP, c_data, protectionPolicy, c_version, r_user)
 
             # Thread-safe progress update
-            with lock:
-                pbar.update(1)
+            progress.update(1)
 
         metrics.items_processed = count
     except Exception as e:
@@ -551,23 +1919,22 @@ def worker_reveal_discrete(task_id, start_idx, count, endpointCRDP, c_data, prot
     return metrics, r_data
 
 
-def worker_reveal_bulk(task_id, data_chunk, endpointCRDP, protectionPolicy, c_version, r_user, pbar, lock):
+def worker_reveal_bulk(task_id, data_chunk, endpointCRDP, protectionPolicy, c_version, r_user, progress):
     """
     Worker function for bulk REVEAL operations.
     """
-    session = requests.Session()
+    session = new_session(task_id)
     metrics = WorkerMetrics(task_id)
     metrics.start_time = time.time()
 
     r_data_array = None
 
     try:
-        r_data_array = revealBulkData_session(session, endpointCRDP, data_chunk, protectionPolicy, c_version, r_user)
+        r_data_array = revealBulkData_session(session, endpointCRDP, data_chunk, protectionPolicy, c_version, r_user, metrics)
         metrics.items_processed = len(data_chunk)
 
         # Update progress bar once
-        with lock:
-            pbar.update(len(data_chunk))
+        progress.update(len(data_chunk))
     except Exception as e:
         metrics.errors.append(str(e))
         print(colored(f"\nWorker {task_id} error: {e}", "red"))
@@ -600,8 +1967,6 @@ def execute_protect_parallel(workload, bulkFlag, endpointCRDP, p_data, p_data_ar
     num_threads = len(workload)
     total_items = sum(count for _, count in workload)
 
-    # Create shared progress bar and lock
-    progress_lock = Lock()
     desc = "Parallel PROTECT Progress"
 
     # Aggregated metrics
@@ -611,7 +1976,7 @@ def execute_protect_parallel(workload, bulkFlag, endpointCRDP, p_data, p_data_ar
     results = []
     c_version = None
 
-    with tqdm(total=total_items, desc=desc) as pbar:
+    with ProgressReporter(total_items, desc) as progress:
         with ThreadPoolExecutor(max_workers=num_threads) as executor:
             futures = {}
 
@@ -622,7 +1987,7 @@ def execute_protect_parallel(workload, bulkFlag, endpointCRDP, p_data, p_data_ar
                     data_chunk = p_data_array[start_idx:start_idx + count]
                     future = executor.submit(
                         worker_protect_bulk,
-                        task_id, data_chunk, endpointCRDP, protectionPolicy, pbar, progress_lock
+                        task_id, data_chunk, endpointCRDP, protectionPolicy, progress.counter()
                     )
                     futures[future] = task_id
             else:
@@ -630,7 +1995,7 @@ def execute_protect_parallel(workload, bulkFlag, endpointCRDP, p_data, p_data_ar
                 for task_id, (start_idx, count) in enumerate(workload):
                     future = executor.submit(
                         worker_protect_discrete,
-                        task_id, start_idx, count, endpointCRDP, p_data_array, protectionPolicy, collect_results, pbar, progress_lock
+                        task_id, start_idx, count, endpointCRDP, p_data_array, protectionPolicy, collect_results, progress.counter()
                     )
                     futures[future] = task_id
 
@@ -671,8 +2036,6 @@ def execute_reveal_parallel(workload, bulkFlag, endpointCRDP, c_data, c_data_arr
     num_threads = len(workload)
     total_items = sum(count for _, count in workload)
 
-    # Create shared progress bar and lock
-    progress_lock = Lock()
     desc = "Parallel REVEAL Progress"
 
     # Aggregated metrics
@@ -681,7 +2044,7 @@ def execute_reveal_parallel(workload, bulkFlag, endpointCRDP, c_data, c_data_arr
 
     results = []
 
-    with tqdm(total=total_items, desc=desc) as pbar:
+    with ProgressReporter(total_items, desc) as progress:
         with ThreadPoolExecutor(max_workers=num_threads) as executor:
             futures = {}
 
@@ -692,7 +2055,7 @@ def execute_reveal_parallel(workload, bulkFlag, endpointCRDP, c_data, c_data_arr
                     data_chunk = c_data_array[start_idx:start_idx + count]
                     future = executor.submit(
                         worker_reveal_bulk,
-                        task_id, data_chunk, endpointCRDP, protectionPolicy, c_version, r_user, pbar, progress_lock
+                        task_id, data_chunk, endpointCRDP, protectionPolicy, c_version, r_user, progress.counter()
                     )
                     futures[future] = task_id
             else:
@@ -700,7 +2063,7 @@ def execute_reveal_parallel(workload, bulkFlag, endpointCRDP, c_data, c_data_arr
                 for task_id, (start_idx, count) in enumerate(workload):
                     future = executor.submit(
                         worker_reveal_discrete,
-                        task_id, start_idx, count, endpointCRDP, c_data, protectionPolicy, c_version, r_user, pbar, progress_lock
+                        task_id, start_idx, count, endpointCRDP, c_data, protectionPolicy, c_version, r_user, progress.counter()
                     )
                     futures[future] = task_id
 
@@ -723,39 +2086,125 @@ def execute_reveal_parallel(workload, bulkFlag, endpointCRDP, c_data, c_data_arr
     return agg_metrics, results
 
 
-def worker_protect_messages(task_id, indexed_messages, endpointCRDP, protectionPolicy, pbar, lock):
+def skip_failed_call(metrics, task_id, msg_idx, e):
     """
-    Worker that processes a list of bulk PROTECT messages.
+    A bulk call failed for good (after any retries). True when the worker should
+    count it and carry on with its next message - an endpoint failure (transport
+    error, timeout, 5xx, 429) - and False for a request error (4xx) that every
+    later call would repeat, which still stops the worker.
+    """
+    if not is_endpoint_failure(e):
+        return False
+    metrics.failed_calls += 1
+    metrics.errors.append(str(e))
+    if metrics.failed_calls == 1:
+        print(colored(f"\nWorker {task_id} skipped message {msg_idx}: {e} (further failed calls are only counted)", "red"))
+    return True
 
-    indexed_messages: list of (msg_idx, payload_list) tuples, where each payload_list
-    is itself a list of plaintexts sent in a single bulk REST call. msg_idx is the
-    original message order index so the caller can reassemble results in order.
 
-    Returns metrics, list of (msg_idx, protected_chunk), c_version.
+class MessageQueue:
     """
-    session = requests.Session()
-    metrics = WorkerMetrics(task_id)
-    metrics.start_time = time.time()
-
-    results = []
+    Messages shared by a group of workers, handed out in msg_idx order to
+    whichever worker asks next. A worker stuck on a slow connection or pod just
+    takes fewer messages while the others keep pulling, instead of owning a
+    fixed share that everyone else ends up waiting on. In timed runs the list
+    is replayed (lap 1, 2, ...) until the deadline. Thread-safe; the lock is
+    held only to advance the position.
+    """
+    def __init__(self, indexed_messages):
+        self.indexed_messages = indexed_messages
+        self._next = 0
+        self._lock = Lock()
+
+    def take(self, deadline=None):
+        """The next (lap, msg_idx, payloads), or None once the pass (or the deadline) is over."""
+        with self._lock:
+            total = len(self.indexed_messages)
+            if not total or (deadline is None and self._next >= total):
+                return None
+            if deadline is not None and time.time() >= deadline:
+                return None
+            lap, i = divmod(self._next, total)
+            self._next += 1
+        msg_idx, payloads = self.indexed_messages[i]
+        return lap, msg_idx, payloads
+
+
+def dispatch_messages(indexed_messages, num_workers):
+    """
+    What each of up to `num_workers` workers draws its messages from: the same
+    MessageQueue for all of them (-dispatch shared, the default), or a fixed
+    round-robin list each (-dispatch static).
+    """
+    if _dispatch == "static":
+        return _shard_round_robin(indexed_messages, num_workers)
+    queue = MessageQueue(indexed_messages)
+    return [queue] * min(num_workers, len(indexed_messages))
+
+
+def iter_messages(indexed_messages, deadline=None):
+    """
+    Yield (lap, msg_idx, payloads) for a worker's messages: a MessageQueue
+    shared with other workers, or the worker's own list. Without a deadline
+    this is a single pass (lap 0). With one (timed -duration runs) the messages
+    are replayed until the deadline passes; no new call starts after it.
+    Callers keep results from lap 0 only, so memory does not grow with run time.
+    """
+    if isinstance(indexed_messages, MessageQueue):
+        while True:
+            item = indexed_messages.take(deadline)
+            if item is None:
+                return
+            yield item
+    lap = 0
+    while True:
+        for msg_idx, payloads in indexed_messages:
+            if deadline is not None and time.time() >= deadline:
+                return
+            yield lap, msg_idx, payloads
+        if deadline is None or not indexed_messages:
+            return
+        lap += 1
+
+
+def worker_protect_messages(task_id, indexed_messages, endpointCRDP, protectionPolicy, sink, progress, deadline=None):
+    """
+    Worker that processes a list of bulk PROTECT messages.
+
+    indexed_messages: (msg_idx, payload_list) pairs (a list, IndexedMessages or a
+    shared MessageQueue), where each payload_list is itself a list of plaintexts
+    sent in a single bulk REST call. msg_idx is the original message order index
+    so the sink can reassemble results in order. With a deadline the messages
+    are replayed until it passes (see iter_messages).
+
+    Each call's protected chunk goes to `sink` (a ResultSink).
+    Returns metrics, c_version.
+    """
+    session = new_session(task_id)
+    metrics = watch_worker(WorkerMetrics(task_id))
+    metrics.start_time = time.time()
+
     c_version = None
     total_items = 0
 
     try:
-        for msg_idx, payloads in indexed_messages:
-            call_start = time.time()
-            c_data_array, version = protectBulkData_session(
-                session, endpointCRDP, payloads, protectionPolicy
-            )
+        for lap, msg_idx, payloads in iter_messages(indexed_messages, deadline):
+            n = len(payloads)
+            try:
+                call_start, (c_data_array, version) = guarded_call(session, lambda s, m: protectBulkData_session(
+                    s, endpointCRDP, payloads, protectionPolicy, m
+                ), metrics, n)
+            except Exception as e:
+                if not skip_failed_call(metrics, task_id, msg_idx, e):
+                    raise
+                continue
             call_end = time.time()
-            results.append((msg_idx, c_data_array))
+            sink.add(lap, msg_idx, c_data_array)
             if c_version is None:
                 c_version = version
-            n = len(payloads)
-            metrics.call_records.append((call_start, call_end, n))
+            metrics.record_call(call_start, call_end, n)
             total_items += n
-            with lock:
-                pbar.update(n)
+            progress.update(n)
         metrics.items_processed = total_items
     except Exception as e:
         metrics.errors.append(str(e))
@@ -764,36 +2213,38 @@ def worker_protect_messages(task_id, indexed_messages, endpointCRDP, protectionP
         metrics.end_time = time.time()
         session.close()
 
-    return metrics, results, c_version
+    return metrics, c_version
 
 
-def worker_reveal_messages(task_id, indexed_messages, endpointCRDP, protectionPolicy, c_version, r_user, pbar, lock):
+def worker_reveal_messages(task_id, indexed_messages, endpointCRDP, protectionPolicy, c_version, r_user, sink, progress, deadline=None):
     """
     Worker that processes a list of bulk REVEAL messages.
 
-    indexed_messages: list of (msg_idx, ciphertext_list) tuples.
-    Returns metrics, list of (msg_idx, revealed_chunk).
+    indexed_messages: (msg_idx, ciphertext_list) pairs, as for worker_protect_messages.
+    Each call's revealed chunk goes to `sink`. Returns metrics.
     """
-    session = requests.Session()
-    metrics = WorkerMetrics(task_id)
+    session = new_session(task_id)
+    metrics = watch_worker(WorkerMetrics(task_id))
     metrics.start_time = time.time()
 
-    results = []
     total_items = 0
 
     try:
-        for msg_idx, payloads in indexed_messages:
-            call_start = time.time()
-            r_data_array = revealBulkData_session(
-                session, endpointCRDP, payloads, protectionPolicy, c_version, r_user
-            )
-            call_end = time.time()
-            results.append((msg_idx, r_data_array))
+        for lap, msg_idx, payloads in iter_messages(indexed_messages, deadline):
             n = len(payloads)
-            metrics.call_records.append((call_start, call_end, n))
+            try:
+                call_start, r_data_array = guarded_call(session, lambda s, m: revealBulkData_session(
+                    s, endpointCRDP, payloads, protectionPolicy, c_version, r_user, m
+                ), metrics, n)
+            except Exception as e:
+                if not skip_failed_call(metrics, task_id, msg_idx, e):
+                    raise
+                continue
+            call_end = time.time()
+            sink.add(lap, msg_idx, r_data_array)
+            metrics.record_call(call_start, call_end, n)
             total_items += n
-            with lock:
-                pbar.update(n)
+            progress.update(n)
         metrics.items_processed = total_items
     except Exception as e:
         metrics.errors.append(str(e))
@@ -802,36 +2253,38 @@ def worker_reveal_messages(task_id, indexed_messages, endpointCRDP, protectionPo
         metrics.end_time = time.time()
         session.close()
 
-    return metrics, results
+    return metrics
 
 
-def execute_protect_messages_parallel(messages, num_threads, endpointCRDP, protectionPolicy):
+def execute_protect_messages_parallel(messages, num_threads, endpointCRDP, protectionPolicy, run_seconds=None, sink=None):
     """
-    Execute parallel bulk PROTECT by distributing messages (round-robin) across workers.
+    Execute parallel bulk PROTECT, the workers pulling messages from a shared
+    queue (or round-robin shares with -dispatch static; see dispatch_messages).
 
     Args:
-        messages: list of bulk-call payloads (each item is itself a list of plaintexts)
+        messages: bulk-call payloads, a MessageSource or a list (each item is itself a list of plaintexts)
         num_threads: number of worker threads
         endpointCRDP: CRDP endpoint
         protectionPolicy: protection policy name
+        run_seconds: timed run - workers replay their messages until this many
+            seconds have elapsed (None = one pass over the messages)
+        sink: ResultSink the results go to (default: keep them all)
 
     Returns:
-        AggregatedMetrics, flat c_data_array (in original payload order), c_version
+        AggregatedMetrics, flat c_data_array (the sink's kept results, in payload order), c_version
     """
-    # Round-robin assignment of indexed messages to workers.
-    worker_messages = [[] for _ in range(num_threads)]
-    for i, msg in enumerate(messages):
-        worker_messages[i % num_threads].append((i, msg))
+    worker_messages = dispatch_messages(IndexedMessages(messages), num_threads)
 
-    total_items = sum(len(m) for m in messages)
-    progress_lock = Lock()
+    # Timed runs have no fixed item count, so the bar just counts up.
+    total_items = payload_count(messages) if run_seconds is None else None
     agg_metrics = AggregatedMetrics()
     agg_metrics.overall_start = time.time()
+    deadline = agg_metrics.overall_start + run_seconds if run_seconds is not None else None
 
-    all_chunks = []
+    sink = sink if sink is not None else ResultSink()
     c_version = None
 
-    with tqdm(total=total_items, desc="Parallel PROTECT Progress") as pbar:
+    with ProgressReporter(total_items, "Parallel PROTECT Progress") as progress:
         with ThreadPoolExecutor(max_workers=num_threads) as executor:
             futures = {}
             for task_id, msg_list in enumerate(worker_messages):
@@ -839,15 +2292,14 @@ def execute_protect_messages_parallel(messages, num_threads, endpointCRDP, prote
                     continue
                 future = executor.submit(
                     worker_protect_messages,
-                    task_id, msg_list, endpointCRDP, protectionPolicy, pbar, progress_lock,
+                    task_id, msg_list, endpointCRDP, protectionPolicy, sink, progress.counter(), deadline,
                 )
                 futures[future] = task_id
 
             for future in as_completed(futures):
                 task_id = futures[future]
                 try:
-                    metrics, chunks, version = future.result()
-                    all_chunks.extend(chunks)
+                    metrics, version = future.result()
                     agg_metrics.add_worker_metrics(metrics)
                     if c_version is None and version is not None:
                         c_version = version
@@ -856,41 +2308,37 @@ def execute_protect_messages_parallel(messages, num_threads, endpointCRDP, prote
 
     agg_metrics.overall_end = time.time()
 
-    all_chunks.sort(key=lambda x: x[0])
-    c_data_array = []
-    for _, chunk in all_chunks:
-        c_data_array.extend(chunk)
-
-    return agg_metrics, c_data_array, c_version
+    return agg_metrics, sink.items(), c_version
 
 
-def execute_reveal_messages_parallel(messages, num_threads, endpointCRDP, protectionPolicy, c_version, r_user):
+def execute_reveal_messages_parallel(messages, num_threads, endpointCRDP, protectionPolicy, c_version, r_user, run_seconds=None, sink=None):
     """
-    Execute parallel bulk REVEAL by distributing messages (round-robin) across workers.
+    Execute parallel bulk REVEAL; messages are dispatched as in
+    execute_protect_messages_parallel.
 
     Args:
-        messages: list of bulk-call payloads (each item is itself a list of ciphertext dicts)
+        messages: bulk-call payloads, a MessageSource or a list (each item is itself a list of ciphertext dicts)
         num_threads: number of worker threads
         endpointCRDP: CRDP endpoint
         protectionPolicy: protection policy name
         c_version: external version (carried for API signature; per-item version is embedded)
         r_user: username for reveal
+        run_seconds: timed run length in seconds (None = one pass over the messages)
+        sink: ResultSink the results go to (default: keep them all)
 
     Returns:
-        AggregatedMetrics, flat r_data_array (in original payload order)
+        AggregatedMetrics, flat r_data_array (the sink's kept results, in payload order)
     """
-    worker_messages = [[] for _ in range(num_threads)]
-    for i, msg in enumerate(messages):
-        worker_messages[i % num_threads].append((i, msg))
+    worker_messages = dispatch_messages(IndexedMessages(messages), num_threads)
 
-    total_items = sum(len(m) for m in messages)
-    progress_lock = Lock()
+    total_items = payload_count(messages) if run_seconds is None else None
     agg_metrics = AggregatedMetrics()
     agg_metrics.overall_start = time.time()
+    deadline = agg_metrics.overall_start + run_seconds if run_seconds is not None else None
 
-    all_chunks = []
+    sink = sink if sink is not None else ResultSink()
 
-    with tqdm(total=total_items, desc="Parallel REVEAL Progress") as pbar:
+    with ProgressReporter(total_items, "Parallel REVEAL Progress") as progress:
         with ThreadPoolExecutor(max_workers=num_threads) as executor:
             futures = {}
             for task_id, msg_list in enumerate(worker_messages):
@@ -898,27 +2346,643 @@ def execute_reveal_messages_parallel(messages, num_threads, endpointCRDP, protec
                     continue
                 future = executor.submit(
                     worker_reveal_messages,
-                    task_id, msg_list, endpointCRDP, protectionPolicy, c_version, r_user, pbar, progress_lock,
+                    task_id, msg_list, endpointCRDP, protectionPolicy, c_version, r_user, sink, progress.counter(), deadline,
+                )
+                futures[future] = task_id
+
+            for future in as_completed(futures):
+                task_id = futures[future]
+                try:
+                    metrics = future.result()
+                    agg_metrics.add_worker_metrics(metrics)
+                except Exception as e:
+                    print(colored(f"\nWorker {task_id} failed: {e}", "red"))
+
+    agg_metrics.overall_end = time.time()
+
+    return agg_metrics, sink.items()
+
+
+# -------------------- Pipelined Round Trip --------------------
+# The default flow runs PROTECT to completion and only then starts REVEAL over
+# copies of the kept ciphertexts. In round-trip mode each worker reveals a
+# batch the moment it comes back protected, so the two operations overlap the
+# way production traffic does and every batch is revealed from its own
+# ciphertexts (only in-flight batches, plus the sinks' leading ones, are held).
+
+def worker_roundtrip_messages(task_id, indexed_messages, endpointCRDP, protectionPolicy, r_user, c_sink, r_sink, progress, deadline=None):
+    """
+    Worker that protects each message and immediately reveals the result.
+
+    Records three call records per message: the PROTECT call, the REVEAL call,
+    and the end-to-end round trip (protect start -> reveal end). Protected
+    chunks go to `c_sink` and revealed chunks to `r_sink`.
+
+    Returns protect metrics, reveal metrics, round-trip metrics, c_version.
+    """
+    session = new_session(task_id)
+    protect_metrics = watch_worker(WorkerMetrics(task_id), "protect")
+    reveal_metrics = watch_worker(WorkerMetrics(task_id), "reveal")
+    roundtrip_metrics = WorkerMetrics(task_id)
+    worker_start = time.time()
+
+    c_version = None
+    total_items = 0
+    protected_items = 0
+
+    try:
+        for lap, msg_idx, payloads in iter_messages(indexed_messages, deadline):
+            n = len(payloads)
+            try:
+                protect_start, (c_data_array, version) = guarded_call(session, lambda s, m: protectBulkData_session(
+                    s, endpointCRDP, payloads, protectionPolicy, m
+                ), protect_metrics, n)
+            except Exception as e:
+                if not skip_failed_call(protect_metrics, task_id, msg_idx, e):
+                    raise
+                continue
+            protect_end = time.time()
+            protect_metrics.record_call(protect_start, protect_end, n)
+            protected_items += n
+            c_sink.add(lap, msg_idx, c_data_array)
+            if c_version is None:
+                c_version = version
+            try:
+                reveal_start, r_data_array = guarded_call(session, lambda s, m: revealBulkData_session(
+                    s, endpointCRDP, c_data_array, protectionPolicy, version, r_user,
+                    m, cache_body=False,
+                ), reveal_metrics, n)
+            except Exception as e:
+                if not skip_failed_call(reveal_metrics, task_id, msg_idx, e):
+                    raise
+                continue
+            reveal_end = time.time()
+
+            reveal_metrics.record_call(reveal_start, reveal_end, n)
+            roundtrip_metrics.record_call(protect_start, reveal_end, n)
+            r_sink.add(lap, msg_idx, r_data_array)
+            total_items += n
+            progress.update(n)
+        protect_metrics.items_processed = protected_items
+        for m in (reveal_metrics, roundtrip_metrics):
+            m.items_processed = total_items
+    except Exception as e:
+        roundtrip_metrics.errors.append(str(e))
+        print(colored(f"\nWorker {task_id} error: {e}", "red"))
+    finally:
+        worker_end = time.time()
+        for m in (protect_metrics, reveal_metrics, roundtrip_metrics):
+            m.start_time = worker_start
+            m.end_time = worker_end
+        session.close()
+
+    return protect_metrics, reveal_metrics, roundtrip_metrics, c_version
+
+
+def execute_roundtrip_messages_parallel(messages, num_threads, endpointCRDP, protectionPolicy, r_user, c_sink, r_sink, run_seconds=None):
+    """
+    Execute pipelined PROTECT -> REVEAL round trips; messages are dispatched as
+    in execute_protect_messages_parallel.
+
+    Args:
+        messages: bulk-call payloads, a MessageSource or a list (each item is itself a list of plaintexts)
+        num_threads: number of worker threads
+        endpointCRDP: CRDP endpoint
+        protectionPolicy: protection policy name
+        r_user: username for reveal
+        c_sink, r_sink: ResultSinks receiving the protected / revealed chunks
+            (typically keeping only the leading messages, e.g. the first CSV
+            pass, so everything else is discarded as soon as it has been revealed)
+        run_seconds: timed run length in seconds (None = one pass over the messages)
+
+    Returns:
+        protect AggregatedMetrics, reveal AggregatedMetrics, round-trip
+        AggregatedMetrics, kept c_data_array, kept r_data_array, c_version
+    """
+    worker_messages = dispatch_messages(IndexedMessages(messages), num_threads)
+
+    total_items = payload_count(messages) if run_seconds is None else None
+    protect_agg = AggregatedMetrics()
+    reveal_agg = AggregatedMetrics()
+    roundtrip_agg = AggregatedMetrics()
+    overall_start = time.time()
+    deadline = overall_start + run_seconds if run_seconds is not None else None
+
+    c_version = None
+
+    with ProgressReporter(total_items, "Round-trip Progress") as progress:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            futures = {}
+            for task_id, msg_list in enumerate(worker_messages):
+                if not msg_list:
+                    continue
+                future = executor.submit(
+                    worker_roundtrip_messages,
+                    task_id, msg_list, endpointCRDP, protectionPolicy, r_user, c_sink, r_sink, progress.counter(), deadline,
                 )
                 futures[future] = task_id
 
             for future in as_completed(futures):
                 task_id = futures[future]
                 try:
-                    metrics, chunks = future.result()
-                    all_chunks.extend(chunks)
+                    p_metrics, r_metrics, rt_metrics, version = future.result()
+                    protect_agg.add_worker_metrics(p_metrics)
+                    reveal_agg.add_worker_metrics(r_metrics)
+                    roundtrip_agg.add_worker_metrics(rt_metrics)
+                    if c_version is None and version is not None:
+                        c_version = version
+                except Exception as e:
+                    print(colored(f"\nWorker {task_id} failed: {e}", "red"))
+
+    overall_end = time.time()
+    # The stages overlap, so all three share the same wall-clock window.
+    for agg in (protect_agg, reveal_agg, roundtrip_agg):
+        agg.overall_start = overall_start
+        agg.overall_end = overall_end
+
+    return protect_agg, reveal_agg, roundtrip_agg, c_sink.items(), r_sink.items(), c_version
+
+
+# -------------------- Open-Loop (Constant Arrival Rate) --------------------
+# The message workers above are closed-loop: each fires its next call only when
+# the previous one returns, so when CRDP slows down the offered load silently
+# drops and the measured latency understates what real callers would see
+# ("coordinated omission"). In open-loop mode calls are released on a fixed
+# timetable derived from the target rate, independent of completions; a worker
+# that picks up a call after its slot has passed sends it late, and that
+# lateness is recorded so latency can be measured from the intended send time.
+
+class ArrivalSchedule:
+    """
+    Shared timetable for an open-loop phase. Message i is due at
+    start + (payloads in messages[0:i]) / rate, so the offered load is `rate`
+    txns/sec whatever the batch size. Workers pull messages in order via next().
+    With `run_seconds` the message list is replayed until the first slot that
+    falls past the end of the run.
+    """
+    def __init__(self, messages, rate, run_seconds=None):
+        self.messages = messages
+        self.rate = rate
+        self.run_seconds = run_seconds
+        self.start_time: float | None = None
+        self._next_idx = 0
+        self._items_before = 0
+        self._lock = Lock()
+
+    def start(self, start_time):
+        self.start_time = start_time
+        return self
+
+    def next(self):
+        """
+        Return (lap, msg_idx, payloads, due_time), or None once the schedule is
+        exhausted (every message handed out, or the run's end reached).
+        """
+        with self._lock:
+            if self.start_time is None or not self.messages:
+                return None
+            lap, msg_idx = divmod(self._next_idx, len(self.messages))
+            if self.run_seconds is None and lap > 0:
+                return None
+            offset = self._items_before / self.rate
+            if self.run_seconds is not None and offset >= self.run_seconds:
+                return None
+            payloads = self.messages[msg_idx]
+            due = self.start_time + offset
+            self._next_idx += 1
+            self._items_before += len(payloads)
+        return lap, msg_idx, payloads, due
+
+
+def worker_protect_open_loop(task_id, schedule, endpointCRDP, protectionPolicy, sink, progress):
+    """
+    Open-loop PROTECT worker: takes the next scheduled message, waits for its
+    slot if early, sends it, and records how late the send was. Results go to
+    `sink`. Returns metrics, c_version.
+    """
+    session = new_session(task_id)
+    metrics = watch_worker(WorkerMetrics(task_id))
+    metrics.start_time = time.time()
+
+    c_version = None
+    total_items = 0
+
+    try:
+        while True:
+            item = schedule.next()
+            if item is None:
+                break
+            lap, msg_idx, payloads, due = item
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            n = len(payloads)
+            try:
+                call_start, (c_data_array, version) = guarded_call(session, lambda s, m: protectBulkData_session(
+                    s, endpointCRDP, payloads, protectionPolicy, m
+                ), metrics, n)
+            except Exception as e:
+                if not skip_failed_call(metrics, task_id, msg_idx, e):
+                    raise
+                continue
+            call_end = time.time()
+            sink.add(lap, msg_idx, c_data_array)
+            if c_version is None:
+                c_version = version
+            metrics.record_call(call_start, call_end, n)
+            metrics.schedule_lags.append(max(call_start - due, 0.0))
+            total_items += n
+            progress.update(n)
+        metrics.items_processed = total_items
+    except Exception as e:
+        metrics.errors.append(str(e))
+        print(colored(f"\nWorker {task_id} error: {e}", "red"))
+    finally:
+        metrics.end_time = time.time()
+        session.close()
+
+    return metrics, c_version
+
+
+def worker_reveal_open_loop(task_id, schedule, endpointCRDP, protectionPolicy, c_version, r_user, sink, progress):
+    """
+    Open-loop REVEAL worker. Results go to `sink`. Returns metrics.
+    """
+    session = new_session(task_id)
+    metrics = watch_worker(WorkerMetrics(task_id))
+    metrics.start_time = time.time()
+
+    total_items = 0
+
+    try:
+        while True:
+            item = schedule.next()
+            if item is None:
+                break
+            lap, msg_idx, payloads, due = item
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            n = len(payloads)
+            try:
+                call_start, r_data_array = guarded_call(session, lambda s, m: revealBulkData_session(
+                    s, endpointCRDP, payloads, protectionPolicy, c_version, r_user, m
+                ), metrics, n)
+            except Exception as e:
+                if not skip_failed_call(metrics, task_id, msg_idx, e):
+                    raise
+                continue
+            call_end = time.time()
+            sink.add(lap, msg_idx, r_data_array)
+            metrics.record_call(call_start, call_end, n)
+            metrics.schedule_lags.append(max(call_start - due, 0.0))
+            total_items += n
+            progress.update(n)
+        metrics.items_processed = total_items
+    except Exception as e:
+        metrics.errors.append(str(e))
+        print(colored(f"\nWorker {task_id} error: {e}", "red"))
+    finally:
+        metrics.end_time = time.time()
+        session.close()
+
+    return metrics
+
+
+def execute_protect_messages_open_loop(messages, num_threads, rate, endpointCRDP, protectionPolicy, run_seconds=None, sink=None):
+    """
+    Execute bulk PROTECT at a constant arrival rate of `rate` txns/sec using up
+    to `num_threads` concurrent workers. If the workers cannot keep up, calls go
+    out late and the corrected latency percentiles show it. With run_seconds
+    the timetable keeps replaying the messages for that long.
+
+    Returns:
+        AggregatedMetrics, flat c_data_array (the sink's kept results, in payload order), c_version
+    """
+    total_items = payload_count(messages) if run_seconds is None else None
+    schedule = ArrivalSchedule(messages, rate, run_seconds)
+    agg_metrics = AggregatedMetrics()
+    agg_metrics.target_rate = rate
+
+    sink = sink if sink is not None else ResultSink()
+    c_version = None
+
+    with ProgressReporter(total_items, "Open-loop PROTECT Progress") as progress:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            agg_metrics.overall_start = time.time()
+            schedule.start(agg_metrics.overall_start)
+            futures = {
+                executor.submit(
+                    worker_protect_open_loop,
+                    task_id, schedule, endpointCRDP, protectionPolicy, sink, progress.counter(),
+                ): task_id
+                for task_id in range(num_threads)
+            }
+
+            for future in as_completed(futures):
+                task_id = futures[future]
+                try:
+                    metrics, version = future.result()
+                    agg_metrics.add_worker_metrics(metrics)
+                    if c_version is None and version is not None:
+                        c_version = version
+                except Exception as e:
+                    print(colored(f"\nWorker {task_id} failed: {e}", "red"))
+
+    agg_metrics.overall_end = time.time()
+
+    return agg_metrics, sink.items(), c_version
+
+
+def execute_reveal_messages_open_loop(messages, num_threads, rate, endpointCRDP, protectionPolicy, c_version, r_user, run_seconds=None, sink=None):
+    """
+    Execute bulk REVEAL at a constant arrival rate of `rate` txns/sec.
+
+    Returns:
+        AggregatedMetrics, flat r_data_array (the sink's kept results, in payload order)
+    """
+    total_items = payload_count(messages) if run_seconds is None else None
+    schedule = ArrivalSchedule(messages, rate, run_seconds)
+    agg_metrics = AggregatedMetrics()
+    agg_metrics.target_rate = rate
+
+    sink = sink if sink is not None else ResultSink()
+
+    with ProgressReporter(total_items, "Open-loop REVEAL Progress") as progress:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            agg_metrics.overall_start = time.time()
+            schedule.start(agg_metrics.overall_start)
+            futures = {
+                executor.submit(
+                    worker_reveal_open_loop,
+                    task_id, schedule, endpointCRDP, protectionPolicy, c_version, r_user, sink, progress.counter(),
+                ): task_id
+                for task_id in range(num_threads)
+            }
+
+            for future in as_completed(futures):
+                task_id = futures[future]
+                try:
+                    metrics = future.result()
                     agg_metrics.add_worker_metrics(metrics)
                 except Exception as e:
                     print(colored(f"\nWorker {task_id} failed: {e}", "red"))
 
     agg_metrics.overall_end = time.time()
 
-    all_chunks.sort(key=lambda x: x[0])
-    r_data_array = []
-    for _, chunk in all_chunks:
-        r_data_array.extend(chunk)
+    return agg_metrics, sink.items()
+
+
+# -------------------- Multi-Process Orchestration --------------------
+# One CRDP_Stress.py run can escape the GIL by sharding its messages across a
+# pool of worker processes, each of which runs the ordinary thread workers above.
+# Every child returns its WorkerMetrics, which the parent merges into a single
+# AggregatedMetrics - one coherent result record instead of N JSON files to
+# stitch together as with multi_client.py.
+#
+# fork copies only the forking thread: a lock that another parent thread (the
+# tqdm monitor, the progress relay, the live metrics exporter, a CPU sampler)
+# held at that instant stays locked in the child for good, and Python 3.12+
+# warns about forking with threads running. So the run forks its worker
+# processes once, in a ShardPool started before the first thread, and every
+# phase's shards run in those same children.
+
+_child_progress_queue = None
+# -processes: the run's ShardPool (None: _run_shards forks a pool per phase).
+_shard_pool = None
+
+
+def set_shard_pool(pool):
+    global _shard_pool
+    _shard_pool = pool
+
+
+class ShardPool:
+    """
+    `num_processes` forked worker processes for the shards of every phase, and
+    the queue their progress comes back on. start() forks them all at once;
+    call it before the parent starts any thread. Shard functions get what is
+    specific to a phase as arguments; module state is what it was at start().
+    """
+    def __init__(self, num_processes):
+        self.num_processes = num_processes
+        ctx = multiprocessing.get_context("fork")
+        # A SimpleQueue writes to its pipe in put() itself (no feeder thread), so
+        # a child's progress is in the pipe before its shard's result is sent.
+        self.progress_queue = ctx.SimpleQueue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_processes, mp_context=ctx,
+            initializer=_init_child_process, initargs=(self.progress_queue,),
+        )
+
+    def start(self):
+        # With fork the first submit launches every child, before the executor
+        # starts its own management thread.
+        self.executor.submit(os.getpid).result()
+        return self
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def _init_child_process(progress_queue):
+    # Runs once in each forked child. The queue arrives through fork inheritance
+    # (multiprocessing queues cannot be pickled as task arguments).
+    global _child_progress_queue, _live
+    _child_progress_queue = progress_queue
+    # The parent's live exporter (and its lock) came along with the fork; the
+    # child's workers stay out of it, the relayed progress stands in for them.
+    _live = None
+
+
+def _shard_round_robin(indexed_messages, num_shards):
+    """Round-robin (msg_idx, payloads) pairs (a list or IndexedMessages) into num_shards shares."""
+    return [indexed_messages[i::num_shards] for i in range(num_shards)]
+
+
+def _protect_shard(shard_id, indexed_messages, num_threads, endpointCRDP, protectionPolicy, sink, deadline):
+    """
+    Child-process entry point: run worker_protect_messages threads over this
+    shard (dispatched between them as in-process). Worker ids are offset by
+    shard so they stay unique after merging. Results go to this process's copy
+    of `sink`, which is returned for the parent to merge.
+    Returns list of WorkerMetrics, sink, c_version.
+    """
+    progress = ProgressReporter(forward=_child_progress_queue.put).start()
+    worker_metrics = []
+    c_version = None
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = {}
+        for t, msg_list in enumerate(dispatch_messages(indexed_messages, num_threads)):
+            if not msg_list:
+                continue
+            task_id = shard_id * num_threads + t
+            future = executor.submit(
+                worker_protect_messages,
+                task_id, msg_list, endpointCRDP, protectionPolicy, sink, progress.counter(), deadline,
+            )
+            futures[future] = task_id
+
+        for future in as_completed(futures):
+            task_id = futures[future]
+            try:
+                metrics, version = future.result()
+                worker_metrics.append(metrics)
+                if c_version is None and version is not None:
+                    c_version = version
+            except Exception as e:
+                print(colored(f"\nWorker {task_id} failed: {e}", "red"))
+
+    progress.stop()
+    # Flush this process's spool before the sink is sent back. The child
+    # outlives the phase, whose request bodies are not sent again.
+    sink.close()
+    BODY_CACHE.clear()
+    return worker_metrics, sink, c_version
+
+
+def _reveal_shard(shard_id, indexed_messages, num_threads, endpointCRDP, protectionPolicy, c_version, r_user, sink, deadline):
+    """
+    Child-process entry point: run worker_reveal_messages threads over this shard.
+    Returns list of WorkerMetrics, sink.
+    """
+    progress = ProgressReporter(forward=_child_progress_queue.put).start()
+    worker_metrics = []
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = {}
+        for t, msg_list in enumerate(dispatch_messages(indexed_messages, num_threads)):
+            if not msg_list:
+                continue
+            task_id = shard_id * num_threads + t
+            future = executor.submit(
+                worker_reveal_messages,
+                task_id, msg_list, endpointCRDP, protectionPolicy, c_version, r_user, sink, progress.counter(), deadline,
+            )
+            futures[future] = task_id
+
+        for future in as_completed(futures):
+            task_id = futures[future]
+            try:
+                metrics = future.result()
+                worker_metrics.append(metrics)
+            except Exception as e:
+                print(colored(f"\nWorker {task_id} failed: {e}", "red"))
+
+    progress.stop()
+    # Flush this process's spool before the sink is sent back. The child
+    # outlives the phase, whose request bodies are not sent again.
+    sink.close()
+    BODY_CACHE.clear()
+    return worker_metrics, sink
+
+
+def _run_shards(shard_fn, shards, extra_args, total_items, desc, run_seconds=None):
+    """
+    Run one shard per process of the run's ShardPool (or of one forked for
+    this phase when none is set), relay child progress into a tqdm bar, and
+    return (AggregatedMetrics, [shard results...]) with the merged worker metrics.
+    The shard function receives the timed-run deadline (or None) as its last
+    argument; wall-clock time is shared by all processes on the host.
+    """
+    pool = _shard_pool
+    own_pool = pool is None or pool.num_processes < len(shards)
+    if own_pool:
+        pool = ShardPool(len(shards)).start()
+    progress_queue = pool.progress_queue
+    agg_metrics = AggregatedMetrics()
+    outcomes = []
+
+    with tqdm(total=total_items, desc=desc, disable=_quiet) as pbar:
+        def relay():
+            while True:
+                n = progress_queue.get()
+                if n is None:
+                    break
+                pbar.update(n)
+                if _live is not None:
+                    _live.add_items(n)
+
+        relay_thread = threading.Thread(target=relay, daemon=True)
+        relay_thread.start()
+
+        agg_metrics.overall_start = time.time()
+        deadline = agg_metrics.overall_start + run_seconds if run_seconds is not None else None
+        futures = {
+            pool.executor.submit(shard_fn, shard_id, shard, *extra_args, deadline): shard_id
+            for shard_id, shard in enumerate(shards)
+            if shard
+        }
+        for future in as_completed(futures):
+            shard_id = futures[future]
+            try:
+                outcome = future.result()
+                outcomes.append(outcome)
+                for metrics in outcome[0]:
+                    agg_metrics.add_worker_metrics(metrics)
+            except Exception as e:
+                print(colored(f"\nProcess {shard_id} failed: {e}", "red"))
+        agg_metrics.overall_end = time.time()
+
+        # Every child's progress is already in the queue, ahead of this.
+        progress_queue.put(None)
+        relay_thread.join()
+
+    if own_pool:
+        pool.close()
+    return agg_metrics, outcomes
+
+
+def execute_protect_messages_multiprocess(messages, num_processes, num_threads, endpointCRDP, protectionPolicy, run_seconds=None, sink=None):
+    """
+    Execute bulk PROTECT across `num_processes` forked processes, each running
+    `num_threads` worker threads. Messages are sharded round-robin across
+    processes, and dispatched to the threads within each process as in
+    execute_protect_messages_parallel.
+
+    Returns:
+        AggregatedMetrics, flat c_data_array (the sink's kept results, in payload order), c_version
+    """
+    shards = _shard_round_robin(IndexedMessages(messages), num_processes)
+    total_items = payload_count(messages) if run_seconds is None else None
+
+    sink = sink if sink is not None else ResultSink()
+    agg_metrics, outcomes = _run_shards(
+        _protect_shard, shards, (num_threads, endpointCRDP, protectionPolicy, sink),
+        total_items, "Multi-process PROTECT Progress", run_seconds,
+    )
+
+    c_version = None
+    for _, shard_sink, version in outcomes:
+        sink.merge(shard_sink)
+        if c_version is None and version is not None:
+            c_version = version
+
+    return agg_metrics, sink.items(), c_version
+
+
+def execute_reveal_messages_multiprocess(messages, num_processes, num_threads, endpointCRDP, protectionPolicy, c_version, r_user, run_seconds=None, sink=None):
+    """
+    Execute bulk REVEAL across `num_processes` forked processes, each running
+    `num_threads` worker threads.
+
+    Returns:
+        AggregatedMetrics, flat r_data_array (the sink's kept results, in payload order)
+    """
+    shards = _shard_round_robin(IndexedMessages(messages), num_processes)
+    total_items = payload_count(messages) if run_seconds is None else None
+
+    sink = sink if sink is not None else ResultSink()
+    agg_metrics, outcomes = _run_shards(
+        _reveal_shard, shards, (num_threads, endpointCRDP, protectionPolicy, c_version, r_user, sink),
+        total_items, "Multi-process REVEAL Progress", run_seconds,
+    )
+
+    for _, shard_sink in outcomes:
+        sink.merge(shard_sink)
 
-    return agg_metrics, r_data_array
+    return agg_metrics, sink.items()
 
 
 def display_worker_performance(agg_metrics, operation_name):
@@ -951,7 +3015,7 @@ def display_test_summary(agg_metrics, data_size, operation_name, cpu=None):
     overall_time = agg_metrics.overall_duration()
 
 
-    pRate = (data_size / overall_time) / 1000000 if overall_time > 0 else 0  # MB/s
+    pRate = phase_mb_per_sec(agg_metrics, data_size)  # MB/s
     outStr = (
         f"CRDP Test Completed - {operation_name}. "
         f"{data_size/1000000:.3f} MBs processed. "
@@ -964,21 +3028,42 @@ def display_test_summary(agg_metrics, data_size, operation_name, cpu=None):
 
     # Primary throughput metric: transactions (iterations) per second - the goal unit.
     tps = agg_metrics.txns_per_sec()
-    print(colored(
-        f"  Throughput: {tps:,.0f} txns/sec  "
-        f"({agg_metrics.total_items:,} txns in {overall_time:.2f}s)",
-        "cyan", attrs=["bold"]))
+    if agg_metrics.has_measurement_window():
+        # Warm-up / cool-down calls are excluded from throughput and latency.
+        warm = agg_metrics.excluded_summary("warmup") or {}
+        cool = agg_metrics.excluded_summary("cooldown") or {}
+        print(colored(
+            f"  Throughput: {tps:,.0f} txns/sec  "
+            f"({agg_metrics.measured_items():,} txns in {agg_metrics.measured_duration():.2f}s measured window; "
+            f"excluded {warm.get('txns', 0):,} warm-up + {cool.get('txns', 0):,} cool-down txns)",
+            "cyan", attrs=["bold"]))
+    else:
+        print(colored(
+            f"  Throughput: {tps:,.0f} txns/sec  "
+            f"({agg_metrics.total_items:,} txns in {overall_time:.2f}s)",
+            "cyan", attrs=["bold"]))
 
     # Per-bulk-call latency distribution. Most informative at small batch sizes;
     # at very large batches a run may be only a handful of calls (coarse).
     pct = agg_metrics.latency_percentiles()
-    ncalls = len(agg_metrics.all_call_records())
+    ncalls = agg_metrics.call_count()
     print(colored(
         f"  Latency/bulk-call ({ncalls} calls): "
         f"p50 {pct['p50']*1000:.1f}ms | p95 {pct['p95']*1000:.1f}ms | "
-        f"p99 {pct['p99']*1000:.1f}ms | max {pct['max']*1000:.1f}ms",
+        f"p99 {pct['p99']*1000:.1f}ms | p99.9 {pct['p999']*1000:.1f}ms | max {pct['max']*1000:.1f}ms",
         "cyan"))
 
+    # Open-loop runs: latency measured from the intended send time. A large gap
+    # to the raw line means the workers could not keep to the timetable.
+    if agg_metrics.target_rate is not None:
+        cpct = agg_metrics.corrected_latency_percentiles()
+        late = sum(1 for lag in agg_metrics.all_schedule_lags() if lag > 0.001)
+        print(colored(
+            f"  Open-loop @ {agg_metrics.target_rate:,.0f} txns/sec target, corrected latency: "
+            f"p50 {cpct['p50']*1000:.1f}ms | p95 {cpct['p95']*1000:.1f}ms | "
+            f"p99 {cpct['p99']*1000:.1f}ms | p99.9 {cpct['p999']*1000:.1f}ms | max {cpct['max']*1000:.1f}ms  ({late} late calls)",
+            "cyan"))
+
     # Rolling throughput - exposes plateau / collapse hidden by the wall average.
     rolling = agg_metrics.rolling_throughput()
     if rolling:
@@ -993,12 +3078,109 @@ def display_test_summary(agg_metrics, data_size, operation_name, cpu=None):
         if cs.get("available"):
             print(colored(
                 f"  Client CPU: avg {cs['avg']:.0f}% | peak {cs['peak']:.0f}%  "
-                f"(of {cs['cores']} logical cores)", "cyan"))
+                f"(of {cs['cores']} logical cores)"
+                + (f" | RSS peak {cs['rss_peak_mb']:,.0f} MB" if cs.get("rss_peak_mb") else ""), "cyan"))
         else:
             print(colored(
                 "  Client CPU: not captured (pip install psutil to enable)",
                 "yellow"))
 
+    # Bytes on the wire vs the data plane - is the NIC / ingress part of the wall?
+    wire = wire_record(agg_metrics, data_size)
+    if wire is not None:
+        print(colored(
+            f"  Wire ({wire['compression'] or 'uncompressed'}): {wire['bytes_per_txn']:,.0f} B/txn "
+            f"(req {wire['request_bytes_per_txn']:,.0f} / resp {wire['response_bytes_per_txn']:,.0f}) | "
+            f"{wire['wire_mb_per_sec']:,.3f} MB/s on wire vs {wire['data_mb_per_sec']:,.3f} MB/s data",
+            "cyan"))
+
+    # HTTP/2 multiplexing - how many connections carried the phase's calls.
+    h2rec = http2_record(agg_metrics)
+    if h2rec is not None:
+        print(colored(
+            f"  HTTP/2 ({h2rec['mode']}): {h2rec['connections']} connection(s) | "
+            f"{h2rec['streams_per_connection']:,.1f} streams/connection (max {h2rec['max_streams_per_connection']:,})",
+            "cyan"))
+
+    # TLS - handshake cost and how well connections were reused / resumed.
+    tlsrec = tls_record(agg_metrics)
+    if tlsrec is not None:
+        print(colored(
+            f"  TLS: {tlsrec['handshakes']:,} handshake(s), {tlsrec['resumed_pct']:.0f}% resumed | "
+            f"mean {tlsrec['handshake_ms_mean']:,.2f}ms (max {tlsrec['handshake_ms']['max']:,.2f}ms) | "
+            f"{tlsrec['handshake_ms_per_txn']:,.4f}ms/txn | {tlsrec['calls_per_connection']:,.1f} calls/connection",
+            "cyan"))
+
+    # Per-endpoint breakdown - which endpoint the throughput and the tail come
+    # from (only worth a line each when the phase used more than one).
+    endpoints = endpoint_record(agg_metrics)
+    lb = balancer_record(agg_metrics)
+    if endpoints is not None and len(endpoints) > 1:
+        for endpoint, ep in endpoints.items():
+            lat = ep["latency_ms"]
+            line = (f"  Endpoint {endpoint}: {ep['txns_per_sec']:,.0f} txns/sec ({ep['calls']:,} calls) | "
+                    f"p50 {lat['p50']:,.1f}ms | p99 {lat['p99']:,.1f}ms | {ep['errors']:,} errors")
+            if ep["errors"]:
+                line += " (" + ", ".join(f"{status}: {n:,}" for status, n in ep["errors_by_status"].items()) + ")"
+            if lb is not None and endpoint in lb["endpoints"]:
+                line += f" | {lb['endpoints'][endpoint]['breaker_trips']:,} breaker trips"
+            print(colored(line, "red" if ep["errors"] else "cyan"))
+    if lb is not None:
+        if lb["failovers"]:
+            print(colored(f"  Failovers: {lb['failovers']:,} calls retried on another endpoint", "yellow"))
+
+    # Retries / hedging - what it took to get the phase's calls answered.
+    rs = resilience_record(agg_metrics)
+    if rs is not None:
+        line = f"  Retries: {rs['retries']:,} (max {rs['max_retries']}/call)"
+        if rs["hedge"]:
+            line += f" | hedged {rs['hedges']:,} ({rs['hedge_wins']:,} won, {rs['hedges_skipped']:,} skipped)"
+        line += (f" | {rs['failed_calls']:,} failed calls skipped | "
+                 f"wasted {rs['wasted_calls']:,} calls / {rs['wasted_items']:,} txns ({rs['wasted_pct']:.1f}%)")
+        print(colored(line, "yellow" if rs["failed_calls"] else "cyan"))
+
+    # Adaptive concurrency - where the limiter settled between 1 and -threads.
+    cc = concurrency_record(agg_metrics)
+    if cc is not None:
+        print(colored(
+            f"  Concurrency ({cc['algorithm']}): limit mean {cc['limit_mean']:,.1f} | "
+            f"min {cc['limit_min']:,.1f} | max {cc['limit_max']:,.1f} | final {cc['limit_final']:,.1f} "
+            f"(ceiling {cc['ceiling']})",
+            "cyan"))
+
+    # Connection reuse - whether the phase ran on the run's pre-warmed connections.
+    pool_stats = agg_metrics.connection_stats
+    if pool_stats is not None and pool_stats["requests"]:
+        print(colored(
+            f"  Connections: pool of {pool_stats['pool_size']} ({pool_stats['prewarmed']} pre-warmed) | "
+            f"{pool_stats['new_connections']:,} opened in phase | reuse {pool_stats['reuse_ratio'] * 100:.1f}% | "
+            f"{pool_stats['waits']:,} calls waited for a connection ({pool_stats['max_wait_ms']:,.1f}ms longest)",
+            "cyan"))
+
+    # Request body serialization - how much encode work the body cache saved.
+    bc = body_cache_record(agg_metrics)
+    if bc is not None:
+        if bc["streamed"]:
+            state = "streamed"
+        elif bc["enabled"]:
+            state = f"{bc['hit_ratio']*100:.1f}% reused"
+        else:
+            state = "cache off"
+        print(colored(
+            f"  Request bodies: {state} | serialize {bc['serialize_ms']:,.1f}ms spent, "
+            f"{bc['serialize_saved_ms']:,.1f}ms saved", "cyan"))
+
+    # -breakdown: where a bulk call's time goes on the client.
+    bd = breakdown_record(agg_metrics)
+    if bd is not None:
+        parts = " | ".join(f"{name} {ph['mean_ms']:,.2f}ms" for name, ph in bd["phases"].items())
+        print(colored(
+            f"  Call breakdown (mean over {bd['calls']:,} calls): {parts}", "cyan"))
+        print(colored(
+            f"    -> serialize + parse (load generator) {bd['client_pct']:.1f}% | "
+            f"waiting for CRDP (ttfb) {bd['ttfb_pct']:.1f}%",
+            "yellow" if bd["client_pct"] > bd["ttfb_pct"] else "cyan"))
+
     # Display load distribution if multiple workers
     if len(agg_metrics.worker_metrics) > 1:
         min_dur = agg_metrics.min_worker_duration()
@@ -1010,4 +3192,11 @@ def display_test_summary(agg_metrics, data_size, operation_name, cpu=None):
             f"  Load Distribution: Min: {min_dur:.2f}s | Max: {max_dur:.2f}s | "
             f"Avg: {avg_dur:.2f}s | Skew: {skew:.1f}%", "cyan"))
 
+        # Tail - how long the last workers ran on while the others had nothing left.
+        dp = dispatch_record(agg_metrics)
+        print(colored(
+            f"  Tail ({dp['mode']} dispatch): {dp['tail_sec']:.2f}s with fewer than all {dp['workers']} workers busy "
+            f"({dp['tail_busy_pct']:.0f}% busy on average, {dp['idle_worker_sec']:.2f} idle worker-sec) | "
+            f"ramp {dp['ramp_sec']:.2f}s | {dp['partial_pct']:.1f}% of phase", "cyan"))
+
     print()  # blank line after summary
@@ -0,0 +1,283 @@
+# Lazy Workload and Result Sinks for CRDP Stress Testing
+#
+# A run sends `-iterations` payloads (x the cells of a -csvlist file) in bulk
+# messages of -batchsize. Materializing that as a flat plaintext array, a list
+# of message slices, the protected results and the re-chunked REVEAL messages
+# costs tens of GB at tens of millions of iterations - and almost none of it is
+# ever read again. Instead:
+#
+#   MessageSource    - the messages, built on demand: payload k of the run is
+#                      cells[k % len(cells)], so only the distinct cells (one CSV
+#                      pass, or the single random/file payload) are held. The
+#                      workers pull messages one at a time (MessageQueue), so at
+#                      most one message per worker exists at once.
+#   IndexedMessages  - (msg_idx, payloads) view over a MessageSource; slicing it
+#                      gives a worker's or process's round-robin share without
+#                      copying.
+#   ResultSink       - where the workers put each call's results. Only the leading
+#                      messages' results are kept (the display, the protected CSV
+#                      and the REVEAL corpus need no more); the rest are dropped
+#                      as soon as the call returns, optionally after feeding a
+#                      reservoir sample or a spool file (-results).
+#
+# Memory is then O(threads x batchsize) plus the distinct input cells, whatever
+# the iteration count.
+#
+######################################################################
+import heapq
+import math
+import random
+import threading
+from CRDP_REST_API import OneOffMessage, _dumps
+
+
+class MessageSource:
+    """
+    `payload_count` payloads cycling over `cells`, as bulk messages of `size`
+    (0 = one message with everything; the last message may be smaller). Indexing
+    builds the message. When the messages line up with the cell cycle (size a
+    multiple or a divisor of len(cells)) each distinct full message is built once
+    and shared, so the request body cache serializes it once for the whole run;
+    any other message is a fresh OneOffMessage the cache leaves alone.
+    """
+    def __init__(self, cells, payload_count, size):
+        self.cells = cells
+        self.payload_count = payload_count if cells else 0
+        self.size = size or max(1, self.payload_count)
+        aligned = cells and (self.size % len(cells) == 0 or len(cells) % self.size == 0)
+        self._cycle = {} if aligned else None
+
+    def __len__(self):
+        return -(-self.payload_count // self.size)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("message index out of range")
+        start = i * self.size
+        n = min(self.size, self.payload_count - start)
+        if n < self.size or self._cycle is None:
+            return OneOffMessage(self._build(start, n))
+        key = start % len(self.cells)
+        msg = self._cycle.get(key)
+        if msg is None:
+            msg = self._cycle.setdefault(key, self._build(start, n))
+        return msg
+
+    def aligned(self, results, payload_count=None):
+        """
+        A MessageSource over `results` - the per-payload results of this
+        source's leading messages, in order - in messages of the same size, so
+        that its payload k is the result of payload k here. Only the first cycle
+        of the results is used: kept messages that run past the end of the cells
+        would otherwise lengthen the cycle and shift every later payload.
+        """
+        return MessageSource(results[:len(self.cells)], self.payload_count if payload_count is None else payload_count,
+                             self.size)
+
+    def _build(self, start, n):
+        cells = self.cells
+        i = start % len(cells)
+        if i + n <= len(cells):
+            return cells[i:i + n]
+        msg = cells[i:]
+        reps, rest = divmod(n - len(msg), len(cells))
+        msg.extend(cells * reps)
+        msg.extend(cells[:rest])
+        return msg
+
+
+class IndexedMessages:
+    """
+    (msg_idx, payloads) pairs for `messages` at `positions` (all of them by
+    default), built on access. Slicing returns another view, e.g. [i::n] for
+    the i-th of n round-robin shares.
+    """
+    def __init__(self, messages, positions=None):
+        self.messages = messages
+        self.positions = range(len(messages)) if positions is None else positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return IndexedMessages(self.messages, self.positions[k])
+        i = self.positions[k]
+        return i, self.messages[i]
+
+
+class ResultSink:
+    """
+    Collects the results of a phase's bulk calls from its workers. Only the
+    first pass (lap 0) of the `keep_msgs` lowest-numbered messages that came
+    back is kept (None = every message), so a skipped leading message does not
+    leave the sink empty; everything else is dropped on arrival. On top of that
+    (-results):
+
+      sample_size  - a uniform reservoir sample of that many result items over
+                     every call of the phase (all laps), for display and
+                     verification.
+      spool_path   - every call's results are appended to this file as they
+                     arrive, one JSON line per bulk call (see _spool).
+
+    `received` counts every result item. Thread-safe, and picklable so a
+    -processes child can fill its own copy and the parent merge() it once the
+    child is done.
+    """
+    def __init__(self, keep_msgs=None, sample_size=0, spool_path=None, phase=None):
+        self.keep_msgs = keep_msgs
+        self.sample_size = sample_size
+        self.spool_path = spool_path
+        self.phase = phase
+        self.received = 0
+        self.spooled_calls = 0
+        self.sample = []
+        self._chunks = []
+        self._skip_w = 1.0
+        self._skip_next = 0
+        self._spool = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"], state["_spool"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._spool = None
+        self._lock = threading.Lock()
+
+    def add(self, lap, msg_idx, chunk):
+        with self._lock:
+            if self.sample_size:
+                self._sample_chunk(chunk)
+            self.received += len(chunk)
+            if self.spool_path is not None:
+                self._spool_chunk(lap, msg_idx, chunk)
+            if lap == 0:
+                self._keep(msg_idx, chunk)
+
+    def _keep(self, msg_idx, chunk):
+        if self.keep_msgs is None:
+            self._chunks.append((msg_idx, chunk))
+        elif len(self._chunks) < self.keep_msgs:
+            # Max-heap on msg_idx: the root is the first to give way.
+            heapq.heappush(self._chunks, (-msg_idx, chunk))
+        elif self._chunks and msg_idx < -self._chunks[0][0]:
+            heapq.heapreplace(self._chunks, (-msg_idx, chunk))
+
+    def _skip(self):
+        # Algorithm L: jump straight to the next item that enters the
+        # reservoir, so a call costs O(replacements) rather than O(items).
+        self._skip_w *= math.exp(math.log(1.0 - random.random()) / self.sample_size)
+        self._skip_next += int(math.log(1.0 - random.random()) / math.log1p(-self._skip_w)) + 1
+
+    def _sample_chunk(self, chunk):
+        base = self.received
+        i = 0
+        while len(self.sample) < self.sample_size and i < len(chunk):
+            self.sample.append(chunk[i])
+            i += 1
+            if len(self.sample) == self.sample_size:
+                self._skip_next = self.sample_size - 1
+                self._skip()
+        if len(self.sample) < self.sample_size:
+            return
+        while self._skip_next < base + len(chunk):
+            self.sample[random.randrange(self.sample_size)] = chunk[self._skip_next - base]
+            self._skip()
+
+    def _spool_chunk(self, lap, msg_idx, chunk):
+        # One unbuffered O_APPEND write per call, so the lines of concurrent
+        # -processes children never interleave.
+        if self._spool is None:
+            self._spool = open(self.spool_path, "ab", buffering=0)
+        line = _dumps({"phase": self.phase, "msg_idx": msg_idx, "lap": lap, "results": chunk})
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        self._spool.write(line + b"\n")
+        self.spooled_calls += 1
+
+    def close(self):
+        with self._lock:
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+
+    def merge(self, other):
+        """Fold in a finished sink of the same phase (e.g. a -processes child's copy)."""
+        with self._lock:
+            for msg_idx, chunk in other.chunks():
+                self._keep(msg_idx, chunk)
+            if self.sample_size:
+                self.sample = _merge_samples(self.sample, self.received, other.sample, other.received, self.sample_size)
+            self.received += other.received
+            self.spooled_calls += other.spooled_calls
+
+    def chunks(self):
+        """The kept (msg_idx, chunk) pairs in message order."""
+        if self.keep_msgs is None:
+            return sorted(self._chunks, key=lambda c: c[0])
+        return sorted(((-neg, chunk) for neg, chunk in self._chunks), key=lambda c: c[0])
+
+    def items(self):
+        """The kept results, flattened in original payload order."""
+        out = []
+        for _, chunk in self.chunks():
+            out.extend(chunk)
+        return out
+
+    def record(self):
+        """JSON-serializable summary for -jsonout: counts, the sample and the spool file."""
+        return {
+            "received": self.received,
+            "kept": sum(len(chunk) for _, chunk in self.chunks()),
+            "sample": self.sample if self.sample_size else None,
+            "spool": self.spool_path,
+            "spooled_calls": self.spooled_calls if self.spool_path is not None else None,
+        }
+
+
+def _merge_samples(a, na, b, nb, size):
+    """
+    Uniform sample of `size` from two populations of na and nb items, given a
+    uniform sample of each: draw from a population with probability
+    proportional to what is left of it.
+    """
+    a, b = a[:], b[:]
+    random.shuffle(a)
+    random.shuffle(b)
+    merged = []
+    while len(merged) < size and (a or b):
+        if b and (not a or random.random() * (na + nb) < nb):
+            merged.append(b.pop())
+            nb -= 1
+        else:
+            merged.append(a.pop())
+            na -= 1
+    return merged
+
+
+def parse_results(spec):
+    """
+    -results value -> (mode, argument): 'keep' / 'discard' (None), 'sample:N'
+    (N > 0) or 'spool:<file>' (the path). Raises ValueError when malformed.
+    """
+    mode, _, arg = spec.partition(":")
+    if mode in ("keep", "discard") and not arg:
+        return mode, None
+    if mode == "sample" and arg.isdigit() and int(arg) > 0:
+        return mode, int(arg)
+    if mode == "spool" and arg:
+        return mode, arg
+    raise ValueError(spec)
+
+
+def payload_count(messages):
+    """Total payloads in `messages` (a MessageSource or a list of messages)."""
+    if isinstance(messages, MessageSource):
+        return messages.payload_count
+    return sum(len(m) for m in messages)
@@ -7,8 +7,12 @@
 #   <run>/podcounts.json  (optional)    {"kube":8,"sphere":8,"cone":8}
 #
 # Output: agg_<profile>.json with, per phase (protect/reveal): client throughput
-# (sum-of-rates + overlapped-window), pooled latency, backend cores-used per node,
+# (sum-of-rates + overlapped-window), pooled latency (the clients' latency
+# histograms merged exactly), backend cores-used per node,
 # per-node steal%, and raw + clean-node-corrected efficiency (txns/sec/core).
+# Client-side per-endpoint results (each client's `endpoints` section) are merged
+# per node (--endpoint-nodes maps HOST[:PORT] to node names) and lined up with that
+# node's steal/busy/cores in `per_node`.
 #
 # Clean-node correction: pods are homogeneous and the ClusterIP service round-robins
 # txns across all pods, so txns served by the low-steal nodes (kube+sphere) ≈
@@ -19,6 +23,13 @@ import glob
 import json
 import os
 import statistics
+import sys
+
+# Import LatencyHistogram from the sibling CRDP_Stress_App package.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_APP = os.path.join(os.path.dirname(_HERE), "CRDP_Stress_App")
+sys.path.insert(0, _APP)
+from latency_histogram import LatencyHistogram  # noqa: E402
 
 
 def load_json(path):
@@ -52,7 +63,72 @@ def mean(xs):
     return sum(xs) / len(xs) if xs else 0.0
 
 
-def phase_summary(results, phase, backend, steals, podcounts, trim, clean_nodes, payload_bytes=0):
+def pooled_latency_ms(records):
+    """
+    p50/p95/p99/p99.9/max (ms) over every call of `records` (phase or endpoint
+    records), by merging their `latency_histogram`s - exact. Records written
+    before the histograms existed fall back to the call-weighted mean of their
+    percentiles (an approximation), flagged by "exact": False.
+    """
+    hists = [r.get("latency_histogram") for r in records]
+    if hists and all(hists):
+        pooled = LatencyHistogram()
+        for h in hists:
+            pooled.merge(LatencyHistogram.from_dict(h))
+        lat = {k: round(v * 1000, 1) for k, v in pooled.percentiles().items()}
+        lat["exact"] = True
+        return lat
+    weighted = [(r.get("calls") or r.get("num_bulk_calls") or 1, r["latency_ms"]) for r in records if "latency_ms" in r]
+    weight = sum(c for c, _ in weighted)
+    lat = {k: round(sum(c * l[k] for c, l in weighted) / weight, 1) if weight else None
+           for k in ("p50", "p95", "p99")}
+    lat["max"] = round(max(l["max"] for _, l in weighted), 1) if weighted else None
+    lat["exact"] = False
+    return lat
+
+
+def parse_endpoint_nodes(spec):
+    """'192.168.1.188=kube,192.168.1.187:32085=sphere' -> {endpoint_or_host: node}."""
+    out = {}
+    for item in spec.split(","):
+        if "=" in item:
+            endpoint, node = item.split("=", 1)
+            out[endpoint.strip()] = node.strip()
+    return out
+
+
+def node_of(endpoint, endpoint_nodes):
+    return endpoint_nodes.get(endpoint) or endpoint_nodes.get(endpoint.rsplit(":", 1)[0]) or endpoint
+
+
+def per_node_client(ph, window, endpoint_nodes):
+    """
+    Merge the clients' per-endpoint records by node: calls, txns, errors (by
+    HTTP status) and txns/sec over the overlapped window. Latency pools the
+    endpoints' histograms (pooled_latency_ms).
+    """
+    merged = {}
+    for p in ph:
+        for endpoint, ep in (p.get("endpoints") or {}).items():
+            node = merged.setdefault(node_of(endpoint, endpoint_nodes), {
+                "endpoints": set(), "calls": 0, "txns": 0, "errors": 0, "errors_by_status": {}, "_eps": []})
+            node["endpoints"].add(endpoint)
+            node["calls"] += ep["calls"]
+            node["txns"] += ep["txns"]
+            node["errors"] += ep["errors"]
+            for status, n in ep.get("errors_by_status", {}).items():
+                node["errors_by_status"][status] = node["errors_by_status"].get(status, 0) + n
+            if ep["calls"]:
+                node["_eps"].append(ep)
+    for node in merged.values():
+        node["latency_ms"] = pooled_latency_ms(node["_eps"])
+        node["txns_per_sec"] = round(node["txns"] / window)
+        node["endpoints"] = sorted(node["endpoints"])
+        del node["_eps"]
+    return merged
+
+
+def phase_summary(results, phase, backend, steals, podcounts, trim, clean_nodes, payload_bytes=0, endpoint_nodes=None):
     ph = [r[phase] for r in results if phase in r and r[phase].get("total_txns")]
     if not ph:
         return None
@@ -65,11 +141,22 @@ def phase_summary(results, phase, backend, steals, podcounts, trim, clean_nodes,
     per_client = [p["txns_per_sec"] for p in ph]
     total_txns = sum(p["total_txns"] for p in ph)
     sum_of_rates = sum(per_client)
-    overlapped_rate = total_txns / window
+    rate_window, window_txns = window, total_txns
+
+    # Clients run with -duration/-warmup/-cooldown record their own measured
+    # window; when every client has one, their overlap replaces the --trim guess,
+    # and the overlapped rate counts only the measured txns over that overlap
+    # (the warmup/cooldown txns fall outside it).
+    windows = [p["measured_window"] for p in ph if p.get("measured_window")]
+    if windows and len(windows) == len(ph):
+        mw0 = max(w["start_epoch"] for w in windows)
+        mw1 = min(w["end_epoch"] for w in windows)
+        if mw1 > mw0:
+            sw0, sw1 = mw0, mw1
+            rate_window, window_txns = mw1 - mw0, sum(w["txns"] for w in windows)
+    overlapped_rate = window_txns / rate_window
 
-    # Pooled latency = mean of per-client percentiles (documented approximation).
-    lat = {k: mean([p["latency_ms"][k] for p in ph if "latency_ms" in p])
-           for k in ("p50", "p95", "p99", "max")}
+    lat = pooled_latency_ms(ph)
     host_cpu_peak = max((p["client_cpu"].get("peak", 0) for p in ph
                          if p.get("client_cpu", {}).get("available")), default=None)
     host_cores = next((p["client_cpu"].get("cores") for p in ph
@@ -113,6 +200,17 @@ def phase_summary(results, phase, backend, steals, podcounts, trim, clean_nodes,
     saturated = peak_busy >= 60.0
     client_limited = not saturated
 
+    # ---- Per node: client-side view next to the node's backend numbers ----
+    client_nodes = per_node_client(ph, window, endpoint_nodes or {})
+    per_node = {}
+    for node in sorted(set(client_nodes) | set(per_node_cores)):
+        per_node[node] = {
+            "client": client_nodes.get(node),
+            "cores_used": round(per_node_cores[node], 1) if node in per_node_cores else None,
+            "steal_pct": steal_pct.get(node),
+            "busy_pct": busy_pct.get(node),
+        }
+
     raw_eff = (overlapped_rate / total_cores) if total_cores > 0 else None
     clean_eff = None
     if total_pods and clean_pods and clean_cores > 0:
@@ -125,10 +223,11 @@ def phase_summary(results, phase, backend, steals, podcounts, trim, clean_nodes,
             "sum_of_rates_tps": round(sum_of_rates),
             "overlapped_window_tps": round(overlapped_rate),
             "total_txns": total_txns,
-            "window_sec": round(window, 1),
+            "window_txns": window_txns,
+            "window_sec": round(rate_window, 1),
             "per_client_tps": {"min": round(min(per_client)), "mean": round(mean(per_client)),
                                "max": round(max(per_client))},
-            "latency_ms": {k: round(v, 1) for k, v in lat.items()},
+            "latency_ms": lat,
             "host_cpu_peak_pct": host_cpu_peak,
             "host_cores": host_cores,
             # Aggregate data-plane rate: window txns/sec x plaintext field bytes.
@@ -149,6 +248,7 @@ def phase_summary(results, phase, backend, steals, podcounts, trim, clean_nodes,
             "client_limited": client_limited,
             "pod_counts": podcounts or {},
         },
+        "per_node": per_node,
         "efficiency_tps_per_core": {
             "raw": round(raw_eff) if raw_eff else None,
             "clean_node_corrected": round(clean_eff) if clean_eff else None,
@@ -168,6 +268,9 @@ def main():
     ap.add_argument("--out", required=True)
     ap.add_argument("--trim", type=float, default=0.2, help="Fraction trimmed from each end for steady window.")
     ap.add_argument("--clean-nodes", default="kube,sphere")
+    ap.add_argument("--endpoint-nodes", default="",
+                    help="Map client endpoints to node names for the per-node merge, "
+                         "e.g. 192.168.1.188=kube,192.168.1.187=sphere,192.168.1.189=cone")
     ap.add_argument("--note", default="")
     args = ap.parse_args()
 
@@ -183,6 +286,7 @@ def main():
     pc_path = os.path.join(args.run_dir, "podcounts.json")
     podcounts = load_json(pc_path) if os.path.isfile(pc_path) else {}
     clean_nodes = [n.strip() for n in args.clean_nodes.split(",") if n.strip()]
+    endpoint_nodes = parse_endpoint_nodes(args.endpoint_nodes)
 
     out = {
         "profile": args.profile,
@@ -191,8 +295,10 @@ def main():
         "payload_bytes": args.payload_bytes,
         "run_dir": os.path.abspath(args.run_dir),
         "note": args.note,
-        "protect": phase_summary(results, "protect", backend, steals, podcounts, args.trim, clean_nodes, args.payload_bytes),
-        "reveal": phase_summary(results, "reveal", backend, steals, podcounts, args.trim, clean_nodes, args.payload_bytes),
+        "protect": phase_summary(results, "protect", backend, steals, podcounts, args.trim, clean_nodes,
+                                 args.payload_bytes, endpoint_nodes),
+        "reveal": phase_summary(results, "reveal", backend, steals, podcounts, args.trim, clean_nodes,
+                                args.payload_bytes, endpoint_nodes),
     }
     with open(args.out, "w") as f:
         json.dump(out, f, indent=2)
@@ -204,6 +310,11 @@ def main():
             print("  %-7s overlapped=%s tps  cores=%s  eff raw=%s clean=%s tps/core"
                   % (ph, s["client"]["overlapped_window_tps"], s["backend"]["total_cores_used"],
                      e["raw"], e["clean_node_corrected"]))
+            for node, n in s["per_node"].items():
+                c = n["client"]
+                if c:
+                    print("    %-12s %7s tps  p99=%sms  errors=%d  steal=%s%%  cores=%s"
+                          % (node, c["txns_per_sec"], c["latency_ms"]["p99"], c["errors"], n["steal_pct"], n["cores_used"]))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+# Call Record Micro-Benchmark
+#
+# Memory per call record and phase-summary time for the typed-array call
+# records (call_records.CallRecords + AggregatedMetrics) against the list of
+# (call_start, call_end, n_items) tuples they replaced, whose summary flattened
+# and re-walked the tuples in Python for every metric. No CRDP server needed.
+#
+# Usage:
+#   py benchmark/call_records_bench.py [-records N] [-workers N]
+#
+# Memory is what tracemalloc sees allocated for the records alone; the summary
+# is what a phase summary derives from them: latency percentiles, the rolling
+# txns/sec series, measured items and the load skew.
+#
+######################################################################
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Import the record classes from the sibling CRDP_Stress_App package.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_APP = os.path.join(os.path.dirname(_HERE), "CRDP_Stress_App")
+sys.path.insert(0, _APP)
+from call_records import CallRecords, np  # noqa: E402
+from parallel_execution import AggregatedMetrics, WorkerMetrics, compute_percentiles  # noqa: E402
+
+
+def synthetic_calls(n, workers, t0=1_700_000_000.0):
+    """Per-worker (start, end, items) generators: ~5 ms calls back to back."""
+    per_worker = n // workers
+    for w in range(workers):
+        def calls(t=t0, rnd=random.Random(w)):
+            for _ in range(per_worker):
+                lat = rnd.lognormvariate(-5.3, 0.4)
+                yield t, t + lat, 1
+                t += lat
+        yield calls()
+
+
+def build(n, workers, container):
+    tracemalloc.start()
+    sets = []
+    for calls in synthetic_calls(n, workers):
+        recs = container()
+        for record in calls:
+            recs.append(record)
+        sets.append(recs)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return sets, size
+
+
+def legacy_summary(sets, t0):
+    """What the summary did with lists of tuples."""
+    recs = []
+    for s in sets:
+        recs.extend(s)
+    pct = compute_percentiles(sorted(end - start for start, end, _ in recs))
+    items = sum(n for _, _, n in recs)
+    buckets = {}
+    for _, end, n in recs:
+        idx = int(end - t0)
+        buckets[idx] = buckets.get(idx, 0) + n
+    rolling = [buckets.get(i, 0) for i in range(max(buckets) + 1)]
+    return pct, items, rolling
+
+
+def array_summary(sets, t0):
+    agg = AggregatedMetrics()
+    agg.overall_start = t0
+    for i, recs in enumerate(sets):
+        m = WorkerMetrics(i)
+        m.call_records = recs
+        m.start_time, m.end_time = recs[0][0], recs[len(recs) - 1][1]
+        m.items_processed = len(recs)
+        agg.add_worker_metrics(m)
+    agg.overall_end = max(m.end_time for m in agg.worker_metrics)
+    # Worker histograms are built per call in the real run; here the summary
+    # takes the measured-window path, which bins every latency at once.
+    agg.set_measurement_window()
+    return agg.latency_percentiles(), agg.measured_items(), agg.rolling_throughput(), agg.load_skew_percent()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Call record memory / summary-time micro-benchmark.")
+    parser.add_argument("-records", type=int, default=10_000_000, help="Call records in total (default 10,000,000).")
+    parser.add_argument("-workers", type=int, default=20, help="Workers the records are spread over (default 20).")
+    args = parser.parse_args()
+    n = args.records - args.records % args.workers
+    t0 = 1_700_000_000.0
+    print("%s call records over %d workers (NumPy %s)\n" % (
+        "{:,}".format(n), args.workers, np.__version__ if np is not None else "not installed - pure Python"))
+
+    for label, container, summary in (("list of tuples", list, legacy_summary),
+                                      ("CallRecords", CallRecords, array_summary)):
+        sets, size = build(n, args.workers, container)
+        start = time.perf_counter()
+        summary(sets, t0)
+        summary_sec = time.perf_counter() - start
+        print("  %-15s %6.1f bytes/record  (%7.1f MB)  | summary %.2fs" % (
+            label, size / n, size / 1e6, summary_sec))
+        del sets
+
+
+if __name__ == "__main__":
+    main()
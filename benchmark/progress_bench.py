@@ -0,0 +1,116 @@
+# Progress Tracking Micro-Benchmark
+#
+# Worker throughput at small batch sizes with the progress accounting the
+# workers used to do - `with lock: pbar.update(n)` on one shared tqdm bar after
+# every call - against per-worker counters read by a ProgressReporter thread
+# (parallel_execution.py), and against no progress at all (-quiet). No CRDP
+# server needed.
+#
+# Usage:
+#   py benchmark/progress_bench.py [-threads N] [-seconds S] [-batchsizes 1,10,100] [-wait MS]
+#
+# Each simulated call does the client-side work of a bulk call of `batchsize`
+# items (serialize the request, parse a response of the same size) and then
+# waits -wait ms for the "server" with the GIL released (0 = client-bound, the
+# case where progress accounting costs the most). The bars draw into a
+# scratch file, as multi_client.py children's do into their logs.
+#
+######################################################################
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Import the progress classes from the sibling CRDP_Stress_App package.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_APP = os.path.join(os.path.dirname(_HERE), "CRDP_Stress_App")
+sys.path.insert(0, _APP)
+from tqdm import tqdm  # noqa: E402
+from CRDP_REST_API import _dumps, _loads_bytes  # noqa: E402
+from parallel_execution import ProgressReporter, set_quiet  # noqa: E402
+
+
+def fake_call(batch, response, wait):
+    _dumps({"protection_policy_name": "p", "data_array": batch})
+    _loads_bytes(response)
+    if wait:
+        time.sleep(wait)
+
+
+def run(mode, threads, seconds, batchsize, wait):
+    """Calls completed by `threads` workers in `seconds`, progress tracked per `mode`."""
+    batch = ["4111-1111-1111-%04d" % i for i in range(batchsize)]
+    response = _dumps({"protected_data_array": [{"protected_data": p, "external_version": "1001000"} for p in batch]})
+    deadline = time.time() + seconds
+    calls = [0] * threads
+
+    if mode == "shared lock":
+        pbar = tqdm(desc="bench")
+        lock = threading.Lock()
+
+        def worker(w):
+            while time.time() < deadline:
+                fake_call(batch, response, wait)
+                calls[w] += 1
+                with lock:
+                    pbar.update(batchsize)
+    else:
+        set_quiet(mode == "quiet")
+        pbar = ProgressReporter(desc="bench").start()
+        counters = [pbar.counter() for _ in range(threads)]
+
+        def worker(w):
+            progress = counters[w]
+            while time.time() < deadline:
+                fake_call(batch, response, wait)
+                calls[w] += 1
+                progress.update(batchsize)
+
+    cpu = time.process_time()
+    workers = [threading.Thread(target=worker, args=(w,)) for w in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    cpu = time.process_time() - cpu
+    if mode == "shared lock":
+        pbar.close()
+    else:
+        pbar.stop()
+    return sum(calls), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Progress tracking throughput micro-benchmark.")
+    parser.add_argument("-threads", type=int, default=100, help="Worker threads (default 100).")
+    parser.add_argument("-seconds", type=float, default=3.0, help="Run time per measurement (default 3).")
+    parser.add_argument("-batchsizes", default="1,10,100", help="Comma-separated batch sizes (default 1,10,100).")
+    parser.add_argument("-wait", type=float, default=0.0, help="Simulated server time per call, ms (default 0).")
+    args = parser.parse_args()
+    sizes = [int(b) for b in args.batchsizes.split(",")]
+    wait = args.wait / 1000
+
+    print("%d threads, %.0fs per measurement, %.1f ms server wait per call\n" % (args.threads, args.seconds, args.wait))
+    print("  %-9s %-16s %14s %12s %16s" % ("batchsize", "progress", "txns/sec", "vs lock", "CPU us/call"))
+    # The bars go to a scratch file, like a multi_client.py child's log.
+    stderr = sys.stderr
+    with tempfile.TemporaryFile("w") as log:
+        for size in sizes:
+            base = None
+            for mode in ("shared lock", "counters", "quiet"):
+                sys.stderr = log
+                try:
+                    calls, cpu = run(mode, args.threads, args.seconds, size, wait)
+                finally:
+                    sys.stderr = stderr
+                rate = calls * size / args.seconds
+                base = base or rate
+                print("  %-9d %-16s %14s %11.2fx %16.1f" % (
+                    size, mode, "{:,.0f}".format(rate), rate / base, cpu / max(calls, 1) * 1e6))
+            print()
+
+
+if __name__ == "__main__":
+    main()
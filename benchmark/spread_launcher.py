@@ -2,6 +2,8 @@
 #
 # Spawns N CRDP_Stress.py client processes concurrently, round-robin across a set
 # of CRDP endpoints (the three node NodePorts), each child writing its own -jsonout.
+# With -balance every child instead gets the whole endpoint list and balances its
+# own bulk calls across all of them (CRDP_Stress.py -balance).
 # On completion it re-reads the per-child JSONs and prints the aggregate throughput
 # for PROTECT and REVEAL using the shared multi_client.aggregate_phase() logic.
 #
@@ -43,6 +45,9 @@ def parse_args():
     p.add_argument("-iterations", type=int, default=1000000, help="Payloads per client.")
     p.add_argument("-batchsize", type=int, default=5000, help="Payloads per bulk REST call.")
     p.add_argument("-threads", type=int, default=20, help="Worker threads per client process.")
+    p.add_argument("-balance", choices=["leastoutstanding", "ewma"], default=None,
+                   help="Give every client all endpoints and balance per call with this policy "
+                        "instead of pinning each client to one endpoint.")
     p.add_argument("-outdir", required=True, help="Directory for per-child JSON + logs.")
     p.add_argument("-label", default="run", help="Base label; children tagged <label>-cN.")
     return p.parse_args()
@@ -70,7 +75,7 @@ def main():
 
     procs = []
     for i in range(a.clients):
-        endpoint = endpoints[i % len(endpoints)]
+        endpoint = ",".join(endpoints) if a.balance else endpoints[i % len(endpoints)]
         jpath = os.path.join(a.outdir, "client_%d.json" % i)
         lpath = os.path.join(a.outdir, "client_%d.log" % i)
         cmd = [sys.executable, child_script,
@@ -78,7 +83,9 @@ def main():
                "-charset", a.charset,
                "-iterations", str(a.iterations), "-batchsize", str(a.batchsize),
                "-threads", str(a.threads),
-               "-jsonout", jpath, "-label", "%s-c%d" % (a.label, i)]
+               "-jsonout", jpath, "-label", "%s-c%d" % (a.label, i), "-quiet"]
+        if a.balance:
+            cmd += ["-balance", a.balance]
         lf = open(lpath, "w")
         procs.append((subprocess.Popen(cmd, stdout=lf, stderr=subprocess.STDOUT, cwd=_APP), jpath, lf, endpoint, i))
         print("  launched client %d -> %s" % (i, endpoint))
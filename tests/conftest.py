@@ -0,0 +1,6 @@
+# The app modules are flat scripts imported by name (as CRDP_Stress.py and the
+# benchmark/ tools do), so the tests put CRDP_Stress_App on sys.path.
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CRDP_Stress_App"))
@@ -0,0 +1,83 @@
+import math
+
+import pytest
+
+from batch_tuner import TUNE_START, BatchTuner
+
+
+class FakeStep:
+    """The parts of AggregatedMetrics BatchTuner reads, for one calibration step."""
+    def __init__(self, tps, p99_ms, calls=100):
+        self.tps = tps
+        self.p99 = p99_ms / 1000
+        self.calls = calls
+        self.warmup = None
+
+    def set_measurement_window(self, warmup=0.0):
+        self.warmup = warmup
+
+    def latency_percentiles(self):
+        return {"p50": self.p99 / 2, "p99": self.p99}
+
+    def txns_per_sec(self):
+        return self.tps
+
+    def call_count(self):
+        return self.calls
+
+
+def tuner(tps, p99_ms=lambda size: 1.0, max_size=10_000, budget=None):
+    probed = []
+
+    def measure(size):
+        probed.append(size)
+        return FakeStep(tps(size), p99_ms(size))
+
+    return BatchTuner(measure, max_size, p99_budget_ms=budget, step_seconds=2.0), probed
+
+
+def test_climbs_to_the_throughput_plateau():
+    t, probed = tuner(lambda size: 100 * min(size, 64))
+    assert t.run() == 64
+    assert probed[:5] == [TUNE_START, 16, 32, 64, 128]
+    # Each size is measured once.
+    assert len(probed) == len(set(probed)) == len(t.curve)
+    assert t.record()["chosen"] == 64 and t.record()["steps"] == len(probed)
+
+
+def test_gains_under_the_threshold_do_not_count():
+    # +2% per doubling past 32 is noise, not a reason to grow the messages.
+    t, _ = tuner(lambda size: 100 * size if size <= 32 else 3200 * 1.02 ** math.log2(size / 32))
+    assert t.run() == 32
+
+
+def test_narrows_the_step_around_the_best_size():
+    t, probed = tuner(lambda size: 100 * min(size, 180 - size))
+    assert t.run() == 91
+    assert 91 in probed and 128 in probed
+
+
+def test_p99_budget_caps_the_size():
+    t, _ = tuner(lambda size: 100 * size, p99_ms=lambda size: size, budget=40)
+    chosen = t.run()
+    assert chosen == 32
+    assert all(point["within_budget"] == (point["p99_ms"] <= 40) for point in t.curve.values())
+
+
+def test_searches_below_the_start_when_it_misses_the_budget():
+    t, probed = tuner(lambda size: 100 * size, p99_ms=lambda size: size, budget=3)
+    assert t.run() == 3
+    assert probed[:3] == [8, 4, 2]
+
+
+def test_respects_the_maximum_size():
+    t, probed = tuner(lambda size: 100 * size, max_size=20)
+    assert t.run() == 20
+    assert max(probed) == 20
+
+
+@pytest.mark.parametrize("max_size", [1, 5])
+def test_tiny_workloads(max_size):
+    t, probed = tuner(lambda size: 100 * size, max_size=max_size)
+    assert t.run() == max_size
+    assert probed[0] == max_size
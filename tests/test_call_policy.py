@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+import parallel_execution
+from parallel_execution import CallPolicy, WorkerMetrics
+
+
+class FakeSession:
+    def close(self):
+        pass
+
+
+class Attempts:
+    """
+    Scripted attempts: the k-th call to attempt() blocks until gates[k] is set
+    (attempts without a gate return at once), then returns its number.
+    """
+    def __init__(self, *gated):
+        self.gates = {k: threading.Event() for k in gated}
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, session, metrics):
+        with self._lock:
+            k = self.count
+            self.count += 1
+        if k in self.gates:
+            self.gates[k].wait(5)
+        metrics.record_call(0.0, 0.0, 1)
+        return k
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(parallel_execution, "new_session", lambda i: FakeSession())
+    p = CallPolicy(hedge=True, workers=1)
+    p._p95 = 0.02  # hedge any attempt that is still running after 20ms
+    yield p
+    p.close()
+
+
+def wait_for(predicate):
+    deadline = time.time() + 5
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.005)
+    assert predicate()
+
+
+def test_a_slow_call_is_hedged_and_the_hedge_wins(policy):
+    attempt = Attempts(0)
+    m = WorkerMetrics(0)
+    assert policy.call(attempt, None, m, 1) == 1
+    assert (m.hedges, m.hedge_wins, m.hedges_skipped) == (1, 1, 0)
+    assert (m.wasted_calls, m.wasted_items) == (1, 1)
+    # Only the winner's record is added; the loser still holds the spare slot.
+    assert len(m.call_records) == 1
+    assert policy._spare == 1
+    attempt.gates[0].set()
+    wait_for(lambda: policy._spare == 0)
+
+
+def test_no_hedge_while_every_spare_slot_is_held(policy):
+    # Call 1: attempt 0 is slow, hedge 1 wins and attempt 0 keeps the only spare slot.
+    # Call 2: attempt 2 is slow too, but there is no slot left to hedge it.
+    attempt = Attempts(0, 2)
+    m = WorkerMetrics(0)
+    assert policy.call(attempt, None, m, 1) == 1
+    threading.Timer(0.1, attempt.gates[2].set).start()
+    assert policy.call(attempt, None, m, 1) == 2
+    assert (m.hedges, m.hedges_skipped) == (1, 1)
+
+    # Once the loser ends its slot is free again and the next slow call is hedged.
+    attempt.gates[0].set()
+    wait_for(lambda: policy._spare == 0)
+    attempt.gates[3] = threading.Event()
+    assert policy.call(attempt, None, m, 1) == 4
+    assert (m.hedges, m.hedge_wins, m.hedges_skipped) == (2, 2, 1)
+    attempt.gates[3].set()
+    wait_for(lambda: policy._spare == 0)
+
+
+def test_the_spare_slot_is_released_when_both_attempts_are_done(policy):
+    # Both attempts end before the call returns: no loser left running.
+    def attempt(session, metrics):
+        time.sleep(0.05)
+        metrics.record_call(0.0, 0.0, 1)
+        return "ok"
+
+    m = WorkerMetrics(0)
+    assert policy.call(attempt, None, m, 1) == "ok"
+    wait_for(lambda: policy._spare == 0)
+    assert m.hedges == 1
+
+
+def test_resize_bounds_the_spare_slots(policy):
+    policy.resize(3)
+    attempt = Attempts(0, 2, 4, 6)
+    m = WorkerMetrics(0)
+    # Three slow calls each leave a running loser; a fourth finds no slot.
+    for k in range(3):
+        assert policy.call(attempt, None, m, 1) == 2 * k + 1
+    assert policy._spare == 3
+    threading.Timer(0.1, attempt.gates[6].set).start()
+    assert policy.call(attempt, None, m, 1) == 6
+    assert (m.hedges, m.hedges_skipped) == (3, 1)
+    for k in (0, 2, 4):
+        attempt.gates[k].set()
+    wait_for(lambda: policy._spare == 0)
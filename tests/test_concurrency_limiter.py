@@ -0,0 +1,88 @@
+import math
+from types import SimpleNamespace
+
+import pytest
+
+import concurrency_limiter
+from concurrency_limiter import AIMD_BACKOFF, ConcurrencyLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable clock in place of the limiter's time.time."""
+    now = SimpleNamespace(t=1000.0)
+    monkeypatch.setattr(concurrency_limiter, "time", SimpleNamespace(time=lambda: now.t))
+    return now
+
+
+def test_aimd_grows_about_one_per_round_trip_within_tolerance(clock):
+    limiter = ConcurrencyLimiter(64, "aimd", initial=4)
+    limiter._update(0.1, False)
+    assert limiter.limit == pytest.approx(4.25)
+    # A limit's worth of calls at the baseline adds about one.
+    for _ in range(4):
+        limiter._update(0.1, False)
+    assert 5 < limiter.limit < 5.25
+
+
+def test_aimd_backs_off_once_per_round_trip(clock):
+    limiter = ConcurrencyLimiter(64, "aimd", initial=20)
+    limiter._update(0.1, False)
+    before = limiter.limit
+    # Smoothed latency well past 2 x the baseline: cut once...
+    limiter._update(10.0, False)
+    assert limiter.limit == pytest.approx(before * AIMD_BACKOFF)
+    # ...and not again within the same (smoothed) round trip.
+    limiter._update(10.0, False)
+    assert limiter.limit == pytest.approx(before * AIMD_BACKOFF)
+    clock.t += 10
+    limiter._update(10.0, False)
+    assert limiter.limit == pytest.approx(before * AIMD_BACKOFF ** 2)
+
+
+@pytest.mark.parametrize("algorithm", ["aimd", "gradient"])
+def test_failures_back_off_and_leave_the_latency_alone(clock, algorithm):
+    limiter = ConcurrencyLimiter(64, algorithm, initial=10)
+    limiter._update(0.1, False)
+    before, rtt = limiter.limit, limiter._rtt
+    limiter._update(30.0, True)
+    assert limiter.limit == pytest.approx(before * AIMD_BACKOFF)
+    assert limiter._rtt == rtt
+    # One cut per round trip for failures too.
+    limiter._update(30.0, True)
+    assert limiter.limit == pytest.approx(before * AIMD_BACKOFF)
+
+
+@pytest.mark.parametrize("algorithm", ["aimd", "gradient"])
+def test_limit_stays_between_one_and_the_worker_count(clock, algorithm):
+    limiter = ConcurrencyLimiter(8, algorithm, initial=4)
+    for _ in range(500):
+        limiter._update(0.1, False)
+    assert limiter.limit == 8
+    for _ in range(200):
+        clock.t += 100
+        limiter._update(0.1, True)
+    assert limiter.limit == 1
+
+
+def test_gradient_grows_at_the_baseline_and_shrinks_under_queueing(clock):
+    limiter = ConcurrencyLimiter(1000, "gradient", initial=16)
+    limiter._update(0.1, False)
+    # At the baseline the gradient is 1: the sqrt(limit) queue allowance grows it.
+    assert limiter.limit == pytest.approx(16 + 0.2 * math.sqrt(16))
+    for _ in range(100):
+        limiter._update(2.0, False)
+    # Latency ~20 x the baseline: gradient 0.5, so it settles where 0.5 x limit + sqrt(limit) == limit.
+    assert limiter.limit == pytest.approx(4, abs=0.5)
+
+
+def test_new_phase_forgets_the_baseline_but_keeps_the_limit(clock):
+    limiter = ConcurrencyLimiter(64, "aimd", initial=4)
+    for _ in range(10):
+        limiter._update(0.01, False)
+    limit = limiter.limit
+    limiter.new_phase()
+    assert limiter.limit == limit
+    # The next phase's calls are slower, but that is its baseline, not queueing.
+    limiter._update(1.0, False)
+    assert limiter.limit > limit
@@ -0,0 +1,150 @@
+from types import SimpleNamespace
+
+import pytest
+
+import endpoint_balancer
+from CRDP_REST_API import CRDPHTTPError
+from endpoint_balancer import BREAKER_FAILURES, BREAKER_OPEN_SECONDS, EndpointBalancer
+from parallel_execution import WorkerMetrics
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable clock in place of the balancer's time.time / perf_counter."""
+    now = SimpleNamespace(t=1000.0)
+    monkeypatch.setattr(endpoint_balancer, "time", SimpleNamespace(time=lambda: now.t, perf_counter=lambda: now.t))
+    return now
+
+
+def trip(balancer, endpoint):
+    for _ in range(BREAKER_FAILURES):
+        balancer._state[endpoint].outstanding += 1
+        tripped = balancer.release(endpoint, None, True)
+    assert tripped
+
+
+def test_breaker_trips_after_consecutive_failures(clock):
+    b = EndpointBalancer(["a", "b"])
+    state = b._state["a"]
+    for _ in range(BREAKER_FAILURES - 1):
+        state.outstanding += 1
+        assert not b.release("a", None, True)
+    # A success in between resets the count.
+    state.outstanding += 1
+    b.release("a", 0.01, False)
+    assert state.consecutive_failures == 0
+    for _ in range(BREAKER_FAILURES - 1):
+        state.outstanding += 1
+        assert not b.release("a", None, True)
+    state.outstanding += 1
+    assert b.release("a", None, True)
+    assert state.tripped and state.open_until == clock.t + BREAKER_OPEN_SECONDS
+    # While open, every call goes elsewhere.
+    assert {b.acquire() for _ in range(4)} == {"b"}
+
+
+def test_request_errors_do_not_count_against_the_endpoint(clock):
+    b = EndpointBalancer(["a", "b"])
+    calls = []
+
+    def fn(endpoint):
+        calls.append(endpoint)
+        raise CRDPHTTPError(400)
+
+    for _ in range(BREAKER_FAILURES + 1):
+        with pytest.raises(CRDPHTTPError):
+            b.call(fn)
+    # No failover on a 4xx, and no breaker.
+    assert len(calls) == BREAKER_FAILURES + 1
+    assert not any(s.tripped for s in b._state.values())
+
+
+def test_half_open_breaker_gets_one_probe_at_a_time(clock):
+    b = EndpointBalancer(["a", "b"])
+    trip(b, "a")
+    busy = [b.acquire() for _ in range(3)]
+    assert busy == ["b"] * 3
+    clock.t += BREAKER_OPEN_SECONDS
+    # Half-open: "a" (idle) gets the probe, and only that one call until it ends.
+    assert b.acquire() == "a"
+    assert b._state["a"].probing
+    assert b.acquire() == "b"
+
+    # A failed probe re-opens the breaker at once.
+    assert b.release("a", None, True)
+    assert b._state["a"].open_until == clock.t + BREAKER_OPEN_SECONDS
+    assert b.acquire() == "b"
+
+    # A successful probe closes it.
+    clock.t += BREAKER_OPEN_SECONDS
+    assert b.acquire() == "a"
+    assert not b.release("a", 0.01, False)
+    state = b._state["a"]
+    assert not state.tripped and not state.probing and state.consecutive_failures == 0
+
+
+def test_all_breakers_open_uses_the_one_that_reopens_first(clock):
+    b = EndpointBalancer(["a", "b", "c"])
+    trip(b, "b")
+    clock.t += 1
+    trip(b, "c")
+    clock.t += 1
+    trip(b, "a")
+    # Nothing is closed or half-open: rather than fail, use "b", which reopens first.
+    assert b.acquire() == "b"
+    assert b._state["b"].probing
+    # Its failed probe pushes it back behind "c".
+    assert b.release("b", None, True)
+    assert b.acquire() == "c"
+
+
+def test_failover_on_endpoint_failure(clock):
+    b = EndpointBalancer(["a", "b", "c"])
+    m = WorkerMetrics(0)
+    tried = []
+
+    def fn(endpoint):
+        tried.append(endpoint)
+        if endpoint != "c":
+            raise CRDPHTTPError(503)
+        return "ok"
+
+    # A new balancer starts its rotation at "a", so the call fails over a -> b -> c.
+    assert b.call(fn, m) == "ok"
+    assert tried == ["a", "b", "c"]
+    assert m.failovers == 2
+    assert m.endpoint_calls == {"a": [1, 1, 0], "b": [1, 1, 0], "c": [1, 0, 0]}
+    assert all(s.outstanding == 0 for s in b._state.values())
+
+
+def test_no_endpoint_left_raises_the_last_failure(clock):
+    b = EndpointBalancer(["a", "b"])
+    m = WorkerMetrics(0)
+    tried = []
+
+    def fn(endpoint):
+        tried.append(endpoint)
+        raise CRDPHTTPError(503)
+
+    with pytest.raises(CRDPHTTPError):
+        b.call(fn, m)
+    assert sorted(tried) == ["a", "b"]
+    assert m.failovers == 1
+
+
+def test_failures_trip_the_breaker_and_count_it(clock):
+    b = EndpointBalancer(["a", "b"])
+    m = WorkerMetrics(0)
+
+    def fn(endpoint):
+        if endpoint == "a":
+            raise CRDPHTTPError(503)
+        return endpoint
+
+    for _ in range(4 * BREAKER_FAILURES):
+        assert b.call(fn, m) == "b"
+    assert b._state["a"].tripped
+    calls, errors, trips = m.endpoint_calls["a"]
+    assert calls == errors == m.failovers == BREAKER_FAILURES
+    assert trips == 1
+    assert m.endpoint_calls["b"][:2] == [4 * BREAKER_FAILURES, 0]
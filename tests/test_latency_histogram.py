@@ -0,0 +1,97 @@
+import json
+import math
+import random
+
+import pytest
+
+import latency_histogram
+from latency_histogram import LatencyHistogram, SUB_BUCKETS_HALF, UNIT_SECONDS
+
+np = latency_histogram.np
+
+
+def exact_percentile(values, p):
+    """Nearest-rank percentile, the definition value_at() follows."""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(p * len(ordered))) - 1]
+
+
+@pytest.mark.parametrize("us", [0, 1, 1000, 2047, 2048, 2049, 12345, 999_999, 3_600_000_000])
+def test_bucket_bounds_contain_value_within_resolution(us):
+    lo, hi = LatencyHistogram._bounds(LatencyHistogram._index(us))
+    assert lo <= us <= hi
+    assert hi - lo <= max(lo, 1) / SUB_BUCKETS_HALF
+
+
+def test_buckets_tile_the_value_range():
+    prev_hi = -1
+    for i in range(LatencyHistogram._index(10_000_000) + 1):
+        lo, hi = LatencyHistogram._bounds(i)
+        assert lo == prev_hi + 1
+        assert LatencyHistogram._index(lo) == LatencyHistogram._index(hi) == i
+        prev_hi = hi
+
+
+def test_percentiles_within_bucket_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-3.5, 0.8) for _ in range(20_000)]
+    hist = LatencyHistogram.from_values(values)
+    assert len(hist) == len(values)
+    for p in (0.5, 0.95, 0.99, 0.999):
+        exact = exact_percentile(values, p)
+        assert hist.value_at(p) == pytest.approx(exact, rel=1 / SUB_BUCKETS_HALF, abs=UNIT_SECONDS)
+    assert hist.value_at(1.0) == pytest.approx(max(values), abs=UNIT_SECONDS)
+    assert hist.min_us == round(min(values) / UNIT_SECONDS)
+
+
+@pytest.mark.skipif(np is None, reason="NumPy not installed")
+def test_numpy_and_python_binning_agree():
+    values = [random.Random(3).expovariate(20) for _ in range(5000)]
+    py = LatencyHistogram()
+    for v in values:
+        py.record(v)
+    vec = LatencyHistogram.from_values(np.array(values))
+    assert (vec.counts, vec.total, vec.min_us, vec.max_us) == (py.counts, py.total, py.min_us, py.max_us)
+
+
+def test_dict_round_trip_through_json():
+    hist = LatencyHistogram.from_values([0.0, 0.0004, 0.012, 0.012, 0.5, 7.25])
+    back = LatencyHistogram.from_dict(json.loads(json.dumps(hist.to_dict())))
+    assert back.counts == hist.counts
+    assert (back.total, back.min_us, back.max_us) == (hist.total, hist.min_us, hist.max_us)
+    assert back.percentiles() == hist.percentiles()
+
+
+def test_from_dict_rejects_other_layouts():
+    d = LatencyHistogram.from_values([0.01]).to_dict()
+    with pytest.raises(ValueError):
+        LatencyHistogram.from_dict(dict(d, sub_bucket_bits=d["sub_bucket_bits"] + 1))
+
+
+def test_merge_equals_recording_everything_in_one():
+    rng = random.Random(11)
+    parts = [[rng.uniform(0.001, 0.2) for _ in range(n)] for n in (1000, 1, 250, 0)]
+    merged = LatencyHistogram()
+    for part in parts:
+        merged.merge(LatencyHistogram.from_values(part))
+    single = LatencyHistogram.from_values([v for part in parts for v in part])
+    assert merged.counts == single.counts
+    assert (merged.total, merged.min_us, merged.max_us) == (single.total, single.min_us, single.max_us)
+    assert merged.percentiles() == single.percentiles()
+
+
+def test_merge_into_and_from_empty():
+    hist = LatencyHistogram.from_values([0.003, 0.004])
+    assert LatencyHistogram().merge(hist).percentiles() == hist.percentiles()
+    before = hist.to_dict()
+    hist.merge(LatencyHistogram())
+    assert hist.to_dict() == before
+
+
+def test_empty_histogram():
+    hist = LatencyHistogram()
+    assert len(hist) == 0
+    assert hist.value_at(0.5) == 0.0
+    assert hist.percentiles() == {"p50": 0.0, "p95": 0.0, "p99": 0.0, "p999": 0.0, "max": 0.0}
+    back = LatencyHistogram.from_dict(hist.to_dict())
+    assert back.total == 0 and back.percentiles() == hist.percentiles()
@@ -0,0 +1,84 @@
+import pytest
+
+from CRDP_REST_API import BodyCache
+from workload import IndexedMessages, MessageSource, ResultSink
+
+
+def protect(payloads):
+    return ["ct:" + p for p in payloads]
+
+
+def protect_phase(source, keep_msgs):
+    """Run PROTECT over `source` into a sink that keeps `keep_msgs` messages, as CRDP_Stress.py does."""
+    sink = ResultSink(keep_msgs)
+    for msg_idx, payloads in IndexedMessages(source):
+        sink.add(0, msg_idx, protect(payloads))
+    return sink
+
+
+@pytest.mark.parametrize("cells, iterations, size", [
+    (3, 5, 2),    # size neither a multiple nor a divisor of the cells
+    (7, 4, 3),
+    (6, 3, 3),    # divisor: shared cycle messages
+    (4, 5, 8),    # multiple
+    (5, 2, 13),   # one message spans several cycles
+    (1, 50, 7),   # single payload (random / file modes)
+    (10, 3, 0),   # size 0: everything in one message
+])
+def test_payloads_cycle_over_the_cells(cells, iterations, size):
+    cells = ["p%d" % i for i in range(cells)]
+    source = MessageSource(cells, len(cells) * iterations, size)
+    flat = [p for i in range(len(source)) for p in source[i]]
+    assert flat == [cells[k % len(cells)] for k in range(len(cells) * iterations)]
+    assert all(len(source[i]) == source.size for i in range(len(source) - 1))
+    assert source[-1] == source[len(source) - 1]
+
+
+@pytest.mark.parametrize("cells, iterations, size", [(3, 5, 2), (7, 4, 3), (6, 3, 3), (4, 5, 8), (5, 2, 13), (1, 50, 7), (10, 3, 0)])
+def test_reveal_messages_line_up_with_protect(cells, iterations, size):
+    cells = ["p%d" % i for i in range(cells)]
+    source = MessageSource(cells, len(cells) * iterations, size)
+    # CSV mode keeps the messages that cover the first pass over the cells.
+    sink = protect_phase(source, -(-len(cells) // source.size))
+    reveal = source.aligned(sink.items())
+    assert len(reveal) == len(source)
+    for (msg_idx, payloads), (reveal_idx, ciphertexts) in zip(IndexedMessages(source), IndexedMessages(reveal)):
+        assert reveal_idx == msg_idx
+        assert ciphertexts == protect(payloads)
+
+
+def test_reveal_of_a_partial_protect_run():
+    cells = ["p%d" % i for i in range(5)]
+    source = MessageSource(cells, 40, 3)
+    sink = protect_phase(source, 2)
+    reveal = source.aligned(sink.items(), payload_count=22)
+    assert sum(len(reveal[i]) for i in range(len(reveal))) == 22
+    for i in range(len(reveal)):
+        assert reveal[i] == protect(source[i])[:len(reveal[i])]
+
+
+def test_round_robin_shares_keep_message_indexes():
+    source = MessageSource(["a", "b", "c", "d"], 4 * 7, 3)
+    indexed = IndexedMessages(source)
+    shares = [indexed[i::3] for i in range(3)]
+    seen = sorted((msg_idx, payloads) for share in shares for msg_idx, payloads in share)
+    assert seen == [(i, source[i]) for i in range(len(source))]
+    assert [msg_idx for msg_idx, _ in shares[1]] == list(range(1, len(source), 3))
+    # A share of a share is still indexed against the whole source.
+    assert [msg_idx for msg_idx, _ in shares[2][1::2]] == list(range(5, len(source), 6))
+
+
+@pytest.mark.parametrize("cells, iterations, size, stored", [
+    (40, 3, 7, 0),    # misaligned: every message is built afresh
+    (40, 3, 8, 5),    # divisor: one entry per distinct cycle message
+    (1, 50, 7, 1),    # single payload: one shared message, the partial tail is not stored
+])
+def test_body_cache_holds_only_shared_messages(cells, iterations, size, stored):
+    cells = ["p%d" % i for i in range(cells)]
+    source = MessageSource(cells, len(cells) * iterations, size)
+    cache = BodyCache()
+    for _ in range(3):
+        for i in range(len(source)):
+            payloads = source[i]
+            cache.encode("protect", payloads, {"data_array": payloads})
+    assert len(cache._entries) == stored
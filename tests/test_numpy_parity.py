@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+import call_records
+import parallel_execution
+from parallel_execution import AggregatedMetrics, WorkerMetrics
+
+pytestmark = pytest.mark.skipif(parallel_execution.np is None, reason="needs numpy for the vectorized side")
+
+T0 = 1_000_000.0
+ENDPOINTS = ["a:443", "b:443", "c:443"]
+
+
+def phase(seed, window=None, open_loop=False, adaptive=False):
+    """An AggregatedMetrics of a few workers' synthetic calls, the same for a given seed."""
+    rng = random.Random(seed)
+    agg = AggregatedMetrics()
+    agg.overall_start = T0
+    agg.overall_end = T0 + 10
+    for w in range(4):
+        m = WorkerMetrics(w)
+        t = T0 + rng.random() * 0.2
+        for _ in range(rng.randrange(0, 60)):
+            lat = rng.uniform(0.005, 0.4)
+            n = rng.randrange(1, 100)
+            m.record_call(t, t + lat, n)
+            m.items_processed += n
+            m.call_bytes.append((n * 20, n * 40))
+            m.call_endpoints.append((rng.choice(ENDPOINTS), 200))
+            if open_loop:
+                m.schedule_lags.append(rng.uniform(0, 0.05))
+            if adaptive:
+                m.concurrency_samples.append((t + lat, rng.randrange(1, 32)))
+            if rng.random() < 0.1:
+                m.call_errors.append((t + lat, rng.choice(ENDPOINTS), rng.choice([500, 503, None])))
+            t += lat
+        # Ragged side lists: a worker whose last calls did not go through the bulk wrappers.
+        if w == 3:
+            del m.call_bytes[-3:], m.call_endpoints[-3:], m.schedule_lags[-3:]
+        agg.add_worker_metrics(m)
+    if window:
+        agg.set_measurement_window(*window)
+    return agg
+
+
+def both(monkeypatch, seed, derive, **kwargs):
+    """derive(metrics) with NumPy, then on fresh metrics with the plain-Python fallbacks."""
+    vectorized = derive(phase(seed, **kwargs))
+    monkeypatch.setattr(parallel_execution, "np", None)
+    monkeypatch.setattr(call_records, "np", None)
+    fallback = derive(phase(seed, **kwargs))
+    monkeypatch.undo()
+    return vectorized, fallback
+
+
+def columns(cols):
+    return list(cols.starts), list(cols.ends), list(cols.items)
+
+
+SEEDS = [1, 2, 3]
+WINDOWS = [None, (1.0, 2.0), (20.0, 0.0)]  # whole phase, a steady-state window, an empty window
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("window", WINDOWS)
+def test_wire_bytes(monkeypatch, seed, window):
+    vectorized, fallback = both(monkeypatch, seed, lambda agg: agg.wire_bytes(), window=window)
+    assert vectorized == fallback
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("window", WINDOWS)
+def test_endpoint_breakdown(monkeypatch, seed, window):
+    def derive(agg):
+        return {endpoint: (columns(cols), errors) for endpoint, (cols, errors) in agg.endpoint_breakdown().items()}
+    vectorized, fallback = both(monkeypatch, seed, derive, window=window)
+    assert vectorized == fallback
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("open_loop", [False, True])
+def test_corrected_latencies(monkeypatch, seed, window, open_loop):
+    vectorized, fallback = both(monkeypatch, seed, lambda agg: list(agg.corrected_latencies()),
+                                window=window, open_loop=open_loop)
+    assert vectorized == pytest.approx(fallback)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("window", WINDOWS)
+def test_rolling_concurrency(monkeypatch, seed, window):
+    vectorized, fallback = both(monkeypatch, seed, lambda agg: agg.rolling_concurrency(0.25),
+                                window=window, adaptive=True)
+    assert vectorized == pytest.approx(fallback)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("lo, hi", [(None, None), (T0 + 0.5, None), (None, T0 + 1.5), (T0 + 0.5, T0 + 1.5), (T0 + 50, None)])
+def test_call_columns_window_and_series(monkeypatch, seed, lo, hi):
+    def derive(agg):
+        cols = agg.call_columns(measured=False).window(lo, hi)
+        return columns(cols), cols.total_items(), cols.throughput_series(T0 + 0.3, 0.1)
+    (v_cols, v_items, v_series), (f_cols, f_items, f_series) = both(monkeypatch, seed, derive)
+    assert v_cols == f_cols
+    assert v_items == f_items
+    assert v_series == pytest.approx(f_series)
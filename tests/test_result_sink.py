@@ -0,0 +1,118 @@
+import json
+import multiprocessing
+import pickle
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from workload import ResultSink
+
+FORK = "fork" in multiprocessing.get_all_start_methods()
+
+
+def feed(sink, items, chunk=7, lap=0, first_msg=0):
+    """add() `items` in calls of `chunk` items, numbered from first_msg."""
+    for k, start in enumerate(range(0, len(items), chunk)):
+        sink.add(lap, first_msg + k, items[start:start + chunk])
+
+
+def inclusion_counts(make_sample, population, trials):
+    counts = [0] * population
+    for _ in range(trials):
+        for item in make_sample():
+            counts[item] += 1
+    return counts
+
+
+def assert_uniform(counts, expected, bins=10):
+    """Inclusion counts binned into `bins` ranges stay within a chi-square bound (p ~ 0.001)."""
+    size = len(counts) // bins
+    binned = [sum(counts[b * size:(b + 1) * size]) for b in range(bins)]
+    chi2 = sum((n - expected * size) ** 2 / (expected * size) for n in binned)
+    assert chi2 < 27.9, binned
+
+
+@pytest.mark.parametrize("population", [3, 10, 11, 1000])
+def test_reservoir_size(population):
+    sink = ResultSink(keep_msgs=0, sample_size=10)
+    feed(sink, list(range(population)))
+    assert sink.received == population
+    assert len(sink.sample) == min(10, population)
+    assert len(set(sink.sample)) == len(sink.sample)
+    assert set(sink.sample) <= set(range(population))
+
+
+def test_reservoir_is_uniform_over_calls_and_laps():
+    random.seed(1234)
+    population, size, trials = 1000, 10, 2000
+
+    def sample():
+        sink = ResultSink(keep_msgs=0, sample_size=size)
+        # Uneven calls, over two laps of the messages.
+        feed(sink, list(range(500)), chunk=1)
+        feed(sink, list(range(500, 1000)), chunk=37, lap=1)
+        return sink.sample
+
+    assert_uniform(inclusion_counts(sample, population, trials), trials * size / population)
+
+
+def test_merge_keeps_the_sample_uniform_across_workers():
+    random.seed(99)
+    size, trials = 10, 2000
+
+    def sample():
+        a = ResultSink(keep_msgs=0, sample_size=size)
+        b = pickle.loads(pickle.dumps(a))
+        feed(a, list(range(300)))
+        feed(b, list(range(300, 1000)), chunk=50)
+        a.merge(b)
+        assert a.received == 1000
+        return a.sample
+
+    assert_uniform(inclusion_counts(sample, 1000, trials), trials * size / 1000)
+
+
+def test_merge_keeps_lowest_messages_and_counts():
+    parent = ResultSink(keep_msgs=3)
+    children = [pickle.loads(pickle.dumps(parent)) for _ in range(2)]
+    for msg_idx in (5, 1, 9):
+        children[0].add(0, msg_idx, ["a%d" % msg_idx])
+    for msg_idx in (0, 4, 8):
+        children[1].add(0, msg_idx, ["b%d" % msg_idx])
+    children[1].add(1, 2, ["late lap"])
+    for child in children:
+        parent.merge(child)
+    assert [m for m, _ in parent.chunks()] == [0, 1, 4]
+    assert parent.items() == ["b0", "a1", "b4"]
+    assert parent.received == 7
+    assert parent.record()["kept"] == 3
+
+
+def _fill_shard(sink, shard, messages):
+    # -processes child: fill the pickled copy, return it to be merged.
+    for msg_idx in range(shard, len(messages), 4):
+        sink.add(0, msg_idx, messages[msg_idx])
+    sink.close()
+    return sink
+
+
+@pytest.mark.skipif(not FORK, reason="the -processes pool needs fork")
+def test_spool_after_multiprocess_run(tmp_path):
+    spool = tmp_path / "results.jsonl"
+    messages = [["ct-%d-%d" % (m, i) for i in range(25)] for m in range(200)]
+    parent = ResultSink(keep_msgs=None, sample_size=20, spool_path=str(spool), phase="protect")
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("fork")) as pool:
+        for child in pool.map(_fill_shard, [parent] * 4, range(4), [messages] * 4):
+            parent.merge(child)
+
+    lines = [json.loads(line) for line in spool.read_text().splitlines()]
+    assert len(lines) == parent.spooled_calls == len(messages)
+    assert sorted(line["msg_idx"] for line in lines) == list(range(len(messages)))
+    for line in lines:
+        assert line["phase"] == "protect" and line["lap"] == 0
+        assert line["results"] == messages[line["msg_idx"]]
+    assert parent.received == 200 * 25
+    assert parent.items() == [item for msg in messages for item in msg]
+    assert len(parent.sample) == 20
+    assert parent.record()["spooled_calls"] == len(messages)